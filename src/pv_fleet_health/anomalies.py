@@ -1,20 +1,44 @@
+from typing import Optional
 import numpy as np
 import pandas as pd
 from .config import Config
+from .context import PlantContext, plant_context
+from .sketches import QuantileSketch, sketch
 from .utils import mad
 
-def detect_anomalies(df: pd.DataFrame, cfg: Config, p_expected: pd.Series) -> pd.DataFrame:
+def residual_sketch(
+    df: pd.DataFrame, cfg: Config, p_expected: pd.Series, ctx: Optional[PlantContext] = None
+) -> QuantileSketch:
+    """Sketch of the residuals detect_anomalies standardizes, for one partition of df."""
+    residual = df["p_ac_kw"] - p_expected
+    mask = plant_context(df, cfg, ctx).residual_mask(residual)
+    return sketch(residual[mask].to_numpy(), cfg.sketch_relative_accuracy)
+
+def detect_anomalies(
+    df: pd.DataFrame,
+    cfg: Config,
+    p_expected: pd.Series,
+    residual_stats: Optional[QuantileSketch] = None,
+    ctx: Optional[PlantContext] = None,
+) -> pd.DataFrame:
+    """
+    residual_stats: merged residual_sketch of all partitions; when given, the residual
+    median/MAD come from it instead of this frame, so df can be one chunk of the series.
+    ctx: shared PlantContext of df (masks are taken from it).
+    """
+    ctx = plant_context(df, cfg, ctx)
     out = df.copy()
     out["p_expected_kw"] = p_expected
     out["residual_kw"] = out["p_ac_kw"] - out["p_expected_kw"]
 
-    intrinsic = ~out["event_label"].isin(["curtailment", "grid_outage"])
-    daylight = out["poa_wm2"] >= cfg.poa_for_kpi_min_wm2
-    mask = intrinsic & daylight & out["residual_kw"].notna()
+    mask = ctx.residual_mask(out["residual_kw"])
 
     r = out.loc[mask, "residual_kw"]
-    med = float(np.nanmedian(r)) if len(r) else np.nan
-    m = mad(r) if len(r) else np.nan
+    if residual_stats is not None:
+        med, m = residual_stats.quantile(0.5), residual_stats.mad()
+    else:
+        med = float(np.nanmedian(r)) if len(r) else np.nan
+        m = mad(r) if len(r) else np.nan
     denom = (1.4826 * m + 1e-9) if np.isfinite(m) else np.nan
 
     out["resid_z"] = (out["residual_kw"] - med) / denom if np.isfinite(denom) else np.nan
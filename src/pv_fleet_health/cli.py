@@ -0,0 +1,55 @@
+import argparse
+from pathlib import Path
+from typing import List, Optional
+from .config import load_config_yaml
+from .paths import Paths
+from .pipeline import STAGES, run_pipeline
+
+def _run(args: argparse.Namespace) -> int:
+    cfg = load_config_yaml(args.config)
+    root = Path(args.root) if args.root else Path(args.config).resolve().parent
+    _, timing = run_pipeline(
+        cfg,
+        Paths(root),
+        targets=args.target or None,
+        executor=args.executor,
+        max_workers=args.workers,
+        force=args.force,
+    )
+    print(timing.to_string(index=False))
+    print(f"Stage outputs in: {Paths(root).stage_dir}")
+    return 0
+
+def _serve(args: argparse.Namespace) -> int:
+    from .service import serve
+    root = Path(args.root) if args.root else Path.cwd()
+    print(f"Serving {Paths(root).outputs_dir} on http://{args.host}:{args.port}")
+    serve(Paths(root), host=args.host, port=args.port, cache_size=args.cache_size)
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="pv-fleet-health", description="PV fleet health pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the stage DAG, skipping stages with fresh cached outputs")
+    run.add_argument("--config", default="config.yaml", help="config YAML (default: ./config.yaml)")
+    run.add_argument("--root", default=None, help="project root for outputs/ (default: the config's folder)")
+    run.add_argument("--target", action="append", choices=[s.name for s in STAGES],
+                     help="stage to build (repeatable; default: all)")
+    run.add_argument("--executor", choices=["thread", "process"], default="thread")
+    run.add_argument("--workers", type=int, default=None)
+    run.add_argument("--force", action="store_true", help="ignore cached stage outputs")
+    run.set_defaults(func=_run)
+
+    srv = sub.add_parser("serve", help="serve persisted outputs over local HTTP (read-only JSON)")
+    srv.add_argument("--root", default=None, help="project root containing outputs/ (default: cwd)")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--cache-size", type=int, default=256, help="LRU response cache entries")
+    srv.set_defaults(func=_serve)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
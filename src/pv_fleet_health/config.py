@@ -14,6 +14,15 @@ class Config:
     metadata_path: str | None = None
     timestamp_col: str = "Timestamp"
     timestamp_format: str | None = None
+    ingest_executor: str = "thread"  # "thread" | "process" for multi-file SCADA
+    ingest_max_workers: int | None = None
+    # Column projection: parse only raw columns mapped to these canonical signals
+    ingest_projection: bool = False
+    ingest_signals: set[str] = frozenset({
+        "poa_irradiance_wm2", "tmod_c", "tamb_c", "ac_power_kw", "pf",
+        "energy_kwh_interval", "energy_kwh_counter", "energy_kwh_counter_measured",
+        "nameplate_kwp",  # capacity weights of the intra-plant peer comparison
+    })
 
     # Time
     default_timezone: str = "Europe/Athens"
@@ -45,6 +54,24 @@ class Config:
     model_min_points: int = 2000
     walkforward_train_days: int = 60
     walkforward_test_days: int = 14
+    registry_drift_threshold: float = 0.25  # refit when post-training MAE grows by this fraction
+    registry_min_drift_points: int = 500
+
+    # Incremental fleet clustering: full refit when the mean squared distance to the
+    # stored centroids grows by this fraction
+    cluster_drift_threshold: float = 0.25
+    cluster_batch_size: int = 1024
+
+    # Intra-plant peer comparison: flag components below (1 - frac) x peer median
+    peer_underperformance_frac: float = 0.05
+
+    # Performance loss rate (year-on-year)
+    plr_min_pairs: int = 180
+    plr_bootstrap_samples: int = 1000
+    plr_ci_level: float = 0.682
+
+    # Mergeable quantile sketches (chunked / parallel robust statistics)
+    sketch_relative_accuracy: float = 0.01
 
     # Anomaly thresholds
     residual_z_threshold: float = 4.0
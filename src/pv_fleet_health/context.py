@@ -0,0 +1,118 @@
+"""
+Per-plant derived data shared by the model, KPI, loss and anomaly stages.
+
+PlantContext computes the masks every stage starts from (intrinsic = not curtailment or
+grid outage, daylight = poa >= threshold, notna of the signal columns) and the
+build_features matrix once per plant frame. Masks are cached bit-packed (np.packbits,
+1 bit per timestamp) and the event label column is compared as factorized codes, so the
+string isin runs over the distinct labels only. Pass the same context to
+fit_expected_power_model, predict_expected, compute_kpis, compute_losses and
+detect_anomalies; each still builds a private one when called without it.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Optional
+import numpy as np
+import pandas as pd
+from .config import Config
+
+EXTRINSIC_LABELS = ["curtailment", "grid_outage"]
+MODEL_COLS = ["p_ac_kw", "poa_wm2", "tmod_c"]
+PERF_COLS = ["p_ac_kw", "poa_wm2"]
+
+def build_features(df: pd.DataFrame) -> pd.DataFrame:
+    X = pd.DataFrame(index=df.index)
+    X["poa"] = df["poa_wm2"]
+    X["poa2"] = df["poa_wm2"] ** 2
+    X["tmod"] = df["tmod_c"]
+    X["poa_tmod"] = df["poa_wm2"] * df["tmod_c"]
+    return X
+
+@dataclass
+class PlantContext:
+    df: pd.DataFrame
+    cfg: Config
+    _bits: Dict[Hashable, np.ndarray] = field(default_factory=dict, repr=False)
+    _features: Optional[pd.DataFrame] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def _mask(self, key: Hashable, compute) -> pd.Series:
+        bits = self._bits.get(key)
+        if bits is None:
+            bits = self._bits[key] = np.packbits(np.asarray(compute(), dtype=bool))
+        return pd.Series(np.unpackbits(bits, count=len(self.df)).view(bool), index=self.df.index)
+
+    def _intrinsic(self) -> np.ndarray:
+        if "event_label" not in self.df.columns:
+            return np.ones(len(self.df), dtype=bool)
+        codes, labels = pd.factorize(self.df["event_label"])
+        extrinsic = np.append(np.isin(np.asarray(labels, dtype=object), EXTRINSIC_LABELS), False)
+        return ~extrinsic[codes]  # code -1 (missing label) picks the appended False
+
+    @property
+    def intrinsic(self) -> pd.Series:
+        return self._mask("intrinsic", self._intrinsic)
+
+    def daylight(self, threshold: Optional[float] = None) -> pd.Series:
+        """poa_wm2 >= threshold (default cfg.poa_for_kpi_min_wm2)."""
+        thr = self.cfg.poa_for_kpi_min_wm2 if threshold is None else float(threshold)
+        return self._mask(("daylight", thr), lambda: self.df["poa_wm2"].to_numpy(dtype=float) >= thr)
+
+    def notna(self, col: str) -> pd.Series:
+        return self._mask(("notna", col), lambda: self.df[col].notna().to_numpy())
+
+    def _combined(self, name: str, cols) -> pd.Series:
+        thr = self.cfg.poa_for_kpi_min_wm2
+
+        def compute() -> np.ndarray:
+            m = self.intrinsic.to_numpy() & self.daylight().to_numpy()
+            for c in cols:
+                m &= self.notna(c).to_numpy()
+            return m
+        return self._mask((name, thr), compute)
+
+    @property
+    def model_mask(self) -> pd.Series:
+        """Points the expected-power model is fitted and scored on (intrinsic, daylight, complete)."""
+        return self._combined("model", MODEL_COLS)
+
+    @property
+    def perf_mask(self) -> pd.Series:
+        """Points the KPI perf index is computed on (no tmod requirement)."""
+        return self._combined("perf", PERF_COLS)
+
+    def residual_mask(self, residual: pd.Series) -> pd.Series:
+        """Points detect_anomalies standardizes (residual depends on the model, so not cached)."""
+        return self._combined("intrinsic_daylight", []) & residual.notna()
+
+    @property
+    def features(self) -> pd.DataFrame:
+        if self._features is None:
+            self._features = build_features(self.df)
+        return self._features
+
+    def window(self, start: pd.Timestamp, end: pd.Timestamp) -> "PlantContext":
+        """Context of df[start <= index < end], slicing the cached masks and features."""
+        idx = self.df.index
+        if idx.is_monotonic_increasing:
+            sel = slice(idx.searchsorted(start, side="left"), idx.searchsorted(end, side="left"))
+        else:
+            sel = np.flatnonzero((idx >= start) & (idx < end))
+        n = len(self.df)
+        bits = {k: np.packbits(np.unpackbits(b, count=n).view(bool)[sel]) for k, b in self._bits.items()}
+        feats = self._features.iloc[sel] if self._features is not None else None
+        return PlantContext(self.df.iloc[sel], self.cfg, bits, feats)
+
+def plant_context(df: pd.DataFrame, cfg: Config, ctx: Optional[PlantContext] = None) -> PlantContext:
+    """ctx when given (it must describe df: same index), otherwise a fresh context for df."""
+    if ctx is None:
+        return PlantContext(df, cfg)
+    if len(ctx) != len(df):
+        raise ValueError(f"PlantContext has {len(ctx)} rows but the frame has {len(df)}")
+    if ctx.df.index is not df.index and not ctx.df.index.equals(df.index):
+        raise ValueError("PlantContext was built for a frame with a different index")
+    if ctx.cfg is not cfg:
+        # cached masks are keyed by their POA threshold, so they can be shared
+        return PlantContext(ctx.df, cfg, ctx._bits, ctx._features)
+    return ctx
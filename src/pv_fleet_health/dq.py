@@ -1,7 +1,14 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 from .config import Config
+from .plant import SERIES_KEY_COLS, counter_intervals
+
+DQ_FRAC_COLS = [
+    "poa_missing_frac_day", "tmod_missing_frac_day", "p_missing_frac_day",
+    "poa_oob_frac", "tmod_oob_frac", "pf_oob_frac",
+    "poa_stuck_frac", "tmod_stuck_frac", "counter_reset_frac",
+]
 
 def stuck_sensor_fraction(series: pd.Series, window: int = 12, tol: float = 1e-6) -> float:
     s = series.dropna()
@@ -10,71 +17,211 @@ def stuck_sensor_fraction(series: pd.Series, window: int = 12, tol: float = 1e-6
     roll_std = s.rolling(window).std()
     return float((roll_std <= tol).mean())
 
-def dq_score_plant(scada_rs: pd.DataFrame, cfg: Config, plant: str) -> Dict:
-    sub = scada_rs[scada_rs["plant_name"] == plant].copy()
-
-    poa = sub[sub["canonical_signal"] == "poa_irradiance_wm2"].groupby("ts")["value_rs"].median()
-    tmod = sub[sub["canonical_signal"] == "tmod_c"].groupby("ts")["value_rs"].median()
-    pwr = sub[sub["canonical_signal"] == "ac_power_kw"].groupby("ts")["value_rs"].sum(min_count=1)
-    pf = sub[sub["canonical_signal"] == "pf"].groupby("ts")["value_rs"].median()
+def frac_to_score(x: float) -> float:
+    if pd.isna(x):
+        return 0.7
+    return float(max(0.0, 1.0 - min(1.0, x * 5)))
 
-    base = pd.DataFrame({"poa": poa, "tmod": tmod, "p_kw": pwr, "pf": pf})
+def dq_scores(fracs: Dict) -> Dict:
+    """Score components, dq_score and monitoring_confidence from the DQ fractions."""
+    score_components = {
+        "completeness_score": float(np.mean([frac_to_score(fracs["poa_missing_frac_day"]),
+                                             frac_to_score(fracs["tmod_missing_frac_day"]),
+                                             frac_to_score(fracs["p_missing_frac_day"])])),
+        "plausibility_score": float(np.mean([frac_to_score(fracs["poa_oob_frac"]),
+                                             frac_to_score(fracs["tmod_oob_frac"]),
+                                             frac_to_score(fracs["pf_oob_frac"])])),
+        "stuck_score": float(np.mean([frac_to_score(fracs["poa_stuck_frac"]),
+                                      frac_to_score(fracs["tmod_stuck_frac"])])),
+        "counter_score": frac_to_score(fracs["counter_reset_frac"]),
+    }
+    dq_score = float(np.mean(list(score_components.values())))
+    confidence = "High" if dq_score >= 0.85 else ("Medium" if dq_score >= 0.70 else "Low")
+    return {**score_components, "dq_score": dq_score, "monitoring_confidence": confidence}
 
-    daylight = base["poa"] >= cfg.daylight_poa_threshold_wm2
-    if daylight.sum() == 0:
-        daylight = base["poa"].notna()
+def frac_to_score_array(x) -> np.ndarray:
+    """Vectorized frac_to_score."""
+    x = np.asarray(x, dtype=float)
+    return np.where(np.isnan(x), 0.7, np.maximum(0.0, 1.0 - np.minimum(1.0, x * 5)))
 
-    comp = {
-        "poa_missing_frac_day": float(base.loc[daylight, "poa"].isna().mean()),
-        "tmod_missing_frac_day": float(base.loc[daylight, "tmod"].isna().mean()),
-        "p_missing_frac_day": float(base.loc[daylight, "p_kw"].isna().mean()),
-    }
-    plaus = {
-        "poa_oob_frac": float(((base["poa"] < cfg.min_valid_poa_wm2) | (base["poa"] > cfg.max_valid_poa_wm2)).mean()),
-        "tmod_oob_frac": float(((base["tmod"] < cfg.min_valid_tmod_c) | (base["tmod"] > cfg.max_valid_tmod_c)).mean()),
-        "pf_oob_frac": float((base["pf"].abs() > cfg.max_pf_abs).mean()) if base["pf"].notna().any() else np.nan,
-    }
-    stuck = {
-        "poa_stuck_frac": stuck_sensor_fraction(base["poa"]),
-        "tmod_stuck_frac": stuck_sensor_fraction(base["tmod"]),
+def signal_bounds(cfg: Config) -> Dict[str, Tuple[float, float]]:
+    """Plausible value range per canonical signal (signals not listed are not checked)."""
+    return {
+        "poa_irradiance_wm2": (cfg.min_valid_poa_wm2, cfg.max_valid_poa_wm2),
+        "tmod_c": (cfg.min_valid_tmod_c, cfg.max_valid_tmod_c),
+        "pf": (-cfg.max_pf_abs, cfg.max_pf_abs),
     }
 
-    # counter resets (plant-level heuristic)
-    counters = sub[sub["canonical_signal"].str.startswith("energy_kwh_counter")]
-    reset_frac = np.nan
-    if not counters.empty:
-        csum = counters.groupby("ts")["value_rs"].sum(min_count=1).dropna().sort_index()
-        d = csum.diff()
-        reset_frac = float((d < cfg.counter_reset_negative_kwh_threshold).mean())
+def _stuck_flags(values: pd.Series, groups: pd.Series, window: int, tol: float) -> pd.Series:
+    """
+    Per group, rolling std of the non-NaN values <= tol (as in stuck_sensor_fraction),
+    aligned to values.index (False on NaN rows).
+    """
+    valid = values.notna()
+    v = values[valid]
+    roll = v.groupby(groups[valid].to_numpy(), sort=False).rolling(window).std()
+    flags = pd.Series(roll.to_numpy() <= tol, index=roll.index.get_level_values(-1))
+    return flags.reindex(values.index, fill_value=False)
 
-    def frac_to_score(x: float) -> float:
-        if pd.isna(x):
-            return 0.7
-        return float(max(0.0, 1.0 - min(1.0, x * 5)))
+def _counter_daily(scada_rs: pd.DataFrame, cfg: Config, keys: List[str]) -> pd.DataFrame:
+    """Valid counter readings and resets per keys + date."""
+    counters = scada_rs[scada_rs["canonical_signal"].astype(str).str.startswith("energy_kwh_counter")]
+    if counters.empty:
+        index = pd.MultiIndex.from_arrays([[]] * (len(keys) + 1), names=keys + ["date"])
+        return pd.DataFrame({"n_counter_readings": [], "n_counter_resets": []}, index=index, dtype="int64")
+    c = counter_intervals(counters, cfg)
+    resets = c.assign(date=c["ts"].dt.normalize()).groupby(keys + ["date"], dropna=False)["counter_reset"].sum()
+    readings = counters.assign(date=counters["ts"].dt.normalize(), n=counters["value_rs"].notna()) \
+        .groupby(keys + ["date"], dropna=False)["n"].sum()
+    return pd.DataFrame({"n_counter_readings": readings, "n_counter_resets": resets}).fillna(0).astype("int64")
 
-    score_components = {
-        "completeness_score": float(np.mean([frac_to_score(comp["poa_missing_frac_day"]),
-                                             frac_to_score(comp["tmod_missing_frac_day"]),
-                                             frac_to_score(comp["p_missing_frac_day"])])),
-        "plausibility_score": float(np.mean([frac_to_score(plaus["poa_oob_frac"]),
-                                             frac_to_score(plaus["tmod_oob_frac"]),
-                                             frac_to_score(plaus["pf_oob_frac"])])),
-        "stuck_score": float(np.mean([frac_to_score(stuck["poa_stuck_frac"]),
-                                      frac_to_score(stuck["tmod_stuck_frac"])])),
-        "counter_score": frac_to_score(reset_frac),
-    }
-    dq_score = float(np.mean(list(score_components.values())))
-    confidence = "High" if dq_score >= 0.85 else ("Medium" if dq_score >= 0.70 else "Low")
+def dq_daily_signals(scada_rs: pd.DataFrame, cfg: Config, window: int = 12, tol: float = 1e-6) -> pd.DataFrame:
+    """
+    Daily DQ of every series (plant, component, canonical signal) of the resampled table,
+    in grouped passes over the whole table: rows on the resampling grid, valid readings,
+    out-of-bounds readings (signals in signal_bounds), stuck readings (rolling std over
+    window valid readings <= tol; series with < 2 * window valid readings are not judged)
+    and counter resets, with the matching fractions of the valid readings.
+    """
+    df = scada_rs[SERIES_KEY_COLS + ["ts", "value_rs"]].sort_values(SERIES_KEY_COLS + ["ts"], kind="stable")
+    df = df.reset_index(drop=True)
+    gid = df.groupby(SERIES_KEY_COLS, sort=False, dropna=False).ngroup()
+    v = df["value_rs"]
+    valid = v.notna()
 
-    return {
+    bounds = signal_bounds(cfg)
+    lo = df["canonical_signal"].map({k: b[0] for k, b in bounds.items()}).astype(float)
+    hi = df["canonical_signal"].map({k: b[1] for k, b in bounds.items()}).astype(float)
+    n_valid_series = valid.groupby(gid).transform("sum")
+
+    rows = pd.DataFrame({
+        "date": df["ts"].dt.normalize(),
+        "n_rows": 1,
+        "n_valid": valid,
+        "n_oob": valid & ((v < lo) | (v > hi)),
+        "n_stuck": _stuck_flags(v, gid, window, tol),
+        "checked_oob": lo.notna(),
+        "checked_stuck": n_valid_series >= 2 * window,
+    })
+    rows[SERIES_KEY_COLS] = df[SERIES_KEY_COLS]
+    keys = SERIES_KEY_COLS + ["date"]
+    daily = rows.groupby(keys, sort=False, dropna=False).agg(
+        n_rows=("n_rows", "sum"), n_valid=("n_valid", "sum"), n_oob=("n_oob", "sum"), n_stuck=("n_stuck", "sum"),
+        checked_oob=("checked_oob", "any"), checked_stuck=("checked_stuck", "any"),
+    )
+    daily = daily.join(_counter_daily(scada_rs, cfg, SERIES_KEY_COLS), how="left")
+    daily[["n_counter_readings", "n_counter_resets"]] = daily[["n_counter_readings", "n_counter_resets"]] \
+        .fillna(0).astype("int64")
+    is_counter = daily.index.get_level_values("canonical_signal").astype(str).str.startswith("energy_kwh_counter")
+
+    n = daily["n_valid"].where(daily["n_valid"] > 0)
+    daily["missing_frac"] = 1.0 - daily["n_valid"] / daily["n_rows"]
+    daily["oob_frac"] = (daily["n_oob"] / n).where(daily["checked_oob"])
+    daily["stuck_frac"] = (daily["n_stuck"] / n).where(daily["checked_stuck"])
+    daily["counter_reset_frac"] = (daily["n_counter_resets"] / daily["n_counter_readings"].where(
+        daily["n_counter_readings"] > 0)).where(is_counter)
+    return daily.drop(columns=["checked_oob", "checked_stuck"]).reset_index().sort_values(keys, kind="stable") \
+        .reset_index(drop=True)
+
+PLANT_DAILY_COUNTS = [
+    "n_rows", "n_daylight", "poa_missing_day", "tmod_missing_day", "p_missing_day",
+    "poa_oob", "tmod_oob", "pf_oob", "pf_valid", "poa_valid", "poa_stuck", "tmod_valid", "tmod_stuck",
+    "n_counter_readings", "n_counter_resets",
+]
+
+def dq_daily_plant(scada_rs: pd.DataFrame, cfg: Config, window: int = 12, tol: float = 1e-6) -> pd.DataFrame:
+    """
+    Daily counts behind the plant DQ report, for all plants in grouped passes: the plant
+    POA/Tmod/PF medians and summed AC power per timestamp, daylight (poa >= the daylight
+    threshold, or poa present for plants that never reach it), missing-in-daylight,
+    out-of-bounds and stuck counts, and counter readings/resets. The per-day fractions and
+    dq_score are added for inspection; dq_report_from_daily sums the counts over days.
+    """
+    keys = ["plant_name", "ts"]
+    sig = scada_rs["canonical_signal"]
+    med_sigs = ["poa_irradiance_wm2", "tmod_c", "pf"]
+    med = scada_rs[sig.isin(med_sigs)].groupby(keys + ["canonical_signal"])["value_rs"].median() \
+        .unstack("canonical_signal").reindex(columns=med_sigs)
+    pwr = scada_rs[sig == "ac_power_kw"].groupby(keys)["value_rs"].sum(min_count=1)
+    base = pd.DataFrame({"poa": med["poa_irradiance_wm2"], "tmod": med["tmod_c"], "p_kw": pwr, "pf": med["pf"]})
+    base = base.sort_index().reset_index()
+    plant = base["plant_name"]
+
+    daylight = base["poa"] >= cfg.daylight_poa_threshold_wm2
+    daylight = daylight.where(daylight.groupby(plant).transform("any"), base["poa"].notna())
+
+    rows = pd.DataFrame({
         "plant_name": plant,
-        **comp, **plaus, **stuck,
-        "counter_reset_frac": reset_frac,
-        **score_components,
-        "dq_score": dq_score,
-        "monitoring_confidence": confidence,
+        "date": base["ts"].dt.normalize(),
+        "n_rows": 1,
+        "n_daylight": daylight,
+        "poa_missing_day": daylight & base["poa"].isna(),
+        "tmod_missing_day": daylight & base["tmod"].isna(),
+        "p_missing_day": daylight & base["p_kw"].isna(),
+        "poa_oob": (base["poa"] < cfg.min_valid_poa_wm2) | (base["poa"] > cfg.max_valid_poa_wm2),
+        "tmod_oob": (base["tmod"] < cfg.min_valid_tmod_c) | (base["tmod"] > cfg.max_valid_tmod_c),
+        "pf_oob": base["pf"].abs() > cfg.max_pf_abs,
+        "pf_valid": base["pf"].notna(),
+        "poa_valid": base["poa"].notna(),
+        "poa_stuck": _stuck_flags(base["poa"], plant, window, tol),
+        "tmod_valid": base["tmod"].notna(),
+        "tmod_stuck": _stuck_flags(base["tmod"], plant, window, tol),
+    })
+    daily = rows.groupby(["plant_name", "date"]).sum()
+    daily = daily.join(_counter_daily(scada_rs, cfg, ["plant_name"]), how="outer").fillna(0).astype("int64")
+    daily = daily[PLANT_DAILY_COUNTS]
+
+    fr = _fractions(daily, window, daily=True)
+    scores = {
+        "completeness_score": fr[["poa_missing_frac_day", "tmod_missing_frac_day", "p_missing_frac_day"]],
+        "plausibility_score": fr[["poa_oob_frac", "tmod_oob_frac", "pf_oob_frac"]],
+        "stuck_score": fr[["poa_stuck_frac", "tmod_stuck_frac"]],
+        "counter_score": fr[["counter_reset_frac"]],
     }
+    for name, f in scores.items():
+        fr[name] = frac_to_score_array(f.to_numpy()).mean(axis=1)
+    fr["dq_score"] = fr[list(scores)].mean(axis=1)
+    return daily.join(fr).reset_index()
+
+def _fractions(counts: pd.DataFrame, window: int, daily: bool = False) -> pd.DataFrame:
+    """DQ_FRAC_COLS from summed dq_daily_plant counts (NaN where nothing was observed)."""
+    def ratio(num: str, den: str) -> pd.Series:
+        d = counts[den]
+        return (counts[num] / d.where(d > 0)).astype(float)
+
+    # whole-history stuck fractions need 2 * window valid readings, as stuck_sensor_fraction
+    min_stuck = 1 if daily else 2 * window
+    return pd.DataFrame({
+        "poa_missing_frac_day": ratio("poa_missing_day", "n_daylight"),
+        "tmod_missing_frac_day": ratio("tmod_missing_day", "n_daylight"),
+        "p_missing_frac_day": ratio("p_missing_day", "n_daylight"),
+        "poa_oob_frac": ratio("poa_oob", "n_rows"),
+        "tmod_oob_frac": ratio("tmod_oob", "n_rows"),
+        "pf_oob_frac": ratio("pf_oob", "n_rows").where(counts["pf_valid"] > 0),
+        "poa_stuck_frac": ratio("poa_stuck", "poa_valid").where(counts["poa_valid"] >= min_stuck),
+        "tmod_stuck_frac": ratio("tmod_stuck", "tmod_valid").where(counts["tmod_valid"] >= min_stuck),
+        "counter_reset_frac": ratio("n_counter_resets", "n_counter_readings"),
+    }, index=counts.index)[DQ_FRAC_COLS]
+
+def dq_report_from_daily(
+    plant_daily: pd.DataFrame, window: int = 12, plants: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    The plant DQ report (as dq_score_plant) from dq_daily_plant rows, summing the daily
+    counts per plant; pass a date-filtered table for the report of a period. plants adds
+    rows (all fractions NaN) for plants without any daily counts.
+    """
+    counts = plant_daily.groupby("plant_name")[PLANT_DAILY_COUNTS].sum()
+    if plants is not None:
+        counts = counts.reindex(pd.Index(plants, name="plant_name"), fill_value=0)
+    fr = _fractions(counts, window)
+    scores = pd.DataFrame([dq_scores(r) for r in fr.to_dict("records")], index=fr.index)
+    return fr.join(scores).reset_index()
+
+def dq_score_plant(scada_rs: pd.DataFrame, cfg: Config, plant: str) -> Dict:
+    daily = dq_daily_plant(scada_rs[scada_rs["plant_name"] == plant], cfg)
+    return dq_report_from_daily(daily, plants=[plant]).iloc[0].to_dict()
 
 def dq_report_fleet(scada_rs: pd.DataFrame, cfg: Config) -> pd.DataFrame:
     plants = sorted(scada_rs["plant_name"].dropna().unique().tolist())
-    return pd.DataFrame([dq_score_plant(scada_rs, cfg, p) for p in plants])
+    return dq_report_from_daily(dq_daily_plant(scada_rs, cfg), plants=plants)
@@ -0,0 +1,247 @@
+"""
+Optional out-of-core backend: the resampling, DQ and time-audit steps as DuckDB SQL over
+Parquet stage files (a path, directory or glob), returning the same frames as the pandas
+implementations in timebase.py and dq.py.
+"""
+from typing import List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from .config import Config
+from .dq import DQ_FRAC_COLS, dq_scores
+from .io import resolve_input_paths
+from .plant import COUNTER_KEY_COLS
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except Exception:
+    DUCKDB_AVAILABLE = False
+
+RS_KEY_COLS = ["plant_name", "component_type", "component_id", "canonical_signal", "unit", "signal_type"]
+
+StagePaths = Union[str, List[str]]
+
+def connect(threads: Optional[int] = None):
+    """In-process DuckDB connection (all cores unless threads is given)."""
+    if not DUCKDB_AVAILABLE:
+        raise ImportError("duckdb is not installed (pip install pv-fleet-health[sql])")
+    con = duckdb.connect()
+    if threads is not None:
+        con.execute(f"SET threads = {int(threads)}")
+    return con
+
+def _files(paths: StagePaths) -> List[str]:
+    if isinstance(paths, str):
+        return resolve_input_paths(paths)
+    return [str(p) for p in paths]
+
+def _ts_tz(files: List[str]) -> Optional[str]:
+    t = pq.read_schema(files[0]).field("ts").type
+    return getattr(t, "tz", None)
+
+def _to_ts(us: pd.Series, tz: Optional[str]) -> pd.Series:
+    """Epoch microseconds (from SQL) back to timestamps in the stage file's timezone."""
+    ts = pd.to_datetime(us.astype("Int64"), unit="us", utc=tz is not None)
+    return ts.dt.tz_convert(tz) if tz is not None else ts
+
+def _buckets(freq: str, tz: Optional[str], keys: str) -> Tuple[str, str, str]:
+    """
+    SQL for pandas' resample bins: (bucket expression over src, grid series over the
+    buckets of one series, grid bucket -> epoch us). Fixed-length freqs step from local
+    midnight of each series' first timestamp (pandas' origin="start_day") in absolute
+    time, so bins keep their UTC spacing across DST; "1D" buckets are local calendar days.
+    """
+    off = pd.tseries.frequencies.to_offset(freq)
+    local = "timezone($tz, ts)" if tz else "ts"
+    to_us = "epoch_us(timezone($tz, {}))" if tz else "epoch_us({})"
+    if isinstance(off, pd.offsets.Day):
+        if off.n != 1:
+            raise ValueError(f"resample_signals_sql supports fixed-length freqs and '1D', not {freq!r}")
+        return (f"date_trunc('day', {local})", "generate_series(min(bucket), max(bucket), INTERVAL 1 DAY)",
+                to_us.format("grid.bucket"))
+    if not isinstance(off, pd.offsets.Tick):
+        raise ValueError(f"resample_signals_sql supports fixed-length freqs and '1D', not {freq!r}")
+    step = int(pd.Timedelta(off) / pd.Timedelta(microseconds=1))
+    origin = to_us.format(f"date_trunc('day', min({local}) OVER (PARTITION BY {keys}))")
+    bucket = f"{origin} + (epoch_us(ts) - {origin}) // {step} * {step}"
+    return bucket, f"generate_series(min(bucket), max(bucket), {step})", "grid.bucket"
+
+def resample_signals_sql(long_paths: StagePaths, cfg: Config, con=None) -> pd.DataFrame:
+    """
+    resample_signals over Parquet files of the long table, with the same bins as pandas
+    (see _buckets; calendar freqs other than "1D" raise ValueError). Every series covers
+    its full first..last bucket range (empty buckets NaN), and rows with a missing key are
+    dropped, as with the pandas groupby.
+    """
+    files = _files(long_paths)
+    con = con or connect()
+    tz = _ts_tz(files)
+    keys = ", ".join(RS_KEY_COLS)
+    bucket, series, bucket_us = _buckets(cfg.standard_freq, tz, ", ".join(RS_KEY_COLS[:-1]))
+    not_null = " AND ".join(f"{k} IS NOT NULL" for k in RS_KEY_COLS[:-1])
+    sql = f"""
+        WITH src AS (
+            SELECT * EXCLUDE (ts),
+                   CASE WHEN starts_with(canonical_signal, 'energy_kwh_counter') THEN 'counter'
+                        WHEN canonical_signal = 'energy_kwh_interval' THEN 'energy_interval'
+                        ELSE 'instant_or_avg' END AS signal_type,
+                   {bucket} AS bucket,
+                   epoch_us(ts) AS ts_us
+            FROM read_parquet($files)
+            WHERE ts IS NOT NULL AND {not_null}
+        ),
+        agg AS (
+            SELECT {keys}, bucket,
+                   CASE signal_type
+                        WHEN 'counter' THEN arg_max(value, ts_us) FILTER (WHERE value IS NOT NULL)
+                        WHEN 'energy_interval' THEN sum(value)
+                        ELSE avg(value) END AS value_rs
+            FROM src
+            GROUP BY {keys}, bucket
+        ),
+        grid AS (
+            SELECT {keys}, unnest({series}) AS bucket
+            FROM agg
+            GROUP BY {keys}
+        )
+        SELECT {bucket_us} AS ts_us, agg.value_rs, {", ".join(f"grid.{k}" for k in RS_KEY_COLS)}
+        FROM grid LEFT JOIN agg USING ({keys}, bucket)
+        ORDER BY {keys}, ts_us
+    """
+    params = {"files": files, **({"tz": tz} if tz else {})}
+    df = con.execute(sql, params).df()
+    df.insert(0, "ts", _to_ts(df.pop("ts_us"), tz))
+    df["value_rs"] = df["value_rs"].astype(float)
+    return df
+
+def dq_report_fleet_sql(rs_paths: StagePaths, cfg: Config, con=None, window: int = 12, tol: float = 1e-6) -> pd.DataFrame:
+    """
+    dq_report_fleet over Parquet files of the resampled table: the DQ fractions of every
+    plant in one query (window/tol as in stuck_sensor_fraction), scored with dq.dq_scores.
+    Stuck fractions use the exact window std; pandas' rolling std can leave ~1e-5 round-off
+    on constant windows that follow large values, so it may count fewer stuck points.
+    """
+    files = _files(rs_paths)
+    con = con or connect()
+    ckeys = ", ".join(COUNTER_KEY_COLS)
+    sql = f"""
+        WITH rs AS (SELECT * FROM read_parquet($files)),
+        plants AS (SELECT DISTINCT plant_name FROM rs WHERE plant_name IS NOT NULL),
+        base AS (
+            SELECT plant_name, ts,
+                   median(value_rs) FILTER (WHERE canonical_signal = 'poa_irradiance_wm2') AS poa,
+                   median(value_rs) FILTER (WHERE canonical_signal = 'tmod_c') AS tmod,
+                   sum(value_rs) FILTER (WHERE canonical_signal = 'ac_power_kw') AS p_kw,
+                   median(value_rs) FILTER (WHERE canonical_signal = 'pf') AS pf
+            FROM rs
+            WHERE ts IS NOT NULL AND plant_name IS NOT NULL
+              AND canonical_signal IN ('poa_irradiance_wm2', 'tmod_c', 'ac_power_kw', 'pf')
+            GROUP BY plant_name, ts
+        ),
+        day AS (
+            SELECT *,
+                   CASE WHEN bool_or(poa >= $daylight) OVER (PARTITION BY plant_name)
+                        THEN coalesce(poa >= $daylight, false) ELSE poa IS NOT NULL END AS daylight
+            FROM base
+        ),
+        fracs AS (
+            SELECT plant_name,
+                   avg((poa IS NULL)::DOUBLE) FILTER (WHERE daylight) AS poa_missing_frac_day,
+                   avg((tmod IS NULL)::DOUBLE) FILTER (WHERE daylight) AS tmod_missing_frac_day,
+                   avg((p_kw IS NULL)::DOUBLE) FILTER (WHERE daylight) AS p_missing_frac_day,
+                   avg(coalesce(poa < $poa_min OR poa > $poa_max, false)::DOUBLE) AS poa_oob_frac,
+                   avg(coalesce(tmod < $tmod_min OR tmod > $tmod_max, false)::DOUBLE) AS tmod_oob_frac,
+                   CASE WHEN count(pf) > 0 THEN avg(coalesce(abs(pf) > $pf_max, false)::DOUBLE) END AS pf_oob_frac
+            FROM day GROUP BY plant_name
+        ),
+        stuck_src AS (
+            SELECT plant_name, 'poa' AS sig, ts, poa AS v FROM base WHERE poa IS NOT NULL
+            UNION ALL
+            SELECT plant_name, 'tmod' AS sig, ts, tmod AS v FROM base WHERE tmod IS NOT NULL
+        ),
+        stuck_win AS (
+            SELECT plant_name, sig,
+                   row_number() OVER w >= {window} AND stddev_samp(v) OVER w <= {tol} AS is_stuck
+            FROM stuck_src
+            WINDOW w AS (PARTITION BY plant_name, sig ORDER BY ts ROWS {window - 1} PRECEDING)
+        ),
+        stuck AS (
+            SELECT plant_name,
+                   CASE WHEN count(*) FILTER (WHERE sig = 'poa') >= {2 * window}
+                        THEN avg(is_stuck::DOUBLE) FILTER (WHERE sig = 'poa') END AS poa_stuck_frac,
+                   CASE WHEN count(*) FILTER (WHERE sig = 'tmod') >= {2 * window}
+                        THEN avg(is_stuck::DOUBLE) FILTER (WHERE sig = 'tmod') END AS tmod_stuck_frac
+            FROM stuck_win GROUP BY plant_name
+        ),
+        counters AS (
+            SELECT plant_name,
+                   value_rs - lag(value_rs) OVER (PARTITION BY {ckeys} ORDER BY ts) < $reset_thr AS is_reset
+            FROM rs
+            WHERE starts_with(canonical_signal, 'energy_kwh_counter') AND value_rs IS NOT NULL
+        ),
+        resets AS (
+            SELECT plant_name, sum(coalesce(is_reset, false)::DOUBLE) / count(*) AS counter_reset_frac
+            FROM counters GROUP BY plant_name
+        )
+        SELECT plants.plant_name, fracs.* EXCLUDE (plant_name), stuck.* EXCLUDE (plant_name),
+               resets.counter_reset_frac
+        FROM plants
+        LEFT JOIN fracs USING (plant_name)
+        LEFT JOIN stuck USING (plant_name)
+        LEFT JOIN resets USING (plant_name)
+        ORDER BY plants.plant_name
+    """
+    params = {
+        "files": files,
+        "daylight": cfg.daylight_poa_threshold_wm2,
+        "poa_min": cfg.min_valid_poa_wm2, "poa_max": cfg.max_valid_poa_wm2,
+        "tmod_min": cfg.min_valid_tmod_c, "tmod_max": cfg.max_valid_tmod_c,
+        "pf_max": cfg.max_pf_abs,
+        "reset_thr": cfg.counter_reset_negative_kwh_threshold,
+    }
+    fr = con.execute(sql, params).df()
+    fr[DQ_FRAC_COLS] = fr[DQ_FRAC_COLS].astype(float)
+    scores = pd.DataFrame([dq_scores(r) for r in fr[DQ_FRAC_COLS].to_dict("records")], index=fr.index)
+    return pd.concat([fr[["plant_name"] + DQ_FRAC_COLS], scores], axis=1)
+
+def time_index_audit_sql(long_paths: StagePaths, con=None) -> pd.DataFrame:
+    """compute_time_index_audit over Parquet files of the long table (same columns)."""
+    files = _files(long_paths)
+    con = con or connect()
+    cols = set(pq.read_schema(files[0]).names)
+    dup_keys = "plant_name, raw_column_name, ts" if "raw_column_name" in cols else "plant_name, ts"
+    sql = f"""
+        WITH src AS (
+            SELECT plant_name, ts FROM read_parquet($files)
+            WHERE plant_name IS NOT NULL AND ts IS NOT NULL
+        ),
+        counts AS (
+            SELECT plant_name, count(*) AS n,
+                   1.0 - count(DISTINCT ({dup_keys})) / count(*) AS dup_frac
+            FROM (SELECT {dup_keys} FROM read_parquet($files)
+                  WHERE plant_name IS NOT NULL AND ts IS NOT NULL)
+            GROUP BY plant_name
+        ),
+        u AS (
+            SELECT plant_name, epoch_us(ts) AS ts_us,
+                   (epoch_us(ts) - lag(epoch_us(ts)) OVER (PARTITION BY plant_name ORDER BY ts)) / 6e7 AS dt_min
+            FROM (SELECT DISTINCT plant_name, ts FROM src)
+        ),
+        med AS (SELECT plant_name, median(dt_min) AS median_dt_min FROM u GROUP BY plant_name)
+        SELECT u.plant_name, min(u.ts_us) AS min_us, max(u.ts_us) AS max_us,
+               any_value(counts.dup_frac) AS dup_frac, any_value(med.median_dt_min) AS median_dt_min,
+               any_value(counts.n) AS n, count(*) AS n_unique,
+               count(*) FILTER (WHERE u.dt_min > 1.5 * med.median_dt_min) AS n_gaps
+        FROM u JOIN med USING (plant_name) JOIN counts USING (plant_name)
+        GROUP BY u.plant_name
+        ORDER BY u.plant_name
+    """
+    df = con.execute(sql, {"files": files}).df()
+    tz = _ts_tz(files)
+    df.insert(1, "min_ts", _to_ts(df.pop("min_us"), tz))
+    df.insert(2, "max_ts", _to_ts(df.pop("max_us"), tz))
+    df["median_dt_min"] = df["median_dt_min"].astype(float)
+    for c in ["n", "n_unique", "n_gaps"]:
+        df[c] = df[c].astype(np.int64)
+    return df[["plant_name", "min_ts", "max_ts", "dup_frac", "median_dt_min", "n", "n_unique", "n_gaps"]]
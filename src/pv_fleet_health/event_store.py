@@ -0,0 +1,207 @@
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .events import CATEGORY_PRIORITY
+
+EVENT_COLS = ["plant_name", "start_ts", "end_ts", "Severity", "category", "Description", "State", "Ack", "Source"]
+TEXT_COLS = ["Severity", "Description", "State", "Ack", "Source"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS plants (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY, plant_id INTEGER NOT NULL, category_id INTEGER NOT NULL,
+    start_us INTEGER NOT NULL, end_us INTEGER NOT NULL,
+    Severity TEXT, Description TEXT, State TEXT, Ack TEXT, Source TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS events_dedupe
+    ON events (plant_id, category_id, start_us, end_us, COALESCE(Source, ''), COALESCE(Description, ''));
+CREATE TABLE IF NOT EXISTS merged_events (
+    id INTEGER PRIMARY KEY, plant_id INTEGER NOT NULL, category_id INTEGER NOT NULL,
+    start_us INTEGER NOT NULL, end_us INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS merged_by_group ON merged_events (plant_id, category_id, start_us);
+CREATE VIRTUAL TABLE IF NOT EXISTS events_idx USING rtree(id, plant_lo, plant_hi, cat_lo, cat_hi, t_lo, t_hi);
+CREATE VIRTUAL TABLE IF NOT EXISTS merged_idx USING rtree(id, plant_lo, plant_hi, cat_lo, cat_hi, t_lo, t_hi);
+"""
+
+def _to_us(ts: pd.Series) -> np.ndarray:
+    idx = pd.DatetimeIndex(ts)
+    idx = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+    return idx.as_unit("us").asi8
+
+def _union(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Union of closed intervals, merged like merge_overlapping_events (touching ones too)."""
+    order = np.argsort(starts, kind="stable")
+    s, e = np.asarray(starts, dtype=np.int64)[order], np.asarray(ends, dtype=np.int64)[order]
+    if len(s) == 0:
+        return s, e
+    first = np.flatnonzero(np.r_[True, s[1:] > np.maximum.accumulate(e)[:-1]])
+    return s[first], np.maximum.reduceat(e, first)
+
+def _text(s: pd.Series) -> list:
+    return [None if pd.isna(x) else str(x) for x in s]
+
+@dataclass(frozen=True)
+class EventStore:
+    """
+    SQLite store of normalized events and their per (plant, category) merged intervals.
+
+    Both tables carry an R*Tree over (plant, category, time interval), so "events of plant
+    P overlapping [t0, t1]" is an index lookup rather than a scan of the alarm history.
+    Timestamps are stored as UTC microseconds and returned in the timezone of the
+    first appended batch.
+    """
+    path: Path
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(str(self.path))
+        con.executescript(SCHEMA)
+        return con
+
+    def _ids(self, con: sqlite3.Connection, table: str, names: Iterable[str]) -> dict:
+        con.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(n,) for n in set(names)])
+        return dict((n, i) for i, n in con.execute(f"SELECT id, name FROM {table}"))
+
+    def timezone(self) -> Optional[str]:
+        con = self._connect()
+        try:
+            row = con.execute("SELECT value FROM meta WHERE key = 'tz'").fetchone()
+        finally:
+            con.close()
+        return row[0] if row else None
+
+    def append(self, events_norm: pd.DataFrame) -> int:
+        """
+        Insert normalize_events output (already-stored events are ignored) and fold the
+        new events into the merged intervals of their (plant, category).
+        Returns the number of new events.
+        """
+        ev = events_norm.dropna(subset=["plant_name", "start_ts", "end_ts"])
+        if ev.empty:
+            return 0
+        con = self._connect()
+        try:
+            tz = str(pd.DatetimeIndex(ev["start_ts"]).tz or "UTC")
+            con.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('tz', ?)", (tz,))
+            plants = self._ids(con, "plants", ev["plant_name"].astype(str))
+            cats = self._ids(con, "categories", ev["category"].astype(str))
+            rows = pd.DataFrame({
+                "plant_id": ev["plant_name"].astype(str).map(plants).to_numpy(),
+                "category_id": ev["category"].astype(str).map(cats).to_numpy(),
+                "start_us": _to_us(ev["start_ts"]),
+                "end_us": _to_us(ev["end_ts"]),
+            })
+            for c in TEXT_COLS:
+                rows[c] = _text(ev[c]) if c in ev.columns else None
+            before = con.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+            con.executemany(
+                "INSERT OR IGNORE INTO events (plant_id, category_id, start_us, end_us, Severity, Description, "
+                "State, Ack, Source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows[["plant_id", "category_id", "start_us", "end_us"] + TEXT_COLS].itertuples(index=False, name=None),
+            )
+            con.execute(
+                "INSERT INTO events_idx SELECT id, plant_id, plant_id, category_id, category_id, "
+                "start_us / 1e6, end_us / 1e6 FROM events WHERE id > ?", (before,)
+            )
+            new = pd.read_sql_query(
+                "SELECT plant_id, category_id, start_us, end_us FROM events WHERE id > ?", con, params=(before,)
+            )
+            for (pid, cid), g in new.groupby(["plant_id", "category_id"], sort=False):
+                self._merge_new(con, int(pid), int(cid), g["start_us"].to_numpy(), g["end_us"].to_numpy())
+            con.commit()
+        finally:
+            con.close()
+        return len(new)
+
+    def _merge_new(self, con: sqlite3.Connection, pid: int, cid: int, starts: np.ndarray, ends: np.ndarray) -> None:
+        """
+        Fold new intervals of one (plant, category) into its merged intervals. Only the
+        stored merged rows overlapping a new interval (found through the R*Tree) are
+        replaced, so an append costs O(new events), not O(history).
+        """
+        s, e = _union(starts, ends)
+        hits = {}
+        for lo, hi in zip(s.tolist(), e.tolist(), strict=True):
+            for row in con.execute(
+                "SELECT e.id, e.start_us, e.end_us FROM merged_idx i JOIN merged_events e ON e.id = i.id "
+                "WHERE i.plant_lo <= ? AND i.plant_hi >= ? AND i.cat_lo <= ? AND i.cat_hi >= ? "
+                "AND i.t_lo <= ? AND i.t_hi >= ? AND e.start_us <= ? AND e.end_us >= ?",
+                (pid, pid, cid, cid, hi / 1e6, lo / 1e6, hi, lo),
+            ):
+                hits[row[0]] = row[1:]
+        if hits:
+            old = np.array(list(hits.values()), dtype=np.int64)
+            s, e = _union(np.concatenate([s, old[:, 0]]), np.concatenate([e, old[:, 1]]))
+            ids = [(i,) for i in hits]
+            con.executemany("DELETE FROM merged_idx WHERE id = ?", ids)
+            con.executemany("DELETE FROM merged_events WHERE id = ?", ids)
+        for lo, hi in zip(s.tolist(), e.tolist(), strict=True):
+            cur = con.execute(
+                "INSERT INTO merged_events (plant_id, category_id, start_us, end_us) VALUES (?, ?, ?, ?)",
+                (pid, cid, lo, hi),
+            )
+            con.execute("INSERT INTO merged_idx VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (cur.lastrowid, pid, pid, cid, cid, lo / 1e6, hi / 1e6))
+
+    def query(
+        self,
+        plant: str,
+        t0: pd.Timestamp,
+        t1: pd.Timestamp,
+        categories: Optional[List[str]] = None,
+        merged: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Events of plant overlapping [t0, t1] (start <= t1 and end >= t0), optionally only
+        the given categories. merged=True returns merge_overlapping_events-style intervals.
+        Naive t0/t1 are taken in the store's timezone.
+        """
+        tz = self.timezone() or "UTC"
+        t0, t1 = (pd.Timestamp(t) for t in (t0, t1))
+        t0 = t0.tz_localize(tz) if t0.tzinfo is None else t0
+        t1 = t1.tz_localize(tz) if t1.tzinfo is None else t1
+        lo, hi = int(t0.tz_convert("UTC").value // 1000), int(t1.tz_convert("UTC").value // 1000)
+
+        table, idx = ("merged_events", "merged_idx") if merged else ("events", "events_idx")
+        cols = "" if merged else ", " + ", ".join(f"e.{c}" for c in TEXT_COLS)
+        # the R*Tree holds float32 seconds (rounded outwards), so candidates are re-checked
+        # exactly on the microsecond columns
+        sql = (
+            f"SELECT ? AS plant_name, c.name AS category, e.start_us, e.end_us{cols} "
+            f"FROM {idx} i JOIN {table} e ON e.id = i.id JOIN categories c ON c.id = e.category_id "
+            "WHERE i.plant_lo <= ? AND i.plant_hi >= ? AND i.t_lo <= ? AND i.t_hi >= ? "
+            "AND e.start_us <= ? AND e.end_us >= ?"
+        )
+        con = self._connect()
+        try:
+            row = con.execute("SELECT id FROM plants WHERE name = ?", (str(plant),)).fetchone()
+            pid = row[0] if row else -1
+            params: list = [str(plant), pid, pid, hi / 1e6, lo / 1e6, hi, lo]
+            if categories:
+                sql += f" AND c.name IN ({', '.join('?' * len(categories))})"
+                params += [str(c) for c in categories]
+            df = pd.read_sql_query(sql + " ORDER BY e.start_us", con, params=params)
+        finally:
+            con.close()
+        for c in ["start", "end"]:
+            df[f"{c}_ts"] = pd.to_datetime(df.pop(f"{c}_us").astype("int64"), unit="us", utc=True).dt.tz_convert(tz)
+        order = ["plant_name", "category", "start_ts", "end_ts"] if merged else EVENT_COLS
+        return df[order]
+
+    def plants(self) -> List[str]:
+        con = self._connect()
+        try:
+            return [r[0] for r in con.execute("SELECT name FROM plants ORDER BY name")]
+        finally:
+            con.close()
+
+def category_counts(store: EventStore, plant: str, t0: pd.Timestamp, t1: pd.Timestamp) -> pd.Series:
+    """Number of events per category overlapping [t0, t1], in CATEGORY_PRIORITY order."""
+    ev = store.query(plant, t0, t1)
+    return ev["category"].value_counts().reindex(CATEGORY_PRIORITY, fill_value=0)
@@ -91,10 +91,23 @@ def merge_overlapping_events(events_norm: pd.DataFrame) -> pd.DataFrame:
             out_rows.append({"plant_name": plant, "category": cat, "start_ts": cur_s, "end_ts": cur_e})
     return pd.DataFrame(out_rows)
 
-def join_events_to_timeseries(plant_df: pd.DataFrame, events_norm: pd.DataFrame, plant: str) -> pd.DataFrame:
+def select_plant_events(events, plant: str, t0: pd.Timestamp, t1: pd.Timestamp, merged: bool = False) -> pd.DataFrame:
+    """
+    Events of plant overlapping [t0, t1] from an events frame (filtered in memory) or an
+    EventStore (R*Tree lookup; merged=True reads its merged intervals).
+    """
+    if isinstance(events, pd.DataFrame):
+        ev = events[events["plant_name"] == plant] if "plant_name" in events.columns else events
+        return ev[(ev["start_ts"] <= t1) & (ev["end_ts"] >= t0)].copy()
+    return events.query(plant, t0, t1, merged=merged)
+
+def join_events_to_timeseries(plant_df: pd.DataFrame, events_norm, plant: str) -> pd.DataFrame:
+    """events_norm: normalize_events output or an EventStore holding it."""
     df = plant_df.copy()
     df["event_label"] = "none"
-    ev = events_norm[events_norm["plant_name"] == plant].copy()
+    if df.empty:
+        return df
+    ev = select_plant_events(events_norm, plant, df.index.min(), df.index.max())
     if ev.empty:
         return df
 
@@ -1,47 +1,83 @@
-from typing import Dict, Optional
+import json
+import os
+from typing import Dict, Optional, Tuple
 import numpy as np
 import pandas as pd
+from .config import Config
 from .kpi import get_dc_kwp
 
 try:
-    from sklearn.cluster import KMeans
+    from sklearn.cluster import KMeans, MiniBatchKMeans
     SKLEARN_AVAILABLE = True
 except Exception:
     SKLEARN_AVAILABLE = False
 
+CLUSTER_FEATURES = ["perf_index_12m_median", "dq_score", "unexplained_loss_frac_90d", "plr_pct_per_year"]
+# drift test used when the reference fit had zero error (squared distance in scaled units)
+CLUSTER_MSE_FLOOR = 1e-12
+
+SCORECARD_COLS = [
+    "plant_name",
+    "perf_index_12m_median",
+    "dq_score",
+    "monitoring_confidence",
+    "unexplained_loss_frac_90d",
+    "plr_pct_per_year",
+]
+
+def _stack_card_tables(health_cards: Dict[str, Dict], key: str) -> pd.DataFrame:
+    plants = list(health_cards)
+    return pd.concat([health_cards[p][key] for p in plants], keys=plants, names=["plant_name", None])
+
+def summarize_health_cards(health_cards: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    Last-12-month perf index median and last-90-day loss sums for every card at once:
+    the per-plant tables are stacked and reduced with grouped tail/median/sum.
+    """
+    plants = pd.Index(list(health_cards), name="plant_name")
+    out = pd.DataFrame(index=plants)
+    if len(plants) == 0:
+        return out.assign(perf_index_12m_median=[], total_loss_90d=[], unexplained_loss_90d=[])
+
+    monthly = _stack_card_tables(health_cards, "monthly")
+    if "perf_index_median" in monthly.columns:
+        last12 = monthly.groupby(level=0, sort=False).tail(12)
+        out["perf_index_12m_median"] = last12.groupby(level=0, sort=False)["perf_index_median"].median()
+    else:
+        out["perf_index_12m_median"] = np.nan
+
+    losses = _stack_card_tables(health_cards, "losses_daily")
+    last90 = losses.groupby(level=0, sort=False).tail(90)
+    for col, name in [("loss_kwh", "total_loss_90d"), ("loss_unexplained", "unexplained_loss_90d")]:
+        if col in last90.columns:
+            out[name] = last90.groupby(level=0, sort=False)[col].sum().reindex(plants, fill_value=0.0)
+        else:
+            out[name] = np.nan
+    return out
+
+def _first_per_plant(df: pd.DataFrame, cols: list) -> pd.DataFrame:
+    if df is None or df.empty or "plant_name" not in df.columns:
+        return pd.DataFrame(columns=cols, index=pd.Index([], name="plant_name"))
+    return df.drop_duplicates("plant_name").set_index("plant_name")[cols]
+
 def build_fleet_scorecard(health_cards: Dict[str, Dict], dq_report: pd.DataFrame, plr_table: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    for plant, card in health_cards.items():
-        if not card.get("ok"):
-            continue
-
-        monthly = card["monthly"]
-        last12 = monthly.tail(12)
-        perf12 = float(last12["perf_index_median"].median()) if "perf_index_median" in last12.columns else np.nan
-
-        losses_daily = card["losses_daily"]
-        last90 = losses_daily.tail(90)
-        total_loss90 = float(last90["loss_kwh"].sum()) if "loss_kwh" in last90.columns else np.nan
-        unexp90 = float(last90["loss_unexplained"].sum()) if "loss_unexplained" in last90.columns else np.nan
-        unexp_frac90 = (unexp90 / total_loss90) if (total_loss90 and total_loss90 > 0) else np.nan
-
-        dq = dq_report[dq_report["plant_name"] == plant]
-        dq_score = float(dq["dq_score"].iloc[0]) if len(dq) else np.nan
-        conf = dq["monitoring_confidence"].iloc[0] if len(dq) else None
-
-        plr = plr_table[plr_table["plant_name"] == plant]
-        plr_val = float(plr["plr_pct_per_year"].iloc[0]) if len(plr) and plr["ok"].iloc[0] else np.nan
-
-        rows.append({
-            "plant_name": plant,
-            "perf_index_12m_median": perf12,
-            "dq_score": dq_score,
-            "monitoring_confidence": conf,
-            "unexplained_loss_frac_90d": unexp_frac90,
-            "plr_pct_per_year": plr_val,
-        })
-
-    score = pd.DataFrame(rows)
+    """
+    One row per ok plant. Card summaries are reduced in one grouped pass, DQ and PLR
+    are joined by indexed merges and all ranks are computed columnwise.
+    """
+    cards = summarize_health_cards({p: c for p, c in health_cards.items() if c.get("ok")})
+
+    total = cards["total_loss_90d"]
+    cards["unexplained_loss_frac_90d"] = (cards["unexplained_loss_90d"] / total).where(total > 0)
+
+    dq = _first_per_plant(dq_report, ["dq_score", "monitoring_confidence"])
+    plr = _first_per_plant(plr_table, ["plr_pct_per_year", "ok"])
+    plr["plr_pct_per_year"] = plr["plr_pct_per_year"].astype(float).where(plr["ok"].fillna(False).astype(bool))
+
+    score = cards.join(dq, how="left").join(plr[["plr_pct_per_year"]], how="left")
+    score["dq_score"] = score["dq_score"].astype(float)
+    score = score.reset_index()[SCORECARD_COLS]
+
     score["perf_rank_pct"] = score["perf_index_12m_median"].rank(pct=True)
     score["dq_rank_pct"] = score["dq_score"].rank(pct=True)
     score["unexplained_loss_rank_pct"] = (1.0 - score["unexplained_loss_frac_90d"].rank(pct=True))
@@ -50,7 +86,7 @@ def build_fleet_scorecard(health_cards: Dict[str, Dict], dq_report: pd.DataFrame
 
 def fleet_clustering(scorecard: pd.DataFrame, k: int = 4) -> pd.DataFrame:
     df = scorecard.copy()
-    feats = ["perf_index_12m_median", "dq_score", "unexplained_loss_frac_90d", "plr_pct_per_year"]
+    feats = CLUSTER_FEATURES
     X = df[feats].copy().fillna(df[feats].median(numeric_only=True))
     if not SKLEARN_AVAILABLE or len(df) < k:
         df["cluster"] = 0
@@ -59,6 +95,136 @@ def fleet_clustering(scorecard: pd.DataFrame, k: int = 4) -> pd.DataFrame:
     df["cluster"] = km.fit_predict(X.values)
     return df
 
+def _nearest_centroid(X: np.ndarray, C: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, without an (n, k, d) temporary
+    d2 = (X**2).sum(axis=1)[:, None] - 2.0 * X @ C.T + (C**2).sum(axis=1)[None, :]
+    labels = d2.argmin(axis=1)
+    return labels, np.maximum(d2[np.arange(len(X)), labels], 0.0)
+
+def _minibatch_update(C: np.ndarray, counts: np.ndarray, batch: np.ndarray) -> None:
+    """In-place mini-batch k-means step: each centroid moves to the running mean of its points."""
+    labels, _ = _nearest_centroid(batch, C)
+    k = len(C)
+    n_j = np.bincount(labels, minlength=k).astype(float)
+    sums = np.zeros_like(C)
+    np.add.at(sums, labels, batch)
+    counts += n_j
+    hit = n_j > 0
+    C[hit] += (sums[hit] - n_j[hit, None] * C[hit]) / counts[hit, None]
+
+def minibatch_kmeans_numpy(
+    X: np.ndarray, k: int, batch_size: int = 1024, n_iter: int = 100, n_init: int = 3, seed: int = 42
+) -> np.ndarray:
+    """NumPy-only mini-batch k-means (k-means++ init, best of n_init), used when sklearn is unavailable."""
+    rng = np.random.default_rng(seed)
+    best, best_mse = None, np.inf
+    for _ in range(n_init):
+        C = [X[rng.integers(len(X))]]
+        for _ in range(1, k):
+            _, d2 = _nearest_centroid(X, np.asarray(C))
+            p = d2 / d2.sum() if d2.sum() > 0 else None
+            C.append(X[rng.choice(len(X), p=p)])
+        C = np.asarray(C, dtype=float)
+        counts = np.zeros(k)
+        for _ in range(n_iter):
+            batch = X[rng.choice(len(X), size=min(batch_size, len(X)), replace=False)]
+            _minibatch_update(C, counts, batch)
+        mse = float(_nearest_centroid(X, C)[1].mean())
+        if mse < best_mse:
+            best, best_mse = C, mse
+    return best
+
+def _cluster_matrix(df: pd.DataFrame, state: Dict) -> np.ndarray:
+    fill = pd.Series(state["fill"], index=state["features"])
+    X = df[state["features"]].astype(float).fillna(fill).to_numpy()
+    return (X - np.asarray(state["mean"])) / np.asarray(state["scale"])
+
+def fit_cluster_state(scorecard: pd.DataFrame, k: int = 4, batch_size: int = 1024, seed: int = 42) -> Dict:
+    """Full (mini-batch) refit: feature fill values, standard scaling and centroids."""
+    raw = scorecard[CLUSTER_FEATURES].astype(float)
+    fill = raw.median().fillna(0.0)
+    filled = raw.fillna(fill)
+    scale = filled.std(ddof=0).replace(0.0, 1.0).fillna(1.0)
+    state = {
+        "features": CLUSTER_FEATURES,
+        "k": k,
+        "fill": fill.tolist(),
+        "mean": filled.mean().tolist(),
+        "scale": scale.tolist(),
+    }
+    X = _cluster_matrix(scorecard, state)
+    if SKLEARN_AVAILABLE:
+        km = MiniBatchKMeans(n_clusters=k, random_state=seed, batch_size=batch_size, n_init=3)
+        C = km.fit(X).cluster_centers_
+    else:
+        C = minibatch_kmeans_numpy(X, k, batch_size=batch_size, seed=seed)
+    labels, d2 = _nearest_centroid(X, C)
+    state["centroids"] = C.tolist()
+    state["counts"] = np.bincount(labels, minlength=k).astype(float).tolist()
+    state["ref_mse"] = float(d2.mean())
+    return state
+
+def save_cluster_state(state: Dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+def load_cluster_state(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def fleet_clustering_incremental(
+    scorecard: pd.DataFrame,
+    cfg: Config,
+    k: int = 4,
+    state_path: Optional[str] = None,
+    drift_threshold: Optional[float] = None,
+    batch_size: Optional[int] = None,
+) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Cluster plants against persisted centroids and scaling (state_path, JSON).
+    Plants are assigned to the stored centroids, which then take one mini-batch update;
+    a full refit happens only when there is no usable state or the mean squared
+    distance to the assigned centroid grows by more than drift_threshold (relative,
+    default cfg.cluster_drift_threshold). A zero-error reference fit (k >= distinct
+    plants) is refit as soon as any plant moves off its centroid.
+    """
+    drift_threshold = cfg.cluster_drift_threshold if drift_threshold is None else drift_threshold
+    batch_size = cfg.cluster_batch_size if batch_size is None else batch_size
+    df = scorecard.copy()
+    state = load_cluster_state(state_path) if state_path else None
+    if len(df) < k:
+        df["cluster"] = 0
+        return df, state or {}
+
+    usable = state is not None and state.get("k") == k and state.get("features") == CLUSTER_FEATURES
+    refit = not usable
+    if usable:
+        X = _cluster_matrix(df, state)
+        C = np.asarray(state["centroids"], dtype=float)
+        _, d2 = _nearest_centroid(X, C)
+        mse, ref = float(d2.mean()), state["ref_mse"]
+        refit = mse > ref * (1.0 + drift_threshold) if ref > 0 else mse > CLUSTER_MSE_FLOOR
+
+    if refit:
+        state = fit_cluster_state(df, k=k, batch_size=batch_size, seed=cfg.random_seed)
+        X = _cluster_matrix(df, state)
+        C = np.asarray(state["centroids"], dtype=float)
+    else:
+        counts = np.asarray(state["counts"], dtype=float)
+        _minibatch_update(C, counts, X)
+        state = {**state, "centroids": C.tolist(), "counts": counts.tolist()}
+
+    labels, d2 = _nearest_centroid(X, C)
+    df["cluster"] = labels
+    df["cluster_dist"] = np.sqrt(d2)
+    state["refit"] = bool(refit)
+    if state_path:
+        save_cluster_state(state, state_path)
+    return df, state
+
 def build_action_plan(scorecard: pd.DataFrame) -> pd.DataFrame:
     df = scorecard.copy()
     df["priority_score"] = (
@@ -67,19 +233,27 @@ def build_action_plan(scorecard: pd.DataFrame) -> pd.DataFrame:
         (df["dq_rank_pct"].fillna(0.5)) * 0.2
     )
 
-    def rec(r):
-        actions = []
-        if r.get("dq_score", 1.0) < 0.7:
-            actions.append("Fix monitoring/data quality first (POA/Tmod/power completeness & QC).")
-        if r.get("perf_index_12m_median", 1.0) < np.nanmedian(df["perf_index_12m_median"]):
-            actions.append("Investigate intrinsic underperformance (soiling, derates, equipment health).")
-        if pd.notna(r.get("plr_pct_per_year")) and r["plr_pct_per_year"] < -1.0:
-            actions.append("Degradation deep dive (compare inverters/arrays, targeted inspections).")
-        if pd.notna(r.get("unexplained_loss_frac_90d")) and r["unexplained_loss_frac_90d"] > 0.5:
-            actions.append("Improve event tagging & diagnose hidden losses (intermittent faults/controls).")
-        return " ".join(actions) if actions else "Monitor."
-
-    df["recommended_actions"] = df.apply(rec, axis=1)
+    # each rule is a vectorized mask; rows map to one of 2**len(rules) action texts
+    perf_median = np.nanmedian(df["perf_index_12m_median"]) if len(df) else np.nan
+    rules = [
+        (df["dq_score"] < 0.7,
+         "Fix monitoring/data quality first (POA/Tmod/power completeness & QC)."),
+        (df["perf_index_12m_median"] < perf_median,
+         "Investigate intrinsic underperformance (soiling, derates, equipment health)."),
+        (df["plr_pct_per_year"] < -1.0,
+         "Degradation deep dive (compare inverters/arrays, targeted inspections)."),
+        (df["unexplained_loss_frac_90d"] > 0.5,
+         "Improve event tagging & diagnose hidden losses (intermittent faults/controls)."),
+    ]
+    code = np.zeros(len(df), dtype=np.int64)
+    for bit, (mask, _) in enumerate(rules):
+        code |= mask.fillna(False).to_numpy(dtype=bool).astype(np.int64) << bit
+    texts = np.array([
+        " ".join(text for bit, (_, text) in enumerate(rules) if c >> bit & 1) or "Monitor."
+        for c in range(2 ** len(rules))
+    ], dtype=object)
+
+    df["recommended_actions"] = texts[code]
     return df.sort_values("priority_score", ascending=False)[[
         "plant_name", "priority_score", "monitoring_confidence",
         "perf_index_12m_median", "unexplained_loss_frac_90d", "plr_pct_per_year", "recommended_actions"
@@ -0,0 +1,279 @@
+"""
+Compact per-plant health cards.
+
+A card keeps its small summary tables (daily, monthly, daily losses) and a JSON-able
+model summary in memory, and spills the high-resolution `ts` frame (with the model fit
+mask as a boolean column) to Parquet, read back only when accessed. Given the Config,
+the card also builds the plant's LossIndex from that frame and persists it next to the
+series as loss_index.parquet. Cards still answer card["daily"], card.get("ok") etc., so
+they drop into build_fleet_scorecard unchanged, and they pickle without the spilled
+frames. save()/load_health_card() write a version-tagged card.json next to the Parquet
+tables.
+"""
+import json
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from .config import Config
+from .io import save_parquet
+from .loss_index import LOSS_INDEX_FILE, LossIndex, build_loss_index, load_loss_index, save_loss_index
+from .model import MODEL_VERSION, model_coefficients
+from .paths import plant_subdir
+
+HEALTH_CARD_FORMAT = "pv-fleet-health/health-card"
+HEALTH_CARD_VERSION = 1
+CARD_FILE = "card.json"
+TS_FILE = "ts.parquet"
+MASK_COL = "model_mask"
+CARD_TABLES = {"daily": "kpi_daily.parquet", "monthly": "kpi_monthly.parquet", "losses_daily": "losses_daily.parquet"}
+LOSS_INDEX_COLS = ["p_ac_kw", "p_expected_kw", "poa_wm2", "event_label"]
+
+def _json_default(x):
+    if isinstance(x, np.generic):
+        return x.item()
+    if isinstance(x, (pd.Timestamp, pd.Timedelta)):
+        return str(x)
+    raise TypeError(f"{type(x).__name__} is not JSON serializable")
+
+def compact_model(model_obj: Optional[Dict]) -> Dict:
+    """fit_expected_power_model output without the estimator object and the full mask."""
+    if not model_obj:
+        return {}
+    out = {"ok": bool(model_obj.get("ok")), "version": MODEL_VERSION}
+    if not out["ok"]:
+        return {**out, "reason": model_obj.get("reason")}
+    mask = model_obj.get("mask")
+    return {
+        **out,
+        "features": list(model_obj["features"]),
+        "coefficients": model_coefficients(model_obj),
+        "n_points": int(mask.sum()) if mask is not None else None,
+    }
+
+def _write_table(df: pd.DataFrame, path: Path) -> Optional[str]:
+    """Parquet with the index as a column (a DatetimeIndex becomes "date"); returns its name."""
+    name = df.index.name
+    save_parquet(df.rename_axis("date").reset_index(), str(path))
+    return name
+
+def _read_table(path: Path, index_name: Optional[str], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    df = pd.read_parquet(path, columns=None if columns is None else ["date"] + list(columns))
+    return df.set_index("date").rename_axis(index_name)
+
+def _copy_to(src: Optional[Path], dst: Path) -> Optional[Path]:
+    """Already-spilled file src copied to dst (None stays None)."""
+    if src is None:
+        return None
+    if src != dst:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src, dst)
+    return dst
+
+@dataclass
+class HealthCard:
+    plant: str
+    ok: bool
+    reason: Optional[str] = None
+    daily: Optional[pd.DataFrame] = None
+    monthly: Optional[pd.DataFrame] = None
+    losses_daily: Optional[pd.DataFrame] = None
+    model: Dict = field(default_factory=dict)
+    extras: Dict[str, Any] = field(default_factory=dict)
+    extra_tables: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    ts_path: Optional[Path] = None
+    ts_index_name: Optional[str] = None
+    loss_index_path: Optional[Path] = None
+    _ts: Optional[pd.DataFrame] = field(default=None, repr=False)
+    _loss_index: Optional[LossIndex] = field(default=None, repr=False)
+
+    @classmethod
+    def from_dict(
+        cls, plant: str, card: Dict, spill_dir: Optional[Path] = None, cfg: Optional[Config] = None
+    ) -> "HealthCard":
+        """
+        Compact a health card dict (keys ok/reason/ts/daily/monthly/losses_daily/model;
+        other tables go to extra_tables, anything else to extras). With cfg and a ts frame
+        carrying p_expected_kw, the loss index is built from ts. With spill_dir, ts (with
+        the model mask) and the loss index are written there and dropped from memory.
+        """
+        known = {"ok", "reason", "ts", "model"} | set(CARD_TABLES)
+        rest = {k: v for k, v in card.items() if k not in known}
+        hc = cls(
+            plant=plant,
+            ok=bool(card.get("ok", True)),
+            reason=card.get("reason"),
+            daily=card.get("daily"),
+            monthly=card.get("monthly"),
+            losses_daily=card.get("losses_daily"),
+            model=compact_model(card.get("model")),
+            extras={k: v for k, v in rest.items() if not isinstance(v, pd.DataFrame)},
+            extra_tables={k: v for k, v in rest.items() if isinstance(v, pd.DataFrame)},
+        )
+        ts = card.get("ts")
+        if ts is not None:
+            mask = (card.get("model") or {}).get("mask")
+            if mask is not None:
+                ts = ts.assign(**{MASK_COL: mask.reindex(ts.index, fill_value=False).astype(bool)})
+            hc._ts = ts
+            if cfg is not None and set(LOSS_INDEX_COLS) <= set(ts.columns):
+                hc._loss_index = build_loss_index(ts, cfg, plant)
+            if spill_dir is not None:
+                hc.spill(spill_dir)
+        return hc
+
+    def spill(self, directory: Path) -> None:
+        """Write the in-memory ts frame and loss index to <directory> and release them."""
+        if self._loss_index is not None:
+            self.loss_index_path = Path(directory) / LOSS_INDEX_FILE
+            save_loss_index(self._loss_index, directory)
+            self._loss_index = None
+        if self._ts is None:
+            return
+        self.ts_path = Path(directory) / TS_FILE
+        self.ts_index_name = self._ts.index.name
+        save_parquet(self._ts.rename_axis("date").reset_index(), str(self.ts_path))
+        self._ts = None
+
+    def load_ts(self, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """The high-resolution frame (or some of its columns), read from disk if spilled."""
+        if self._ts is not None:
+            return self._ts if columns is None else self._ts[columns]
+        if self.ts_path is None:
+            return None
+        return _read_table(self.ts_path, self.ts_index_name, columns)
+
+    @property
+    def ts(self) -> Optional[pd.DataFrame]:
+        """Loaded on first access and kept until release()."""
+        if self._ts is None and self.ts_path is not None:
+            self._ts = self.load_ts()
+        return self._ts
+
+    @property
+    def loss_index(self) -> Optional[LossIndex]:
+        """The plant's LossIndex (read from disk on first access if spilled)."""
+        if self._loss_index is None and self.loss_index_path is not None:
+            self._loss_index = load_loss_index(self.loss_index_path.parent, self.plant)
+        return self._loss_index
+
+    def ts_columns(self) -> List[str]:
+        """Columns of the ts frame without loading it (Parquet schema when spilled)."""
+        if self._ts is not None:
+            return list(self._ts.columns)
+        if self.ts_path is None:
+            return []
+        return [c for c in pq.read_schema(self.ts_path).names if c != "date"]
+
+    @property
+    def model_mask(self) -> Optional[pd.Series]:
+        """The model fit mask, or None when the card has none."""
+        if MASK_COL not in self.ts_columns():
+            return None
+        return self.load_ts([MASK_COL])[MASK_COL]
+
+    def release(self) -> None:
+        """Drop the loaded ts frame and loss index (only if they can be read back)."""
+        if self.ts_path is not None:
+            self._ts = None
+        if self.loss_index_path is not None:
+            self._loss_index = None
+
+    def __getitem__(self, key: str):
+        if key == "ts":
+            return self.ts
+        if key in ("ok", "reason", "model", "plant") or key in CARD_TABLES:
+            return getattr(self, key)
+        if key in self.extra_tables:
+            return self.extra_tables[key]
+        return self.extras[key]
+
+    def get(self, key: str, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def __getstate__(self) -> Dict:
+        state = dict(self.__dict__)
+        if self.ts_path is not None:
+            state["_ts"] = None
+        if self.loss_index_path is not None:
+            state["_loss_index"] = None
+        return state
+
+    def save(self, directory: Path) -> None:
+        """card.json + one Parquet file per table; the ts frame and loss index go there too."""
+        directory = Path(directory)
+        if self._ts is None:
+            self.ts_path = _copy_to(self.ts_path, directory / TS_FILE)
+        if self._loss_index is None:
+            self.loss_index_path = _copy_to(self.loss_index_path, directory / LOSS_INDEX_FILE)
+        self.spill(directory)
+        files = {**CARD_TABLES, **{k: f"{k}.parquet" for k in self.extra_tables}}
+        frames = {**{k: getattr(self, k) for k in CARD_TABLES}, **self.extra_tables}
+        index_names = {k: _write_table(df, directory / files[k]) for k, df in frames.items() if df is not None}
+        meta = {
+            "format": HEALTH_CARD_FORMAT,
+            "version": HEALTH_CARD_VERSION,
+            "plant": self.plant,
+            "ok": self.ok,
+            "reason": self.reason,
+            "model": self.model,
+            "extras": self.extras,
+            "tables": {k: files[k] for k in index_names},
+            "index_names": index_names,
+            "ts": TS_FILE if self.ts_path is not None else None,
+            "ts_index_name": self.ts_index_name,
+            "loss_index": LOSS_INDEX_FILE if self.loss_index_path is not None else None,
+        }
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / CARD_FILE).write_text(json.dumps(meta, indent=2, default=_json_default), encoding="utf-8")
+
+def load_health_card(directory: Path) -> HealthCard:
+    """Summary tables are read eagerly, the ts frame lazily."""
+    directory = Path(directory)
+    meta = json.loads((directory / CARD_FILE).read_text(encoding="utf-8"))
+    if meta.get("format") != HEALTH_CARD_FORMAT:
+        raise ValueError(f"{directory / CARD_FILE} is not a health card")
+    if meta.get("version") != HEALTH_CARD_VERSION:
+        raise ValueError(f"Unsupported health card version {meta.get('version')} (expected {HEALTH_CARD_VERSION})")
+    tables = {k: _read_table(directory / f, meta["index_names"].get(k)) for k, f in meta["tables"].items()}
+    extra_tables = {k: tables.pop(k) for k in list(tables) if k not in CARD_TABLES}
+    return HealthCard(
+        plant=meta["plant"],
+        ok=meta["ok"],
+        reason=meta["reason"],
+        model=meta["model"],
+        extras=meta["extras"],
+        extra_tables=extra_tables,
+        ts_path=directory / meta["ts"] if meta["ts"] else None,
+        ts_index_name=meta["ts_index_name"],
+        loss_index_path=directory / meta["loss_index"] if meta.get("loss_index") else None,
+        **tables,
+    )
+
+def card_dir(root: Path, plant: str) -> Path:
+    return plant_subdir(root, plant)
+
+def compact_health_cards(
+    health_cards: Dict[str, Dict], root: Path, cfg: Optional[Config] = None
+) -> Dict[str, HealthCard]:
+    """
+    Compact and save every card under <root>/<plant>/ (e.g. root = paths.plants_dir);
+    with cfg, each plant's loss index is persisted there as well.
+    """
+    out = {}
+    for plant, card in health_cards.items():
+        hc = card if isinstance(card, HealthCard) else HealthCard.from_dict(plant, card, cfg=cfg)
+        hc.save(card_dir(root, plant))
+        out[plant] = hc
+    return out
+
+def load_health_cards(root: Path) -> Dict[str, HealthCard]:
+    cards = [load_health_card(p) for p in sorted(Path(root).iterdir()) if (p / CARD_FILE).exists()]
+    return {c.plant: c for c in cards}
@@ -1,27 +1,77 @@
+import glob
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
 import pandas as pd
+import pyarrow.parquet as pq
 
 from .config import Config
+from .scada_headers import build_signal_catalog
 from .utils import ensure_tz_aware
 
 
-def load_table(path: str) -> pd.DataFrame:
+INPUT_SUFFIXES = (".csv", ".parquet")
+
+
+def _csv_delimiter(path: Path) -> str:
+    # Read first line to detect delimiter
+    with open(path, encoding="utf-8") as f:
+        first_line = f.readline()
+    return ";" if ";" in first_line else ","
+
+
+def load_table(path: str, usecols: list[str] | None = None) -> pd.DataFrame:
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(str(path))
     path_str = str(path).lower()
     if path_str.endswith(".parquet"):
-        return pd.read_parquet(str(path))
+        return pd.read_parquet(str(path), columns=usecols)
     # Try to detect delimiter for CSV files
     if path_str.endswith(".csv"):
-        # Read first line to detect delimiter
-        with open(path, encoding="utf-8") as f:
-            first_line = f.readline()
-        delimiter = ";" if ";" in first_line else ","
-        return pd.read_csv(str(path), sep=delimiter)
-    return pd.read_csv(str(path))
+        return pd.read_csv(str(path), sep=_csv_delimiter(path), usecols=usecols)
+    return pd.read_csv(str(path), usecols=usecols)
+
+
+def read_header(path: str) -> list[str]:
+    """Column names of a CSV/Parquet table without parsing any data rows."""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(str(path))
+    path_str = str(path).lower()
+    if path_str.endswith(".parquet"):
+        return pq.read_schema(str(path)).names
+    sep = _csv_delimiter(path) if path_str.endswith(".csv") else ","
+    return pd.read_csv(str(path), sep=sep, nrows=0).columns.tolist()
+
+
+def project_columns(columns: list[str], cfg: Config) -> list[str]:
+    """
+    Timestamp plus the raw columns whose canonical signal is in cfg.ingest_signals
+    (and whose plant is cfg.selected_plant, when set).
+    """
+    catalog = build_signal_catalog(columns, cfg.timestamp_col)
+    if catalog.empty:
+        return [cfg.timestamp_col]
+    keep = catalog["canonical_signal"].isin(list(cfg.ingest_signals))
+    if cfg.selected_plant is not None:
+        keep &= catalog["plant_name"] == cfg.selected_plant
+    return [cfg.timestamp_col] + catalog.loc[keep, "raw_column_name"].tolist()
+
+
+def resolve_input_paths(spec: str) -> list[str]:
+    """Expand a file path, directory or glob pattern into a sorted list of input files."""
+    p = Path(spec)
+    if p.is_dir():
+        files = sorted(str(f) for f in p.iterdir() if f.suffix.lower() in INPUT_SUFFIXES)
+    elif any(ch in spec for ch in "*?["):
+        files = sorted(glob.glob(spec, recursive=True))
+    else:
+        return [spec]
+    if not files:
+        raise FileNotFoundError(spec)
+    return files
 
 
 def save_parquet(df: pd.DataFrame, path: str) -> None:
@@ -39,19 +89,56 @@ def parse_timestamp(df: pd.DataFrame, col: str, tz: str, fmt: str | None = None)
     return out
 
 
-def load_inputs(cfg: Config) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame | None]:
-    scada = load_table(cfg.scada_path)
-    scada = parse_timestamp(scada, cfg.timestamp_col, cfg.default_timezone, cfg.timestamp_format)
+def _load_scada_file(path: str, cfg: Config) -> pd.DataFrame:
+    usecols = project_columns(read_header(path), cfg) if cfg.ingest_projection else None
+    scada = load_table(path, usecols=usecols)
+    return parse_timestamp(scada, cfg.timestamp_col, cfg.default_timezone, cfg.timestamp_format)
+
 
+def combine_scada_frames(frames: list[pd.DataFrame], timestamp_col: str) -> pd.DataFrame:
+    """
+    Union wide SCADA frames (e.g. one file per plant per month) into one wide frame.
+    Columns are the union of all headers; rows sharing a timestamp are collapsed,
+    keeping the first non-null value per column (files are taken in sorted order).
+    """
+    df = pd.concat(frames, ignore_index=True, sort=False)
+    df = df.dropna(subset=[timestamp_col])
+    return df.groupby(timestamp_col, sort=True).first().reset_index()
+
+
+def load_scada(cfg: Config) -> pd.DataFrame:
+    """
+    Load cfg.scada_path, which may be a single file, a directory or a glob pattern.
+    Multiple files are parsed concurrently (cfg.ingest_executor / cfg.ingest_max_workers).
+    With cfg.ingest_projection only the columns selected by project_columns are parsed.
+    Every input, single file included, goes through combine_scada_frames, so rows with an
+    unparseable timestamp are dropped and duplicate timestamps (e.g. after a DST shift)
+    collapsed the same way however the export is passed.
+    """
+    files = resolve_input_paths(cfg.scada_path)
+    if len(files) == 1:
+        frames = [_load_scada_file(files[0], cfg)]
+    else:
+        pool_cls = ProcessPoolExecutor if cfg.ingest_executor == "process" else ThreadPoolExecutor
+        with pool_cls(max_workers=cfg.ingest_max_workers) as ex:
+            frames = list(ex.map(_load_scada_file, files, [cfg] * len(files)))
+    return combine_scada_frames(frames, cfg.timestamp_col)
+
+
+def load_events(cfg: Config) -> pd.DataFrame:
     events = load_table(cfg.events_path)
     # parse event time cols if present
     for c in ["Start Date", "End Date"]:
         if c in events.columns:
             events[c] = ensure_tz_aware(events[c], cfg.default_timezone)
+    return events
+
 
-    meta = (
-        load_table(cfg.metadata_path)
-        if cfg.metadata_path and os.path.exists(cfg.metadata_path)
-        else None
-    )
-    return scada, events, meta
+def load_metadata(cfg: Config) -> pd.DataFrame | None:
+    if cfg.metadata_path and os.path.exists(cfg.metadata_path):
+        return load_table(cfg.metadata_path)
+    return None
+
+
+def load_inputs(cfg: Config) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame | None]:
+    return load_scada(cfg), load_events(cfg), load_metadata(cfg)
@@ -4,6 +4,7 @@ import numpy as np
 import pandas as pd
 from .config import Config
 from .dq import stuck_sensor_fraction
+from .sketches import QuantileSketch, sketch_by_group
 
 try:
     import pvlib
@@ -32,7 +33,21 @@ def _get_lat_lon(meta_row: pd.Series) -> Tuple[Optional[float], Optional[float]]
             lon = float(meta_row[k])
     return lat, lon
 
-def clearsky_envelope_violations(poa: pd.Series, cfg: Config, meta_row: Optional[pd.Series] = None) -> pd.Series:
+def daily_poa_sketches(poa: pd.Series, cfg: Config) -> Dict:
+    """Per-date POA sketches for the empirical clear-sky envelope, for one partition."""
+    s = poa.dropna()
+    return sketch_by_group(s.index.date, s.to_numpy(), cfg.sketch_relative_accuracy)
+
+def clearsky_envelope_violations(
+    poa: pd.Series,
+    cfg: Config,
+    meta_row: Optional[pd.Series] = None,
+    daily_stats: Optional[Dict[object, QuantileSketch]] = None,
+) -> pd.Series:
+    """
+    daily_stats: merged daily_poa_sketches of all partitions; when given, the empirical
+    envelope quantile of each date is read from its sketch (days split across chunks).
+    """
     s = poa.dropna()
     if s.empty:
         return pd.Series(dtype=bool)
@@ -49,7 +64,12 @@ def clearsky_envelope_violations(poa: pd.Series, cfg: Config, meta_row: Optional
     # empirical fallback: daily high-quantile envelope
     df = s.to_frame("poa")
     df["date"] = df.index.date
-    env = df.groupby("date")["poa"].quantile(cfg.clearsky_qc_quantile)
+    if daily_stats is not None:
+        dates = pd.unique(df["date"])
+        env = pd.Series([daily_stats[d].quantile(cfg.clearsky_qc_quantile) if d in daily_stats else np.nan
+                         for d in dates], index=pd.Index(dates, name="date"))
+    else:
+        env = df.groupby("date")["poa"].quantile(cfg.clearsky_qc_quantile)
     df = df.join(env.rename("env"), on="date")
     viol = df["poa"] > (df["env"] * 1.15)
     return viol.reindex(poa.index).fillna(False)
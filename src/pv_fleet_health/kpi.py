@@ -2,6 +2,8 @@ from typing import Optional, Dict
 import numpy as np
 import pandas as pd
 from .config import Config
+from .context import PlantContext, plant_context
+from .sketches import QuantileSketch, sketch
 
 def get_dc_kwp(metadata: Optional[pd.DataFrame], plant: str) -> Optional[float]:
     if metadata is None or "plant_name" not in metadata.columns:
@@ -14,12 +16,29 @@ def get_dc_kwp(metadata: Optional[pd.DataFrame], plant: str) -> Optional[float]:
             return float(m.iloc[0][col])
     return None
 
-def compute_kpis(df_labeled: pd.DataFrame, cfg: Config, dc_kwp: Optional[float]) -> Dict[str, pd.DataFrame]:
+def perf_ratio_sketch(df_labeled: pd.DataFrame, cfg: Config, ctx: Optional[PlantContext] = None) -> QuantileSketch:
+    """Sketch of the P/POA ratios compute_kpis normalizes by, for one partition."""
+    m = plant_context(df_labeled, cfg, ctx).perf_mask
+    raw = (df_labeled.loc[m, "p_ac_kw"] / df_labeled.loc[m, "poa_wm2"]).replace([np.inf, -np.inf], np.nan)
+    return sketch(raw.to_numpy(), cfg.sketch_relative_accuracy)
+
+def compute_kpis(
+    df_labeled: pd.DataFrame,
+    cfg: Config,
+    dc_kwp: Optional[float],
+    perf_stats: Optional[QuantileSketch] = None,
+    ctx: Optional[PlantContext] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    perf_stats: merged perf_ratio_sketch of all partitions; when given, the perf index
+    scale is its median, so df_labeled can be one chunk of the plant series.
+    ctx: shared PlantContext of df_labeled (masks are taken from it).
+    """
+    ctx = plant_context(df_labeled, cfg, ctx)
     df = df_labeled.copy()
     dt_h = pd.Timedelta(cfg.standard_freq).total_seconds() / 3600.0
 
-    intrinsic = ~df["event_label"].isin(["curtailment", "grid_outage"])
-    daylight_kpi = df["poa_wm2"] >= cfg.poa_for_kpi_min_wm2
+    intrinsic = ctx.intrinsic
 
     # derived energy if not available
     if "e_kwh" not in df.columns or df["e_kwh"].isna().all():
@@ -35,11 +54,12 @@ def compute_kpis(df_labeled: pd.DataFrame, cfg: Config, dc_kwp: Optional[float])
         daily["specific_yield_kwh_per_kwp"] = daily["energy_kwh_intrinsic"] / dc_kwp
 
     # simple performance index: (P/POA)/median(P/POA) on intrinsic daylight points
-    mask = intrinsic & daylight_kpi & df["p_ac_kw"].notna() & df["poa_wm2"].notna()
+    mask = ctx.perf_mask
     df["perf_index"] = np.nan
-    if mask.sum() > 100:
+    n_scale = perf_stats.count if perf_stats is not None else mask.sum()
+    if n_scale > 100 and mask.any():
         raw = (df.loc[mask, "p_ac_kw"] / df.loc[mask, "poa_wm2"]).replace([np.inf, -np.inf], np.nan)
-        scale = np.nanmedian(raw)
+        scale = perf_stats.quantile(0.5) if perf_stats is not None else np.nanmedian(raw)
         if np.isfinite(scale) and scale > 0:
             df.loc[mask, "perf_index"] = (df.loc[mask, "p_ac_kw"] / df.loc[mask, "poa_wm2"]) / scale
 
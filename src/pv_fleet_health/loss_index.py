@@ -0,0 +1,108 @@
+"""
+Prefix-sum index over a plant's per-timestamp energy and loss columns.
+
+cum[i] holds the column sums of the first i timestamps (NaN counted as 0, as in the
+daily sums of compute_losses), so the sum over any closed window [t0, t1] is
+cum[searchsorted(t1, "right")] - cum[searchsorted(t0, "left")]: two binary searches per
+window, for any number of windows at once. Windows are closed like the event masks of
+join_events_to_timeseries, so attribute_event_losses charges each merged event with the
+energy of exactly the timestamps it covers.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .config import Config
+from .context import PlantContext
+from .events import select_plant_events
+from .io import save_parquet
+from .losses import BUCKETS, point_losses
+
+INDEX_COLS = ["e_exp_kwh", "e_act_kwh", "loss_kwh", "loss_unexplained"] + [f"loss_{b}" for b in BUCKETS]
+LOSS_INDEX_FILE = "loss_index.parquet"
+
+def _utc_ns(ts, tz: Optional[str]) -> np.ndarray:
+    idx = pd.DatetimeIndex(np.atleast_1d(ts))
+    if idx.tz is None:
+        idx = idx.tz_localize(tz or "UTC")
+    return idx.tz_convert("UTC").as_unit("ns").asi8
+
+@dataclass(frozen=True)
+class LossIndex:
+    plant: str
+    t_ns: np.ndarray  # sorted UTC epoch ns of the indexed timestamps
+    cum: np.ndarray  # (len(t_ns) + 1, len(columns)); cum[0] = 0
+    columns: Tuple[str, ...]
+    tz: Optional[str] = None
+
+    def window_sums(self, t0, t1) -> pd.DataFrame:
+        """Column sums over [t0[i], t1[i]] for each i (scalars or array-likes; naive = index tz)."""
+        lo = np.searchsorted(self.t_ns, _utc_ns(t0, self.tz), side="left")
+        hi = np.searchsorted(self.t_ns, _utc_ns(t1, self.tz), side="right")
+        hi = np.maximum(hi, lo)
+        return pd.DataFrame(self.cum[hi] - self.cum[lo], columns=list(self.columns))
+
+    def window_sum(self, t0, t1) -> pd.Series:
+        return self.window_sums(t0, t1).iloc[0]
+
+    def to_frame(self) -> pd.DataFrame:
+        ts = pd.to_datetime(self.t_ns, unit="ns", utc=True)
+        out = pd.DataFrame(self.cum[1:], columns=list(self.columns))
+        out.insert(0, "ts", ts.tz_convert(self.tz) if self.tz else ts)
+        return out
+
+def build_loss_index(
+    df: pd.DataFrame, cfg: Config, plant: str = "", ctx: Optional[PlantContext] = None
+) -> LossIndex:
+    """Index over the point_losses columns of a labeled plant frame with p_expected_kw."""
+    pts = point_losses(df, cfg, ctx)[INDEX_COLS]
+    if not pts.index.is_monotonic_increasing:
+        pts = pts.sort_index()
+    values = np.nan_to_num(pts.to_numpy(dtype=float))
+    cum = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    tz = str(pts.index.tz) if pts.index.tz is not None else None
+    return LossIndex(plant, _utc_ns(pts.index, tz), cum, tuple(INDEX_COLS), tz)
+
+def save_loss_index(index: LossIndex, directory: Path) -> None:
+    """<directory>/loss_index.parquet, e.g. next to the plant's health card series."""
+    save_parquet(index.to_frame(), str(Path(directory) / LOSS_INDEX_FILE))
+
+def load_loss_index(directory: Path, plant: str = "") -> LossIndex:
+    df = pd.read_parquet(Path(directory) / LOSS_INDEX_FILE)
+    cols = [c for c in df.columns if c != "ts"]
+    cum = np.vstack([np.zeros((1, len(cols))), df[cols].to_numpy(dtype=float)])
+    tz = str(df["ts"].dt.tz) if df["ts"].dt.tz is not None else None
+    return LossIndex(plant, _utc_ns(df["ts"], tz), cum, tuple(cols), tz)
+
+def attribute_event_losses(index: LossIndex, events_merged) -> pd.DataFrame:
+    """
+    events_merged rows of index.plant (all rows if it has no plant_name column) with the
+    window sums of every index column, plus loss_category_kwh: the loss booked to the
+    event's own bucket in the window (events of different categories may overlap, so
+    only that column adds up across events). events_merged may also be an EventStore,
+    whose merged intervals over the index span are read.
+    """
+    ev = events_merged
+    if isinstance(ev, pd.DataFrame):
+        if "plant_name" in ev.columns and index.plant:
+            ev = ev[ev["plant_name"] == index.plant]
+    elif len(index.t_ns):
+        span = pd.to_datetime(index.t_ns[[0, -1]], unit="ns", utc=True)
+        ev = select_plant_events(ev, index.plant, span[0], span[1], merged=True)
+    else:
+        ev = pd.DataFrame(columns=["plant_name", "category", "start_ts", "end_ts"])
+    ev = ev.reset_index(drop=True)
+    if ev.empty:
+        return ev.assign(**{c: pd.Series(dtype=float) for c in list(index.columns) + ["loss_category_kwh"]})
+    sums = index.window_sums(ev["start_ts"], ev["end_ts"])
+    col = pd.Series({c: i for i, c in enumerate(index.columns)})
+    pos = ("loss_" + ev["category"].astype(str)).map(col)
+    own = np.full(len(ev), np.nan)
+    ok = pos.notna().to_numpy()
+    own[ok] = sums.to_numpy()[np.flatnonzero(ok), pos[ok].astype(int).to_numpy()]
+    return pd.concat([ev, sums], axis=1).assign(loss_category_kwh=own)
+
+def attribute_fleet_event_losses(indexes: Dict[str, LossIndex], events_merged) -> pd.DataFrame:
+    parts = [attribute_event_losses(ix, events_merged) for ix in indexes.values()]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
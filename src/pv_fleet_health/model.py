@@ -1,7 +1,12 @@
-from typing import Dict
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 from .config import Config
+from .context import PlantContext, build_features, plant_context
 
 try:
     from sklearn.linear_model import HuberRegressor
@@ -17,22 +22,16 @@ try:
 except Exception:
     STATSMODELS_AVAILABLE = False
 
-def build_features(df: pd.DataFrame) -> pd.DataFrame:
-    X = pd.DataFrame(index=df.index)
-    X["poa"] = df["poa_wm2"]
-    X["poa2"] = df["poa_wm2"] ** 2
-    X["tmod"] = df["tmod_c"]
-    X["poa_tmod"] = df["poa_wm2"] * df["tmod_c"]
-    return X
-
-def fit_expected_power_model(df: pd.DataFrame, cfg: Config) -> Dict:
-    intrinsic = ~df["event_label"].isin(["curtailment", "grid_outage"])
-    daylight = df["poa_wm2"] >= cfg.poa_for_kpi_min_wm2
-    mask = intrinsic & daylight & df["p_ac_kw"].notna() & df["poa_wm2"].notna() & df["tmod_c"].notna()
+MODEL_VERSION = "huber-poa-tmod-v1"
+FOLD_DATA_COLS = ["p_ac_kw", "poa_wm2", "tmod_c", "event_label"]
+
+def fit_expected_power_model(df: pd.DataFrame, cfg: Config, ctx: Optional[PlantContext] = None) -> Dict:
+    ctx = plant_context(df, cfg, ctx)
+    mask = ctx.model_mask
     if mask.sum() < cfg.model_min_points:
         return {"ok": False, "reason": f"Not enough points: {mask.sum()}"}
 
-    X = build_features(df.loc[mask])
+    X = ctx.features.loc[mask]
     y = df.loc[mask, "p_ac_kw"].astype(float)
 
     if SKLEARN_AVAILABLE:
@@ -45,10 +44,19 @@ def fit_expected_power_model(df: pd.DataFrame, cfg: Config) -> Dict:
         return {"ok": True, "model": model, "mask": mask, "features": list(X.columns), "sm": True}
     return {"ok": False, "reason": "No sklearn or statsmodels installed"}
 
-def predict_expected(model_obj: Dict, df: pd.DataFrame) -> pd.Series:
+def predict_linear(coefficients: Dict, df: pd.DataFrame, features: Optional[pd.DataFrame] = None) -> np.ndarray:
+    """NumPy-only prediction from model_coefficients() output (features: build_features(df) if known)."""
+    X = (build_features(df) if features is None else features)[coefficients["features"]].to_numpy(dtype=float)
+    Z = (X - np.asarray(coefficients["mean"])) / np.asarray(coefficients["scale"])
+    return coefficients["intercept"] + Z @ np.asarray(coefficients["coef"])
+
+def predict_expected(model_obj: Dict, df: pd.DataFrame, ctx: Optional[PlantContext] = None) -> pd.Series:
+    """Works with fitted model dicts and compact (coefficients-only) registry models."""
     if not model_obj.get("ok"):
         return pd.Series(index=df.index, dtype=float)
-    X = build_features(df)
+    X = build_features(df) if ctx is None else plant_context(df, ctx.cfg, ctx).features
+    if "model" not in model_obj:
+        return pd.Series(predict_linear(model_obj["coefficients"], df, X), index=df.index, name="p_expected_kw")
     if model_obj.get("sm"):
         import statsmodels.api as sm
         Xc = sm.add_constant(X, has_constant="add")
@@ -57,41 +65,152 @@ def predict_expected(model_obj: Dict, df: pd.DataFrame) -> pd.Series:
         yhat = model_obj["model"].predict(X)
     return pd.Series(yhat, index=df.index, name="p_expected_kw")
 
-def validate_walkforward(df: pd.DataFrame, cfg: Config) -> pd.DataFrame:
-    intrinsic = ~df["event_label"].isin(["curtailment", "grid_outage"])
-    daylight = df["poa_wm2"] >= cfg.poa_for_kpi_min_wm2
-    usable = intrinsic & daylight & df["p_ac_kw"].notna() & df["poa_wm2"].notna() & df["tmod_c"].notna()
+def model_coefficients(model_obj: Dict) -> Dict:
+    """
+    Compact linear form of a fitted model: yhat = intercept + coef . (x - mean) / scale.
+    """
+    if not model_obj.get("ok"):
+        return {}
+    features = model_obj["features"]
+    if model_obj.get("sm"):
+        params = model_obj["model"].params
+        return {
+            "features": features,
+            "mean": [0.0] * len(features),
+            "scale": [1.0] * len(features),
+            "coef": [float(params[f]) for f in features],
+            "intercept": float(params["const"]),
+        }
+    scaler = model_obj["model"].named_steps["scaler"]
+    huber = model_obj["model"].named_steps["huber"]
+    return {
+        "features": features,
+        "mean": [float(v) for v in scaler.mean_],
+        "scale": [float(v) for v in scaler.scale_],
+        "coef": [float(v) for v in huber.coef_],
+        "intercept": float(huber.intercept_),
+    }
 
-    if usable.sum() < cfg.model_min_points:
-        return pd.DataFrame([{"ok": False, "reason": "insufficient usable points"}])
+def model_config_hash(cfg: Config) -> str:
+    backend = "sklearn" if SKLEARN_AVAILABLE else ("statsmodels" if STATSMODELS_AVAILABLE else "none")
+    d = {
+        "version": MODEL_VERSION,
+        "backend": backend,
+        "poa_for_kpi_min_wm2": cfg.poa_for_kpi_min_wm2,
+        "model_min_points": cfg.model_min_points,
+    }
+    return hashlib.sha1(json.dumps(d, sort_keys=True).encode()).hexdigest()[:16]
 
+def data_hash(df: pd.DataFrame, cols: List[str] = FOLD_DATA_COLS) -> str:
+    cols = [c for c in cols if c in df.columns]
+    h = pd.util.hash_pandas_object(df[cols], index=True).to_numpy()
+    return hashlib.sha1(h.tobytes()).hexdigest()[:16]
+
+def walkforward_windows(df: pd.DataFrame, cfg: Config) -> List[Tuple[pd.Timestamp, pd.Timestamp, pd.Timestamp]]:
     start = df.index.min().normalize()
     end = df.index.max().normalize()
 
-    rows = []
+    windows = []
     cur = start
     while cur + pd.Timedelta(days=cfg.walkforward_train_days + cfg.walkforward_test_days) <= end:
         train_end = cur + pd.Timedelta(days=cfg.walkforward_train_days)
         test_end = train_end + pd.Timedelta(days=cfg.walkforward_test_days)
-
-        train = df[(df.index >= cur) & (df.index < train_end)]
-        test = df[(df.index >= train_end) & (df.index < test_end)]
-
-        mobj = fit_expected_power_model(train, cfg)
-        if not mobj.get("ok"):
-            rows.append({"train_start": cur, "train_end": train_end, "test_end": test_end, "ok": False, "reason": mobj.get("reason")})
-            cur = train_end
-            continue
-
-        yhat = predict_expected(mobj, test)
-        m = usable.reindex(test.index).fillna(False)
-        err = (test.loc[m, "p_ac_kw"] - yhat.loc[m]).dropna()
-        if len(err) == 0:
-            rows.append({"train_start": cur, "train_end": train_end, "test_end": test_end, "ok": False, "reason": "no usable test points"})
-        else:
-            mae = float(np.mean(np.abs(err)))
-            rmse = float(np.sqrt(np.mean(err**2)))
-            rows.append({"train_start": cur, "train_end": train_end, "test_end": test_end, "ok": True, "mae_kw": mae, "rmse_kw": rmse, "n": int(len(err))})
+        windows.append((cur, train_end, test_end))
         cur = train_end
+    return windows
+
+def evaluate_fold(
+    fold: pd.DataFrame,
+    cfg: Config,
+    train_start: pd.Timestamp,
+    train_end: pd.Timestamp,
+    test_end: pd.Timestamp,
+    ctx: Optional[PlantContext] = None,
+) -> Dict:
+    """Fit on [train_start, train_end) and score on [train_end, test_end) of one fold slice."""
+    ctx = plant_context(fold, cfg, ctx)
+    train_ctx, test_ctx = ctx.window(train_start, train_end), ctx.window(train_end, test_end)
+    train, test = train_ctx.df, test_ctx.df
+    row = {"train_start": train_start, "train_end": train_end, "test_end": test_end}
+
+    mobj = fit_expected_power_model(train, cfg, train_ctx)
+    if not mobj.get("ok"):
+        return {**row, "ok": False, "reason": mobj.get("reason")}
+
+    m = test_ctx.model_mask
+    yhat = predict_expected(mobj, test, test_ctx)
+    err = (test.loc[m, "p_ac_kw"] - yhat.loc[m]).dropna()
+    coef = model_coefficients(mobj)
+    if len(err) == 0:
+        return {**row, "ok": False, "reason": "no usable test points", "coefficients": coef}
+    mae = float(np.mean(np.abs(err)))
+    rmse = float(np.sqrt(np.mean(err**2)))
+    return {**row, "ok": True, "mae_kw": mae, "rmse_kw": rmse, "n": int(len(err)), "coefficients": coef}
+
+def _fold_cache_path(cache_dir: str, plant: str, window: Tuple, dhash: str, mhash: str) -> Path:
+    key = "|".join([plant, *(str(t) for t in window), dhash, mhash])
+    return Path(cache_dir) / (hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+def _read_fold_cache(path: Path, tz) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        row = json.load(f)
+    for k in ["train_start", "train_end", "test_end"]:
+        row[k] = pd.Timestamp(row[k]).tz_convert(tz) if tz is not None else pd.Timestamp(row[k])
+    return row
+
+def _write_fold_cache(path: Path, row: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    d = {k: (v.isoformat() if isinstance(v, pd.Timestamp) else v) for k, v in row.items()}
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(d, f)
+    tmp.replace(path)
+
+def validate_walkforward(
+    df: pd.DataFrame,
+    cfg: Config,
+    plant: str = "",
+    cache_dir: Optional[str] = None,
+    max_workers: int = 1,
+) -> pd.DataFrame:
+    """
+    Walk-forward validation (train cfg.walkforward_train_days, test cfg.walkforward_test_days).
+    With cache_dir, fold results (metrics + coefficients) are keyed by
+    (plant, fold window, fold data hash, model config) and only new or changed folds are fitted.
+    max_workers > 1 evaluates the remaining folds in a process pool.
+    """
+    ctx = PlantContext(df, cfg)
+    if ctx.model_mask.sum() < cfg.model_min_points:
+        return pd.DataFrame([{"ok": False, "reason": "insufficient usable points"}])
+
+    mhash = model_config_hash(cfg)
+    rows: List[Optional[Dict]] = []
+    todo = []
+    for i, (train_start, train_end, test_end) in enumerate(walkforward_windows(df, cfg)):
+        fold_ctx = ctx.window(train_start, test_end)
+        fold = fold_ctx.df
+        path = None
+        if cache_dir is not None:
+            path = _fold_cache_path(cache_dir, plant, (train_start, train_end, test_end), data_hash(fold), mhash)
+            cached = _read_fold_cache(path, df.index.tz)
+            if cached is not None:
+                rows.append({**cached, "cached": True})
+                continue
+        rows.append(None)
+        todo.append((i, path, fold_ctx, train_start, train_end, test_end))
+
+    if max_workers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            futures = [ex.submit(evaluate_fold, c.df, cfg, s, te, e, c) for _, _, c, s, te, e in todo]
+            results = [f.result() for f in futures]
+    else:
+        results = [evaluate_fold(c.df, cfg, s, te, e, c) for _, _, c, s, te, e in todo]
+
+    for (i, path, *_), row in zip(todo, results, strict=True):
+        if path is not None:
+            _write_fold_cache(path, row)
+        rows[i] = {**row, "cached": False}
 
     return pd.DataFrame(rows)
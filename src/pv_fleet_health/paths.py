@@ -1,5 +1,24 @@
 from dataclasses import dataclass
 from pathlib import Path
+from urllib.parse import quote, unquote
+
+def plant_file_name(plant: str) -> str:
+    """
+    Collision-free, filesystem-safe form of a plant name (percent-encoded, so "P 1",
+    "P/1" and "P_1" stay distinct); "", "." and ".." are rejected.
+    """
+    name = quote(str(plant), safe="")
+    if name.strip(".") == "":
+        raise ValueError(f"invalid plant name {plant!r}")
+    return name
+
+def plant_from_file_name(name: str) -> str:
+    """Inverse of plant_file_name."""
+    return unquote(name)
+
+def plant_subdir(root: Path, plant: str) -> Path:
+    """<root>/<plant_file_name(plant)>."""
+    return Path(root) / plant_file_name(plant)
 
 @dataclass(frozen=True)
 class Paths:
@@ -22,7 +41,31 @@ class Paths:
     def plots_dir(self) -> Path:
         return self.outputs_dir / "plots"
 
+    @property
+    def rollup_dir(self) -> Path:
+        return self.outputs_dir / "rollups"
+
+    @property
+    def fleet_dir(self) -> Path:
+        return self.outputs_dir / "fleet"
+
+    @property
+    def plants_dir(self) -> Path:
+        return self.outputs_dir / "plants"
+
+    @property
+    def event_store_path(self) -> Path:
+        return self.outputs_dir / "events.sqlite"
+
+    @property
+    def cache_dir(self) -> Path:
+        return self.outputs_dir / "cache"
+
     def ensure(self) -> None:
         self.outputs_dir.mkdir(parents=True, exist_ok=True)
         self.stage_dir.mkdir(parents=True, exist_ok=True)
         self.plots_dir.mkdir(parents=True, exist_ok=True)
+        self.rollup_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.fleet_dir.mkdir(parents=True, exist_ok=True)
+        self.plants_dir.mkdir(parents=True, exist_ok=True)
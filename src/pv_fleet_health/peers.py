@@ -0,0 +1,122 @@
+import warnings
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .config import Config
+
+PEER_LEVELS = ["array", "array_group", "inverter"]
+PEER_SIGNALS = ["ac_power_kw", "nameplate_kwp"]
+
+def component_power_matrix(plant_rs: pd.DataFrame, level: Optional[str] = None) -> pd.DataFrame:
+    """
+    ac_power_kw of one plant's scada_rs rows pivoted to a (ts x component_id) matrix.
+    level=None picks the component type with the most components.
+    """
+    sub = plant_rs[plant_rs["canonical_signal"] == "ac_power_kw"]
+    if sub.empty:
+        return pd.DataFrame()
+    if level is None:
+        n = sub[sub["component_type"].isin(PEER_LEVELS)].groupby("component_type")["component_id"].nunique()
+        if n.empty:
+            return pd.DataFrame()
+        level = n.idxmax()
+    sub = sub[sub["component_type"] == level]
+    m = sub.groupby(["ts", "component_id"])["value_rs"].sum(min_count=1).unstack("component_id")
+    m.columns = m.columns.astype(str)
+    m.columns.name = level
+    return m.sort_index()
+
+def component_capacity(plant_rs: pd.DataFrame, level: str, components: List[str]) -> pd.Series:
+    """nameplate_kwp per component when reported, otherwise equal weights (1.0)."""
+    sub = plant_rs[(plant_rs["canonical_signal"] == "nameplate_kwp") & (plant_rs["component_type"] == level)]
+    cap = sub.groupby(sub["component_id"].astype(str))["value_rs"].median()
+    cap = cap.reindex(components)
+    if cap.isna().any() or (cap <= 0).any():
+        return pd.Series(1.0, index=components)
+    return cap
+
+def peer_ratios(power: pd.DataFrame, capacity: pd.Series, daylight: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Capacity-normalized power of each component divided by the per-timestamp median of
+    its peers. NaN at night (daylight False) or when the peer median is not positive.
+    """
+    N = power.to_numpy(dtype=float) / capacity.reindex(power.columns).to_numpy(dtype=float)[None, :]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        med = np.nanmedian(N, axis=1)
+    ok = np.isfinite(med) & (med > 0)
+    if daylight is not None:
+        ok &= daylight.reindex(power.index).fillna(False).to_numpy(dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = N / med[:, None]
+    ratio[~ok] = np.nan
+    return pd.DataFrame(ratio, index=power.index, columns=power.columns)
+
+def peer_comparison(
+    scada_rs: pd.DataFrame,
+    cfg: Config,
+    plant: str,
+    poa: Optional[pd.Series] = None,
+    level: Optional[str] = None,
+) -> Dict:
+    """
+    Intra-plant peer comparison of arrays / array groups / inverters.
+    Returns the ratio matrix (ts x component), the per-timestamp robust z of each
+    component against its peers, the rolling median of daily ratios (day x component,
+    cfg.rolling_window_days) and a per-component summary.
+    """
+    return _plant_peer_comparison(scada_rs[scada_rs["plant_name"] == plant], cfg, plant, poa, level)
+
+def _plant_peer_comparison(
+    plant_rs: pd.DataFrame, cfg: Config, plant: str, poa: Optional[pd.Series], level: Optional[str]
+) -> Dict:
+    power = component_power_matrix(plant_rs, level)
+    if power.shape[1] < 2:
+        return {"ok": False, "reason": "fewer than 2 components with ac_power_kw"}
+    level = power.columns.name
+
+    daylight = poa >= cfg.daylight_poa_threshold_wm2 if poa is not None else None
+    cap = component_capacity(plant_rs, level, list(power.columns))
+    ratio = peer_ratios(power, cap, daylight)
+
+    R = ratio.to_numpy()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        spread = 1.4826 * np.nanmedian(np.abs(R - 1.0), axis=1)
+    robust_z = pd.DataFrame((R - 1.0) / (spread[:, None] + 1e-9), index=ratio.index, columns=ratio.columns)
+
+    # rolling robust level on daily medians: (days x components) instead of (ts x components)
+    daily = ratio.resample("D").median()
+    rolling = daily.rolling(cfg.rolling_window_days, min_periods=max(1, cfg.rolling_window_days // 2)).median()
+
+    under = rolling < (1.0 - cfg.peer_underperformance_frac)
+    summary = pd.DataFrame({
+        "plant_name": plant,
+        "component_type": level,
+        "component_id": ratio.columns,
+        "capacity_weight": cap.to_numpy(),
+        "median_ratio": ratio.median().to_numpy(),
+        "last_rolling_ratio": rolling.ffill().iloc[-1].to_numpy(),
+        "underperf_frac": (under.sum() / rolling.notna().sum().replace(0, np.nan)).to_numpy(),
+        "n_points": ratio.notna().sum().to_numpy(),
+    })
+    summary["flagged"] = summary["last_rolling_ratio"] < (1.0 - cfg.peer_underperformance_frac)
+    return {"ok": True, "level": level, "ratio": ratio, "robust_z": robust_z, "daily_ratio": daily,
+            "rolling_ratio": rolling, "summary": summary}
+
+def peer_comparison_fleet(
+    scada_rs: pd.DataFrame,
+    cfg: Config,
+    poa_by_plant: Optional[Dict[str, pd.Series]] = None,
+    level: Optional[str] = None,
+) -> pd.DataFrame:
+    """Per-component peer summary for every plant with at least two components."""
+    poa_by_plant = poa_by_plant or {}
+    rows = scada_rs[scada_rs["canonical_signal"].isin(PEER_SIGNALS)]
+    out = []
+    # one pass over the fleet table; each plant works on its own slice
+    for p, plant_rs in rows.groupby("plant_name", sort=True, observed=True):
+        res = _plant_peer_comparison(plant_rs, cfg, p, poa_by_plant.get(p), level)
+        if res.get("ok"):
+            out.append(res["summary"])
+    return pd.concat(out, ignore_index=True) if out else pd.DataFrame()
@@ -0,0 +1,259 @@
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+from .config import Config
+from .dq import dq_daily_plant, dq_daily_signals, dq_report_from_daily
+from .event_store import EventStore
+from .events import merge_overlapping_events, normalize_events
+from .io import load_events, load_metadata, load_scada, resolve_input_paths, save_parquet
+from .irradiance_qc import select_best_irradiance_sensor
+from .paths import Paths
+from .plant import apply_missing_data_policy
+from .scada_headers import build_signal_catalog
+from .scada_reshape import wide_to_long
+from .timebase import resample_signals, time_index_audit_wide
+
+MANIFEST_NAME = "pipeline_manifest.json"
+TIMING_NAME = "pipeline_timing.csv"
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One pipeline node: func(cfg, **outputs_of_deps) -> DataFrame (or None), persisted as
+    <stage_dir>/<name>.parquet. sources lists the cfg path fields the node reads;
+    with uses_paths the run's Paths is passed as paths= (for nodes writing other stores).
+    """
+    name: str
+    func: Callable
+    deps: Tuple[str, ...] = ()
+    sources: Tuple[str, ...] = ()
+    uses_paths: bool = False
+
+def _signal_catalog(cfg: Config, scada_wide: pd.DataFrame) -> pd.DataFrame:
+    catalog = build_signal_catalog(list(scada_wide.columns), cfg.timestamp_col)
+    if cfg.selected_plant is not None:
+        catalog = catalog[catalog["plant_name"] == cfg.selected_plant].copy()
+    return catalog
+
+def _plants(signal_catalog: pd.DataFrame) -> List[str]:
+    return sorted(signal_catalog["plant_name"].dropna().unique().tolist())
+
+def _load_scada(cfg: Config) -> pd.DataFrame:
+    return load_scada(cfg)
+
+def _load_events(cfg: Config) -> pd.DataFrame:
+    return load_events(cfg)
+
+def _load_metadata(cfg: Config) -> Optional[pd.DataFrame]:
+    return load_metadata(cfg)
+
+def _scada_long(cfg: Config, scada_wide: pd.DataFrame, signal_catalog: pd.DataFrame) -> pd.DataFrame:
+    return wide_to_long(scada_wide, signal_catalog, cfg.timestamp_col)
+
+def _time_index_audit(cfg: Config, scada_wide: pd.DataFrame, signal_catalog: pd.DataFrame) -> pd.DataFrame:
+    return time_index_audit_wide(scada_wide, signal_catalog, cfg)["summary"]
+
+def _scada_rs(cfg: Config, scada_long: pd.DataFrame) -> pd.DataFrame:
+    return resample_signals(scada_long, cfg)
+
+def _scada_filled(cfg: Config, scada_rs: pd.DataFrame) -> pd.DataFrame:
+    return apply_missing_data_policy(scada_rs, cfg)[0]
+
+def _events_norm(cfg: Config, events_raw: pd.DataFrame, signal_catalog: pd.DataFrame) -> pd.DataFrame:
+    return normalize_events(events_raw, cfg, _plants(signal_catalog))
+
+def _events_merged(cfg: Config, events_norm: pd.DataFrame) -> pd.DataFrame:
+    return merge_overlapping_events(events_norm)
+
+def _event_store(cfg: Config, events_norm: pd.DataFrame, paths: Paths) -> pd.DataFrame:
+    """Append the normalized events to the SQLite EventStore (already-stored ones are skipped)."""
+    store = EventStore(paths.event_store_path)
+    n_new = store.append(events_norm)
+    return pd.DataFrame({"plant_name": store.plants()}).assign(n_new_events=n_new)
+
+def _dq_daily(cfg: Config, scada_rs: pd.DataFrame) -> pd.DataFrame:
+    return dq_daily_signals(scada_rs, cfg)
+
+def _dq_daily_plant(cfg: Config, scada_rs: pd.DataFrame) -> pd.DataFrame:
+    return dq_daily_plant(scada_rs, cfg)
+
+def _dq_report(cfg: Config, dq_daily_plant: pd.DataFrame, signal_catalog: pd.DataFrame) -> pd.DataFrame:
+    return dq_report_from_daily(dq_daily_plant, plants=_plants(signal_catalog))
+
+def _irradiance_sensors(cfg: Config, scada_rs: pd.DataFrame, metadata: Optional[pd.DataFrame]) -> pd.DataFrame:
+    tables = []
+    for plant in sorted(scada_rs["plant_name"].dropna().unique().tolist()):
+        _, tbl = select_best_irradiance_sensor(scada_rs, cfg, plant, metadata)
+        if len(tbl):
+            tables.append(tbl.assign(is_best=[True] + [False] * (len(tbl) - 1)))
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+# module-level functions (not lambdas) so stages can run in a process pool
+STAGES: List[Stage] = [
+    Stage("scada_wide", _load_scada, sources=("scada_path",)),
+    Stage("events_raw", _load_events, sources=("events_path",)),
+    Stage("metadata", _load_metadata, sources=("metadata_path",)),
+    Stage("signal_catalog", _signal_catalog, deps=("scada_wide",)),
+    Stage("scada_long", _scada_long, deps=("scada_wide", "signal_catalog")),
+    Stage("time_index_audit", _time_index_audit, deps=("scada_wide", "signal_catalog")),
+    Stage("scada_rs", _scada_rs, deps=("scada_long",)),
+    Stage("scada_filled", _scada_filled, deps=("scada_rs",)),
+    Stage("events_norm", _events_norm, deps=("events_raw", "signal_catalog")),
+    Stage("events_merged", _events_merged, deps=("events_norm",)),
+    Stage("event_store", _event_store, deps=("events_norm",), uses_paths=True),
+    Stage("dq_daily", _dq_daily, deps=("scada_rs",)),
+    Stage("dq_daily_plant", _dq_daily_plant, deps=("scada_rs",)),
+    Stage("dq_report", _dq_report, deps=("dq_daily_plant", "signal_catalog")),
+    Stage("irradiance_sensors", _irradiance_sensors, deps=("scada_rs", "metadata")),
+]
+
+def _config_json(cfg: Config) -> str:
+    d = dataclasses.asdict(cfg)
+    return json.dumps(d, sort_keys=True, default=lambda x: sorted(x) if isinstance(x, (set, frozenset)) else str(x))
+
+def _source_stats(cfg: Config, fields: Iterable[str]) -> List:
+    stats = []
+    for field in fields:
+        spec = getattr(cfg, field)
+        if not spec:
+            stats.append([field, None])
+            continue
+        for f in resolve_input_paths(spec):
+            st = os.stat(f) if os.path.exists(f) else None
+            stats.append([field, f, st.st_size if st else None, st.st_mtime_ns if st else None])
+    return stats
+
+def fingerprints(stages: List[Stage], cfg: Config) -> Dict[str, str]:
+    """
+    Cache key per stage: config, input file sizes/mtimes and the keys of all upstream
+    stages, so a change anywhere invalidates exactly the downstream nodes.
+    """
+    cfg_json = _config_json(cfg)
+    out: Dict[str, str] = {}
+    for st in topological_order(stages):
+        payload = json.dumps([st.name, cfg_json, _source_stats(cfg, st.sources), [out[d] for d in st.deps]])
+        out[st.name] = hashlib.sha1(payload.encode()).hexdigest()[:16]
+    return out
+
+def topological_order(stages: List[Stage]) -> List[Stage]:
+    by_name = {s.name: s for s in stages}
+    order, seen = [], set()
+
+    def visit(s: Stage, stack: Tuple[str, ...] = ()):
+        if s.name in seen:
+            return
+        if s.name in stack:
+            raise ValueError(f"Pipeline cycle through {s.name}")
+        for d in s.deps:
+            if d not in by_name:
+                raise KeyError(f"Stage {s.name} depends on unknown stage {d}")
+            visit(by_name[d], stack + (s.name,))
+        seen.add(s.name)
+        order.append(s)
+
+    for s in stages:
+        visit(s)
+    return order
+
+def _run_stage(func: Callable, cfg: Config, inputs: Dict) -> Tuple[Optional[pd.DataFrame], float, float]:
+    t0 = time.time()
+    out = func(cfg, **inputs)
+    return out, t0, time.time()
+
+def run_pipeline(
+    cfg: Config,
+    paths: Paths,
+    targets: Optional[List[str]] = None,
+    stages: Optional[List[Stage]] = None,
+    executor: str = "thread",
+    max_workers: Optional[int] = None,
+    force: bool = False,
+) -> Tuple[Dict[str, Optional[pd.DataFrame]], pd.DataFrame]:
+    """
+    Run the stage DAG up to targets (default: every stage) and return (outputs, timing
+    report). outputs holds the targets, or with no targets every frame that was in memory.
+
+    Nodes run as soon as their dependencies are done, independent nodes concurrently in a
+    thread pool (executor="process" for a process pool; stage funcs must then be picklable).
+    A node whose output parquet exists with a matching fingerprint in the stage manifest
+    is skipped, and so is everything upstream of it; a cached output is read back only if
+    a node that does run needs it.
+    """
+    stages = stages or STAGES
+    by_name = {s.name: s for s in stages}
+    paths.ensure()
+    keys = fingerprints(stages, cfg)
+    manifest_path = paths.stage_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+
+    def out_path(name: str) -> Path:
+        return paths.stage_dir / f"{name}.parquet"
+
+    def fresh(name: str) -> bool:
+        m = manifest.get(name)
+        return not force and m is not None and m["key"] == keys[name] and (m["empty"] or out_path(name).exists())
+
+    # walk back from the targets; the upstream of a fresh node is not needed at all
+    cached, to_run, stack = set(), set(), list(targets or by_name)
+    while stack:
+        n = stack.pop()
+        if n in cached or n in to_run:
+            continue
+        if fresh(n):
+            cached.add(n)
+        else:
+            to_run.add(n)
+            stack.extend(by_name[n].deps)
+    order = [s for s in topological_order(stages) if s.name in cached | to_run]
+
+    outputs: Dict[str, Optional[pd.DataFrame]] = {}
+    lock = threading.Lock()
+
+    def value(name: str) -> Optional[pd.DataFrame]:
+        with lock:
+            if name not in outputs:
+                outputs[name] = None if manifest[name]["empty"] else pd.read_parquet(out_path(name))
+            return outputs[name]
+
+    report = [{"stage": n, "status": "cached", "start_s": 0.0, "seconds": 0.0} for n in cached]
+    waiting = [s for s in order if s.name in to_run]
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    t_start = time.time()
+    done = set(cached)
+    pending: Dict = {}
+    with pool_cls(max_workers=max_workers) as ex:
+        while waiting or pending:
+            for s in [s for s in waiting if all(d in done for d in s.deps)]:
+                waiting.remove(s)
+                inputs = {d: value(d) for d in s.deps}
+                if s.uses_paths:
+                    inputs["paths"] = paths
+                pending[ex.submit(_run_stage, s.func, cfg, inputs)] = s
+            finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                s = pending.pop(fut)
+                out, t0, t1 = fut.result()
+                empty = out is None
+                if not empty:
+                    save_parquet(out, str(out_path(s.name)))
+                with lock:
+                    outputs[s.name] = out
+                    manifest[s.name] = {"key": keys[s.name], "empty": empty}
+                manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+                done.add(s.name)
+                report.append({"stage": s.name, "status": "ran", "start_s": t0 - t_start, "seconds": t1 - t0,
+                               "rows": None if empty else len(out)})
+
+    timing = pd.DataFrame(report, columns=["stage", "status", "start_s", "seconds", "rows"])
+    rank = {s.name: i for i, s in enumerate(order)}
+    timing = timing.sort_values("stage", key=lambda c: c.map(rank)).reset_index(drop=True)
+    timing.to_csv(paths.stage_dir / TIMING_NAME, index=False)
+    return {n: value(n) for n in (targets or outputs)}, timing
@@ -3,21 +3,200 @@ import numpy as np
 import pandas as pd
 from .config import Config
 
+SERIES_KEY_COLS = ["plant_name", "component_type", "component_id", "canonical_signal"]
+KEY_SIGNALS = ["poa_irradiance_wm2", "tmod_c", "ac_power_kw"]
+
+def gap_limited_fill(
+    v: np.ndarray, t_ns: np.ndarray, gid: np.ndarray, interp: np.ndarray, ffill: np.ndarray,
+    limit_ns: int, step_ns: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fill NaN gaps of many series at once (rows sorted by series id gid, then time).
+    A gap is filled only if the missing span (time between the surrounding valid readings,
+    minus one step) is <= limit_ns; longer gaps are left entirely NaN. Rows flagged interp
+    get linear-in-time interpolation (interior gaps only), rows flagged ffill carry the
+    last valid value (interior or trailing gaps). Returns (values, method) with method
+    0 = not filled, 1 = interp, 2 = ffill.
+    """
+    n = len(v)
+    method = np.zeros(n, dtype=np.int8)
+    if n == 0:
+        return v.copy(), method
+    idx = np.arange(n)
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = gid[1:] != gid[:-1]
+    gstart = np.maximum.accumulate(np.where(new_group, idx, 0))
+    end_group = np.r_[new_group[1:], True]
+    gend = np.minimum.accumulate(np.where(end_group, idx, n)[::-1])[::-1]
+
+    valid = ~np.isnan(v)
+    prev = np.maximum.accumulate(np.where(valid, idx, -1))
+    nxt = np.minimum.accumulate(np.where(valid, idx, n)[::-1])[::-1]
+    missing = ~valid & (prev >= gstart)  # leading gaps have nothing to fill from
+    has_next = nxt <= gend
+    p = np.clip(prev, 0, n - 1)
+    q = np.clip(nxt, 0, n - 1)
+
+    out = v.copy()
+    span = np.where(has_next, t_ns[q], t_ns[gend] + step_ns) - t_ns[p] - step_ns
+    short = missing & (span <= limit_ns)
+
+    do_interp = short & interp & has_next
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = (t_ns - t_ns[p]) / (t_ns[q] - t_ns[p])
+    out[do_interp] = (v[p] + (v[q] - v[p]) * w)[do_interp]
+    method[do_interp] = 1
+
+    do_ffill = short & ffill & ~do_interp
+    out[do_ffill] = v[p][do_ffill]
+    method[do_ffill] = 2
+    return out, method
+
+def _fill_limits(cfg: Config) -> Tuple[int, int]:
+    return pd.Timedelta(minutes=cfg.max_interp_gap_minutes).value, pd.Timedelta(cfg.standard_freq).value
+
 def missing_data_policy_apply(s: pd.Series, cfg: Config, canonical_signal: str) -> pd.Series:
-    s2 = s.copy()
-    if canonical_signal in cfg.allow_interp_signals:
-        # convert max gap minutes -> max number of points at standard freq
-        max_gap_points = int(pd.Timedelta(minutes=cfg.max_interp_gap_minutes) / pd.Timedelta(cfg.standard_freq))
-        s2 = s2.interpolate(limit=max_gap_points, limit_direction="both")
-    if canonical_signal in cfg.allow_ffill_signals:
-        s2 = s2.ffill()
-    return s2
-
-def counter_to_interval(counter: pd.Series, cfg: Config) -> pd.Series:
-    c = counter.sort_index()
-    d = c.diff()
-    d[d < cfg.counter_reset_negative_kwh_threshold] = np.nan
-    return d
+    """Gap-limited fill of one series per the signal's policy (see gap_limited_fill)."""
+    if canonical_signal not in cfg.allow_interp_signals and canonical_signal not in cfg.allow_ffill_signals:
+        return s.copy()
+    limit_ns, step_ns = _fill_limits(cfg)
+    n = len(s)
+    out, _ = gap_limited_fill(
+        s.to_numpy(dtype=float), pd.DatetimeIndex(s.index).as_unit("ns").asi8, np.zeros(n, dtype=np.int64),
+        np.full(n, canonical_signal in cfg.allow_interp_signals),
+        np.full(n, canonical_signal in cfg.allow_ffill_signals),
+        limit_ns, step_ns,
+    )
+    return pd.Series(out, index=s.index, name=s.name)
+
+def _daylight_rows(df: pd.DataFrame, cfg: Config) -> np.ndarray:
+    """
+    Per row of the resampled table: plant POA (median over sensors) >= the daylight
+    threshold, or POA present for plants that never reach it (as in the DQ report).
+    Rows of plants without any POA series all count as daylight.
+    """
+    poa_rows = df[df["canonical_signal"] == "poa_irradiance_wm2"]
+    poa = poa_rows.groupby(["plant_name", "ts"])["value_rs"].median()
+    day = poa >= cfg.daylight_poa_threshold_wm2
+    day = day.where(day.groupby(level="plant_name").transform("any"), poa.notna())
+    keys = pd.MultiIndex.from_frame(df[["plant_name", "ts"]])
+    out = day.reindex(keys).fillna(False).to_numpy(dtype=bool)
+    return out | ~df["plant_name"].isin(poa_rows["plant_name"].unique()).to_numpy()
+
+def apply_missing_data_policy(
+    scada_rs: pd.DataFrame, cfg: Config, drop: bool = False
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    The missing-data policy for every series of the resampled table in one pass.
+
+    value_rs is gap-limit filled per cfg.allow_interp_signals / cfg.allow_ffill_signals and
+    cfg.max_interp_gap_minutes; fill_method records "interp", "ffill" or "none" per row.
+    missing_frac_after is the post-fill missing fraction over daylight rows (see
+    _daylight_rows), so loggers that are silent at night are not penalized. Series of
+    KEY_SIGNALS above cfg.drop_if_missing_key_fraction are flagged (series_flagged on
+    every row, flagged in the report); with drop=True their rows are removed.
+    Returns (filled table, per-series report).
+    """
+    df = scada_rs.sort_values(SERIES_KEY_COLS + ["ts"], kind="stable").reset_index(drop=True)
+    gid = df.groupby(SERIES_KEY_COLS, sort=False, dropna=False).ngroup().to_numpy()
+    sig = df["canonical_signal"].astype(str)
+    limit_ns, step_ns = _fill_limits(cfg)
+    before = df["value_rs"].isna()
+    values, method = gap_limited_fill(
+        df["value_rs"].to_numpy(dtype=float),
+        pd.DatetimeIndex(df["ts"]).as_unit("ns").asi8,
+        gid,
+        sig.isin(list(cfg.allow_interp_signals)).to_numpy(),
+        sig.isin(list(cfg.allow_ffill_signals)).to_numpy(),
+        limit_ns, step_ns,
+    )
+    df["value_rs"] = values
+    df["fill_method"] = np.array(["none", "interp", "ffill"])[method]
+
+    daylight = _daylight_rows(df, cfg)
+    g = pd.DataFrame({
+        "gid": gid, "missing_before": before.to_numpy(), "interp": method == 1, "ffill": method == 2,
+        "daylight": daylight, "missing_after_day": np.isnan(values) & daylight,
+    }).groupby("gid")
+    report = df.groupby(gid)[SERIES_KEY_COLS].first()
+    report["n"] = g.size()
+    report["n_daylight"] = g["daylight"].sum()
+    report["n_missing_before"] = g["missing_before"].sum()
+    report["n_interp"] = g["interp"].sum()
+    report["n_ffill"] = g["ffill"].sum()
+    n_day = report["n_daylight"].where(report["n_daylight"] > 0)
+    report["missing_frac_after"] = g["missing_after_day"].sum() / n_day
+    report["flagged"] = report["canonical_signal"].isin(KEY_SIGNALS) & (
+        report["missing_frac_after"] > cfg.drop_if_missing_key_fraction
+    )
+    df["series_flagged"] = report["flagged"].to_numpy()[gid]
+    if drop:
+        df = df[~df["series_flagged"]].reset_index(drop=True)
+    return df, report.reset_index(drop=True)
+
+COUNTER_KEY_COLS = SERIES_KEY_COLS
+
+def counter_intervals(scada_rs: pd.DataFrame, cfg: Config) -> pd.DataFrame:
+    """
+    Interval energy from every energy_kwh_counter* series of the resampled table, diffed
+    per component in one grouped pass (so a reset or gap on one inverter cannot leak into
+    the plant total).
+
+    Each reading is diffed against the previous valid reading of the same series. Drops below
+    cfg.counter_reset_negative_kwh_threshold are resets/rollovers (flagged, interval NaN).
+    A delta spanning a gap of up to cfg.max_interp_gap_minutes is spread evenly over the
+    missing steps; longer gaps give NaN.
+    """
+    c = scada_rs[scada_rs["canonical_signal"].astype(str).str.startswith("energy_kwh_counter")]
+    cols = COUNTER_KEY_COLS + ["ts", "e_kwh", "counter_reset"]
+    if c.empty:
+        return pd.DataFrame(columns=cols)
+    c = c.sort_values(COUNTER_KEY_COLS + ["ts"], kind="stable")
+    g = c.groupby(COUNTER_KEY_COLS, sort=False, dropna=False).ngroup().to_numpy()
+
+    v = c["value_rs"].to_numpy(dtype=float)
+    ts = pd.DatetimeIndex(c["ts"]).as_unit("ns")
+    step = pd.Timedelta(cfg.standard_freq)
+    max_steps = max(1, int(pd.Timedelta(minutes=cfg.max_interp_gap_minutes) / step))
+
+    valid = ~np.isnan(v)
+    t = pd.Series(np.where(valid, ts.asi8, np.nan))
+    last_v = pd.Series(v).groupby(g).ffill()
+    last_t = t.groupby(g).ffill()
+    prev_v = last_v.groupby(g).shift(1).to_numpy()
+    prev_t = last_t.groupby(g).shift(1).to_numpy()
+
+    delta = v - prev_v
+    n_steps = (ts.asi8 - prev_t) / step.value
+    reset = valid & (delta < cfg.counter_reset_negative_kwh_threshold)
+    ok = valid & ~reset & (n_steps >= 1) & (n_steps <= max_steps)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(ok, delta / n_steps, -np.inf)
+    rate[~valid] = np.nan
+
+    # back-fill the per-step rate onto the NaN readings inside a bridged gap; -inf marks
+    # readings that must not be bridged (first reading, reset, gap too long)
+    e = pd.Series(rate).groupby(g).bfill(limit=max_steps - 1).to_numpy() if max_steps > 1 else rate
+    e = np.where(np.isneginf(e), np.nan, e)
+
+    out = c[COUNTER_KEY_COLS + ["ts"]].reset_index(drop=True)
+    out["e_kwh"] = e
+    out["counter_reset"] = reset
+    return out[cols]
+
+def aggregate_counter_intervals(intervals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sum per-component counter intervals to (plant_name, component_type, ts). Components
+    reporting several counter signals contribute only the one with most valid intervals.
+    """
+    if intervals.empty:
+        return pd.DataFrame(columns=["plant_name", "component_type", "ts", "e_kwh"])
+    comp = ["plant_name", "component_type", "component_id"]
+    n = intervals.groupby(COUNTER_KEY_COLS, dropna=False)["e_kwh"].count().reset_index()
+    best = n.sort_values("e_kwh", ascending=False, kind="stable").drop_duplicates(comp)
+    use = intervals.merge(best[COUNTER_KEY_COLS], on=COUNTER_KEY_COLS, how="inner")
+    agg = use.groupby(["plant_name", "component_type", "ts"])["e_kwh"].sum(min_count=1)
+    return agg.reset_index()
 
 def choose_power_level(scada_rs: pd.DataFrame, cfg: Config, plant: str, poa: Optional[pd.Series]) -> Tuple[Optional[str], str]:
     sub = scada_rs[(scada_rs["plant_name"] == plant) & (scada_rs["canonical_signal"] == "ac_power_kw")]
@@ -51,7 +230,12 @@ def build_plant_series(
     poa: Optional[pd.Series],
     tmod: Optional[pd.Series],
     aggregation_level: Optional[str],
+    counter_energy: Optional[pd.DataFrame] = None,
 ) -> pd.DataFrame:
+    """
+    counter_energy: optional fleet-wide aggregate_counter_intervals(counter_intervals(...))
+    output, so counter diffs are computed once for all plants instead of per call.
+    """
     idx = None
     for s in [poa, tmod]:
         if s is not None:
@@ -83,14 +267,18 @@ def build_plant_series(
 
     # counters fallback
     if e_int is None and aggregation_level is not None:
-        csub = scada_rs[
-            (scada_rs["plant_name"] == plant) &
-            (scada_rs["canonical_signal"].str.startswith("energy_kwh_counter")) &
-            (scada_rs["component_type"] == aggregation_level)
+        if counter_energy is None:
+            csub = scada_rs[
+                (scada_rs["plant_name"] == plant) &
+                (scada_rs["canonical_signal"].str.startswith("energy_kwh_counter")) &
+                (scada_rs["component_type"] == aggregation_level)
+            ]
+            counter_energy = aggregate_counter_intervals(counter_intervals(csub, cfg))
+        ce = counter_energy[
+            (counter_energy["plant_name"] == plant) & (counter_energy["component_type"] == aggregation_level)
         ]
-        if not csub.empty:
-            csum = csub.groupby("ts")["value_rs"].sum(min_count=1).sort_index()
-            e_int = counter_to_interval(csum, cfg)
+        if not ce.empty:
+            e_int = ce.set_index("ts")["e_kwh"].sort_index()
             idx = e_int.index if idx is None else idx.union(e_int.index)
 
     if idx is None:
@@ -1,57 +1,142 @@
-from typing import Optional
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+from .paths import plant_subdir
 
-def plot_missingness_bars(miss_df: pd.DataFrame, title: str = "Missingness by plant & signal"):
+QUICKLOOK_SIGNALS = [
+    ("p_ac_kw", "AC Power (kW)", "kW"),
+    ("poa_wm2", "POA Irradiance (W/m^2)", "W/m^2"),
+    ("tmod_c", "Module Temp (°C)", "°C"),
+]
+
+def _subplots(figsize, out_path: Optional[str]):
+    """Headless (out_path set): a pyplot-free Agg figure, safe in batch jobs and workers."""
+    if out_path is None:
+        return plt.subplots(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots()
+
+def _finish(fig, out_path: Optional[str]) -> None:
+    fig.tight_layout()
+    if out_path is None:
+        plt.show()
+        return
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    fig.savefig(out_path, dpi=100)
+
+def downsample_minmax(s: pd.Series, max_points: int) -> pd.Series:
+    """
+    Shape-preserving downsampling for line plots: the min and max sample of each of
+    max_points // 2 equal-count bins, in time order. Gaps longer than 3x the typical
+    spacing are kept as NaN breaks so the line is not bridged across missing data.
+    """
+    v = s.dropna()
+    if len(v) <= max_points:
+        return s
+    n_bins = max(1, max_points // 2)
+    vals = v.to_numpy(dtype=float)
+    bins = np.arange(len(vals)) * n_bins // len(vals)
+    order = np.lexsort((vals, bins))  # by bin, then by value
+    first = np.flatnonzero(np.r_[True, bins[order][1:] != bins[order][:-1]])
+    last = np.r_[first[1:] - 1, len(order) - 1]
+    # both ends of every data gap are kept so the break can be drawn between them
+    t = v.index.as_unit("ns").asi8 if isinstance(v.index, pd.DatetimeIndex) else v.index.to_numpy(dtype=float)
+    dt = np.diff(t)
+    gap = np.flatnonzero(dt > 3 * np.median(dt)) if len(dt) else dt
+    keep = np.unique(np.r_[order[first], order[last], gap, gap + 1])
+
+    is_gap = np.zeros(len(v), dtype=bool)
+    is_gap[gap] = True
+    brk = np.flatnonzero(is_gap[keep[:-1]] & (keep[1:] == keep[:-1] + 1)) + 1
+    # a NaN at the gap's start timestamp breaks the line
+    pos = np.insert(keep, brk, keep[brk - 1])
+    y = np.insert(v.to_numpy(dtype=float)[keep], brk, np.nan)
+    return pd.Series(y, index=v.index[pos], name=s.name)
+
+def plot_missingness_bars(
+    miss_df: pd.DataFrame, title: str = "Missingness by plant & signal", out_path: Optional[str] = None
+):
     pivot = miss_df.pivot_table(index="plant_name", columns="signal", values="missing_frac")
-    ax = pivot.plot(kind="bar", figsize=(14, 5))
+    fig, ax = _subplots((14, 5), out_path)
+    pivot.plot(kind="bar", ax=ax)
     ax.set_ylabel("Missing fraction")
     ax.set_title(title)
     ax.legend(loc="upper right")
-    plt.tight_layout()
-    plt.show()
-
-def quicklook_timeseries(df: pd.DataFrame, plant: str):
-    fig, ax = plt.subplots(figsize=(14, 4))
-    if "p_ac_kw" in df.columns:
-        df["p_ac_kw"].plot(ax=ax)
-    ax.set_title(f"AC Power (kW) – {plant}")
-    ax.set_ylabel("kW")
-    plt.tight_layout()
-    plt.show()
-
-    fig, ax = plt.subplots(figsize=(14, 4))
-    if "poa_wm2" in df.columns:
-        df["poa_wm2"].plot(ax=ax)
-    ax.set_title(f"POA Irradiance (W/m^2) – {plant}")
-    ax.set_ylabel("W/m^2")
-    plt.tight_layout()
-    plt.show()
-
-    fig, ax = plt.subplots(figsize=(14, 4))
-    if "tmod_c" in df.columns:
-        df["tmod_c"].plot(ax=ax)
-    ax.set_title(f"Module Temp (°C) – {plant}")
-    ax.set_ylabel("°C")
-    plt.tight_layout()
-    plt.show()
-
-def scatter_power_vs_irradiance(df: pd.DataFrame, plant: str, nmax: int = 20000):
+    _finish(fig, out_path)
+
+def quicklook_timeseries(
+    df: pd.DataFrame, plant: str, out_dir: Optional[str] = None, max_points: Optional[int] = 4000
+):
+    """
+    Power, POA and Tmod over time. With out_dir, figures are written as PNGs
+    (<out_dir>/<signal>.png) instead of shown. max_points=None plots full resolution.
+    """
+    for col, title, unit in QUICKLOOK_SIGNALS:
+        out_path = str(Path(out_dir) / f"{col}.png") if out_dir is not None else None
+        fig, ax = _subplots((14, 4), out_path)
+        if col in df.columns:
+            s = downsample_minmax(df[col], max_points) if max_points else df[col]
+            ax.plot(s.index, s.to_numpy(), lw=0.8)
+        ax.set_title(f"{title} – {plant}")
+        ax.set_ylabel(unit)
+        _finish(fig, out_path)
+
+def scatter_power_vs_irradiance(
+    df: pd.DataFrame,
+    plant: str,
+    nmax: int = 20000,
+    out_path: Optional[str] = None,
+    density: Optional[bool] = None,
+    gridsize: int = 120,
+):
+    """
+    Power vs POA. density=True (default when writing to out_path) renders all points as
+    a log-scaled 2-D histogram; otherwise a scatter of at most nmax random points.
+    """
     sub = df[["poa_wm2", "p_ac_kw"]].dropna()
-    if len(sub) > nmax:
-        sub = sub.sample(nmax, random_state=42)
-    plt.figure(figsize=(6, 5))
-    plt.scatter(sub["poa_wm2"], sub["p_ac_kw"], s=2)
-    plt.xlabel("POA (W/m^2)")
-    plt.ylabel("AC Power (kW)")
-    plt.title(f"Power vs Irradiance – {plant}")
-    plt.tight_layout()
-    plt.show()
-
-def hist_basic(series: pd.Series, title: str, bins: int = 60):
+    density = out_path is not None if density is None else density
+    fig, ax = _subplots((6, 5), out_path)
+    if density and len(sub):
+        h = ax.hist2d(sub["poa_wm2"], sub["p_ac_kw"], bins=gridsize, norm=LogNorm(), cmin=1)
+        fig.colorbar(h[3], ax=ax, label="count")
+    else:
+        if len(sub) > nmax:
+            sub = sub.sample(nmax, random_state=42)
+        ax.scatter(sub["poa_wm2"], sub["p_ac_kw"], s=2)
+    ax.set_xlabel("POA (W/m^2)")
+    ax.set_ylabel("AC Power (kW)")
+    ax.set_title(f"Power vs Irradiance – {plant}")
+    _finish(fig, out_path)
+
+def hist_basic(series: pd.Series, title: str, bins: int = 60, out_path: Optional[str] = None):
     s = series.dropna()
-    plt.figure(figsize=(6, 4))
-    plt.hist(s, bins=bins)
-    plt.title(title)
-    plt.tight_layout()
-    plt.show()
+    fig, ax = _subplots((6, 4), out_path)
+    ax.hist(s, bins=bins)
+    ax.set_title(title)
+    _finish(fig, out_path)
+
+def render_plant_quicklooks(df: pd.DataFrame, plant: str, plots_dir: str, max_points: int = 4000) -> List[str]:
+    """Write the quicklook time series and power/POA density plots for one plant."""
+    out_dir = plant_subdir(plots_dir, plant)
+    quicklook_timeseries(df, plant, out_dir=str(out_dir), max_points=max_points)
+    scatter_power_vs_irradiance(df, plant, out_path=str(out_dir / "power_vs_poa.png"))
+    return sorted(str(p) for p in out_dir.glob("*.png"))
+
+def render_fleet_quicklooks(
+    series_by_plant: Dict[str, pd.DataFrame], plots_dir: str, max_points: int = 4000, max_workers: Optional[int] = None
+) -> Dict[str, List[str]]:
+    """Batch-render every plant's quicklooks (e.g. into Paths.plots_dir) in a process pool."""
+    plants = list(series_by_plant)
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        futures = [
+            ex.submit(render_plant_quicklooks, series_by_plant[p], p, plots_dir, max_points) for p in plants
+        ]
+        return {p: f.result() for p, f in zip(plants, futures, strict=True)}
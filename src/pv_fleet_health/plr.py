@@ -0,0 +1,116 @@
+import warnings
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .config import Config
+
+# lag (in samples) between year-on-year pairs for the compute_kpis tables
+YOY_LAG = {"D": 365, "MS": 12}
+
+def stack_kpi_tables(tables: Dict[str, pd.DataFrame], metric: str, freq: str = "D") -> pd.DataFrame:
+    """
+    Align one metric of every plant's daily/monthly KPI table on a common regular
+    calendar: returns a (period x plant) frame, NaN where a plant has no value.
+    """
+    series = {}
+    for plant, t in tables.items():
+        if t is None or t.empty or metric not in t.columns:
+            continue
+        s = t[metric]
+        idx = pd.DatetimeIndex(s.index)
+        if idx.tz is not None:
+            idx = idx.tz_localize(None)
+        s = pd.Series(s.to_numpy(dtype=float), index=idx.normalize())
+        series[plant] = s[~s.index.duplicated(keep="first")]
+    if not series:
+        return pd.DataFrame()
+
+    wide = pd.DataFrame(series)
+    cal = pd.date_range(wide.index.min(), wide.index.max(), freq=freq)
+    return wide.reindex(cal)
+
+def yoy_ratios(P: np.ndarray, lag: int) -> np.ndarray:
+    """(plant x period) matrix -> year-on-year change in % for every aligned pair."""
+    if P.shape[1] <= lag:
+        return np.full((P.shape[0], 0), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        R = (P[:, lag:] / P[:, :-lag] - 1.0) * 100.0
+    R[~np.isfinite(R)] = np.nan
+    return R
+
+def bootstrap_median_ci(
+    R: np.ndarray, n_boot: int, level: float, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Percentile bootstrap CI of the row-wise median of R (NaN = missing), for all rows at once.
+
+    Resampling n values with replacement from a sorted row and taking the median is the
+    same as drawing the median *rank* of n uniforms, so instead of materializing
+    (rows x n_boot x n) samples we draw the k-th uniform order statistic ~ Beta(k, n-k+1)
+    (plus the next one, for even n) and index the sorted row: O(rows x n_boot).
+    """
+    Rs = np.sort(R, axis=1)  # NaN sorts last
+    n = (~np.isnan(Rs)).sum(axis=1)
+    has = n > 0
+    nn = np.maximum(n, 1)[:, None]
+    k = (nn + 1) // 2
+    rows = np.arange(len(R))[:, None]
+
+    if Rs.shape[1] == 0:
+        nan = np.full(len(R), np.nan)
+        return nan, nan.copy()
+
+    u_lo = rng.beta(k, nn - k + 1, size=(len(R), n_boot))
+    med = Rs[rows, np.minimum((u_lo * nn).astype(np.int64), nn - 1)]
+    even = (n % 2 == 0) & has
+    if even.any():
+        # next order statistic: minimum of the remaining n-k uniforms above u_lo
+        u_hi = u_lo + (1.0 - u_lo) * rng.beta(1.0, np.maximum(nn - k, 1), size=u_lo.shape)
+        hi_val = Rs[rows, np.minimum((u_hi * nn).astype(np.int64), nn - 1)]
+        med = np.where(even[:, None], 0.5 * (med + hi_val), med)
+    med[~has] = np.nan
+
+    alpha = (1.0 - level) / 2.0
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lo, hi = np.nanpercentile(med, [100 * alpha, 100 * (1 - alpha)], axis=1)
+    return lo, hi
+
+def compute_plr_fleet(
+    tables: Dict[str, pd.DataFrame],
+    cfg: Config,
+    metric: str = "perf_index_median",
+    freq: str = "D",
+    lag: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Year-on-year performance loss rate for all plants in one pass, from the compute_kpis
+    "daily" (freq="D") or "monthly" (freq="MS") tables keyed by plant name.
+    Returns the plr_table consumed by fleet.build_fleet_scorecard.
+    """
+    lag = lag if lag is not None else YOY_LAG[freq]
+    wide = stack_kpi_tables(tables, metric, freq)
+    plants = list(tables)
+    out = pd.DataFrame({"plant_name": plants})
+    if wide.empty:
+        return out.assign(ok=False, plr_pct_per_year=np.nan, plr_ci_low=np.nan, plr_ci_high=np.nan,
+                          n_pairs=0, reason=f"no {metric}")
+
+    P = wide.to_numpy(dtype=float).T
+    R = yoy_ratios(P, lag)
+    n_pairs = (~np.isnan(R)).sum(axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        plr = np.nanmedian(R, axis=1) if R.shape[1] else np.full(len(P), np.nan)
+    rng = np.random.default_rng(cfg.random_seed)
+    lo, hi = bootstrap_median_ci(R, cfg.plr_bootstrap_samples, cfg.plr_ci_level, rng)
+
+    res = pd.DataFrame(
+        {"plr_pct_per_year": plr, "plr_ci_low": lo, "plr_ci_high": hi, "n_pairs": n_pairs},
+        index=wide.columns,
+    )
+    out = out.join(res, on="plant_name")
+    out["n_pairs"] = out["n_pairs"].fillna(0).astype(int)
+    out["ok"] = out["n_pairs"] >= cfg.plr_min_pairs
+    out["reason"] = np.where(out["ok"], None, "fewer than plr_min_pairs year-on-year pairs")
+    return out[["plant_name", "ok", "plr_pct_per_year", "plr_ci_low", "plr_ci_high", "n_pairs", "reason"]]
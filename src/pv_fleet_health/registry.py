@@ -0,0 +1,123 @@
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from .config import Config
+from .context import PlantContext, plant_context
+from .model import (
+    MODEL_VERSION,
+    data_hash,
+    fit_expected_power_model,
+    model_coefficients,
+    model_config_hash,
+    predict_linear,
+)
+from .paths import plant_file_name
+
+
+def usable_points(df: pd.DataFrame, cfg: Config, ctx: Optional[PlantContext] = None) -> pd.Series:
+    return plant_context(df, cfg, ctx).model_mask
+
+
+def _window(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    return df[(df.index >= start) & (df.index <= end)]
+
+
+@dataclass(frozen=True)
+class ModelRegistry:
+    """
+    On-disk store of compact expected-power models, one JSON entry per plant:
+    coefficient vectors (scaler mean/scale + Huber coef/intercept), training window,
+    training-data hash, model config hash and the in-sample MAE used for drift checks.
+    """
+    root: Path
+
+    def _path(self, plant: str) -> Path:
+        return Path(self.root) / (plant_file_name(plant) + ".json")
+
+    def get(self, plant: str) -> Optional[Dict]:
+        path = self._path(plant)
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, plant: str, entry: Dict) -> None:
+        path = self._path(plant)
+        os.makedirs(path.parent, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        tmp.replace(path)
+
+    def refit_reason(self, plant: str, df: pd.DataFrame, cfg: Config, drift_threshold: float) -> Optional[str]:
+        """Why the stored model for plant must be refitted, or None if it can be reused."""
+        entry = self.get(plant)
+        if entry is None:
+            return "no stored model"
+        if entry["config_hash"] != model_config_hash(cfg):
+            return "model config changed"
+        start, end = pd.Timestamp(entry["train_start"]), pd.Timestamp(entry["train_end"])
+        if data_hash(_window(df, start, end)) != entry["data_hash"]:
+            return "training window data changed"
+
+        new = df[df.index > end]
+        m = usable_points(new, cfg)
+        if m.sum() >= cfg.registry_min_drift_points and entry["ref_mae_kw"] > 0:
+            err = new.loc[m, "p_ac_kw"].to_numpy(dtype=float) - predict_linear(entry["coefficients"], new.loc[m])
+            mae = float(np.mean(np.abs(err)))
+            if mae > entry["ref_mae_kw"] * (1.0 + drift_threshold):
+                return f"drift: MAE {mae:.3f} kW vs {entry['ref_mae_kw']:.3f} kW at fit"
+        return None
+
+    def fit(self, plant: str, df: pd.DataFrame, cfg: Config, ctx: Optional[PlantContext] = None) -> Dict:
+        ctx = plant_context(df, cfg, ctx)
+        mobj = fit_expected_power_model(df, cfg, ctx)
+        if not mobj.get("ok"):
+            return mobj
+        coef = model_coefficients(mobj)
+        m = mobj["mask"]
+        err = df.loc[m, "p_ac_kw"].to_numpy(dtype=float) - predict_linear(coef, df.loc[m], ctx.features.loc[m])
+        entry = {
+            "plant_name": plant,
+            "model_version": MODEL_VERSION,
+            "config_hash": model_config_hash(cfg),
+            "train_start": df.index.min().isoformat(),
+            "train_end": df.index.max().isoformat(),
+            "data_hash": data_hash(df),
+            "n_train": int(m.sum()),
+            "ref_mae_kw": float(np.mean(np.abs(err))),
+            "coefficients": coef,
+        }
+        self.put(plant, entry)
+        return entry
+
+    def load_or_fit(
+        self,
+        plant: str,
+        df: pd.DataFrame,
+        cfg: Config,
+        drift_threshold: Optional[float] = None,
+        ctx: Optional[PlantContext] = None,
+    ) -> Dict:
+        """
+        Compact model for plant, refitting on df only when there is no stored model, the
+        model config or the stored training window's data changed, or drift is detected
+        on data after the training window. The result works with predict_expected.
+        """
+        drift_threshold = cfg.registry_drift_threshold if drift_threshold is None else drift_threshold
+        reason = self.refit_reason(plant, df, cfg, drift_threshold)
+        if reason is None:
+            entry = self.get(plant)
+            refit = False
+        else:
+            entry = self.fit(plant, df, cfg, ctx)
+            refit = True
+            if "coefficients" not in entry:
+                return entry
+        return {"ok": True, "coefficients": entry["coefficients"], "features": entry["coefficients"]["features"],
+                "refit": refit, "refit_reason": reason, "train_start": entry["train_start"],
+                "train_end": entry["train_end"]}
@@ -0,0 +1,143 @@
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+import pandas as pd
+import pyarrow.parquet as pq
+from .paths import plant_subdir
+
+# finest -> coarsest; each level is aggregated from the previous one
+ROLLUP_LEVELS = {"hourly": "1h", "daily": "1D", "weekly": "W-MON"}
+LEVEL_DURATION = {"hourly": pd.Timedelta(hours=1), "daily": pd.Timedelta(days=1), "weekly": pd.Timedelta(days=7)}
+ROLLUP_COLS = ["signal", "ts", "sum", "count", "min", "max", "mean"]
+
+
+def aggregate_series(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """
+    Bucket a per-plant wide series frame (ts index, one column per signal) into the long
+    rollup layout: signal, ts, sum, count, min, max, mean. sum of e_kwh is the energy sum.
+    """
+    num = df.select_dtypes("number")
+    r = num.resample(freq)
+    parts = {"sum": r.sum(min_count=1), "count": r.count(), "min": r.min(), "max": r.max()}
+    long = pd.concat({k: v.stack(future_stack=True) for k, v in parts.items()}, axis=1)
+    long.index = long.index.set_names(["ts", "signal"])
+    long = long[long["count"] > 0].reset_index()
+    long["count"] = long["count"].astype("int64")
+    long["mean"] = long["sum"] / long["count"]
+    return long[ROLLUP_COLS]
+
+
+def merge_rollups(a: pd.DataFrame, b: pd.DataFrame, freq: Optional[str] = None) -> pd.DataFrame:
+    """
+    Merge rollup rows (partial buckets combine exactly: sums and counts add, min/max fold).
+    With freq, rows are first re-bucketed to that coarser resolution.
+    """
+    df = pd.concat([a, b], ignore_index=True) if b is not None else a
+    key = pd.Grouper(key="ts", freq=freq) if freq else "ts"
+    out = df.groupby(["signal", key]).agg(
+        sum=("sum", "sum"), count=("count", "sum"), min=("min", "min"), max=("max", "max")
+    ).reset_index()
+    out = out[out["count"] > 0]
+    out["mean"] = out["sum"] / out["count"]
+    return out[ROLLUP_COLS].sort_values(["signal", "ts"]).reset_index(drop=True)
+
+
+def build_rollups(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Hourly from the base series, then daily from hourly and weekly from daily."""
+    out = {}
+    prev = None
+    for level, freq in ROLLUP_LEVELS.items():
+        out[level] = aggregate_series(df, freq) if prev is None else merge_rollups(prev, None, freq)
+        prev = out[level]
+    return out
+
+
+def _localize(t: pd.Timestamp, tz: Optional[str]) -> pd.Timestamp:
+    if tz is None:
+        return t.tz_localize(None) if t.tzinfo is not None else t
+    return t.tz_localize(tz) if t.tzinfo is None else t.tz_convert(tz)
+
+
+def choose_level(start: pd.Timestamp, end: pd.Timestamp, max_points: int) -> str:
+    """Finest rollup level with at most max_points buckets per signal in [start, end]."""
+    span = end - start
+    for level in ROLLUP_LEVELS:
+        if span / LEVEL_DURATION[level] <= max_points:
+            return level
+    return list(ROLLUP_LEVELS)[-1]
+
+
+@dataclass(frozen=True)
+class RollupStore:
+    """
+    Per-plant rollup pyramid persisted as Parquet (one file per level) plus a watermark
+    (last base timestamp included), so updates only aggregate newer data.
+    """
+    root: Path
+
+    def plant_dir(self, plant: str) -> Path:
+        return plant_subdir(self.root, plant)
+
+    def watermark(self, plant: str) -> Optional[pd.Timestamp]:
+        meta = self.plant_dir(plant) / "meta.json"
+        if not meta.exists():
+            return None
+        with open(meta, encoding="utf-8") as f:
+            return pd.Timestamp(json.load(f)["watermark"])
+
+    def timezone(self, plant: str) -> Optional[str]:
+        """tz of the stored ts column (read from the Parquet schema of the finest level)."""
+        path = self.plant_dir(plant) / f"{next(iter(ROLLUP_LEVELS))}.parquet"
+        if not path.exists():
+            return None
+        tz = pq.read_schema(path).field("ts").type.tz
+        return str(tz) if tz else None
+
+    def read(self, plant: str, level: str) -> pd.DataFrame:
+        path = self.plant_dir(plant) / f"{level}.parquet"
+        if not path.exists():
+            return pd.DataFrame(columns=ROLLUP_COLS)
+        return pd.read_parquet(path)
+
+    def update(self, plant: str, df: pd.DataFrame) -> int:
+        """
+        Fold base rows newer than the watermark into every level; returns rows consumed.
+        Buckets straddling the watermark are merged, not recomputed.
+        """
+        wm = self.watermark(plant)
+        new = df[df.index > wm] if wm is not None else df
+        new = new[new.index.notna()]
+        if new.empty:
+            return 0
+        d = self.plant_dir(plant)
+        os.makedirs(d, exist_ok=True)
+        for level, part in build_rollups(new).items():
+            old = self.read(plant, level)
+            merged = merge_rollups(old, part) if len(old) else part
+            merged.to_parquet(d / f"{level}.parquet", index=False)
+        with open(d / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"watermark": new.index.max().isoformat()}, f)
+        return len(new)
+
+    def query(
+        self,
+        plant: str,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        max_points: int,
+        signals: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Rollup rows for [start, end] at the finest level within the point budget. Naive
+        bounds are taken in the timezone of the stored ts column.
+        """
+        tz = self.timezone(plant)
+        start, end = (_localize(pd.Timestamp(t), tz) for t in (start, end))
+        level = choose_level(start, end, max_points)
+        df = self.read(plant, level)
+        df = df[(df["ts"] >= start) & (df["ts"] <= end)]
+        if signals is not None:
+            df = df[df["signal"].isin(signals)]
+        return df.assign(level=level).reset_index(drop=True)
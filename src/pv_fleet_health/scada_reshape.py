@@ -1,33 +1,52 @@
+import numpy as np
 import pandas as pd
 
+CATALOG_ATTR_COLS = [
+    "plant_name",
+    "component_type",
+    "component_id",
+    "canonical_signal",
+    "unit",
+    "mapped",
+    "unit_ok",
+    "expected_unit",
+]
+
+
+def column_to_float(s: pd.Series) -> np.ndarray:
+    """
+    Numeric columns (e.g. from Parquet) are returned as float arrays without copying
+    where possible; only text columns go through the decimal-comma repair.
+    """
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s.to_numpy(dtype=float, copy=False)
+    # European decimal separators, repaired once per column before the melt
+    return pd.to_numeric(s.astype(str).str.replace(",", ".", regex=False), errors="coerce").to_numpy(
+        dtype=float
+    )
+
 
 def wide_to_long(
     scada_wide: pd.DataFrame, signal_catalog: pd.DataFrame, timestamp_col: str
 ) -> pd.DataFrame:
-    cols = [timestamp_col] + signal_catalog["raw_column_name"].tolist()
-    df = scada_wide.loc[:, cols].copy()
-
-    long = df.melt(id_vars=[timestamp_col], var_name="raw_column_name", value_name="value")
+    raw_cols = signal_catalog["raw_column_name"].tolist()
+    n_rows, n_cols = len(scada_wide), len(raw_cols)
 
-    # Convert value column to numeric, handling European decimal separators
-    long["value"] = pd.to_numeric(long["value"].astype(str).str.replace(",", "."), errors="coerce")
+    # column-major layout, same row order as DataFrame.melt
+    values = (
+        np.concatenate([column_to_float(scada_wide[c]) for c in raw_cols])
+        if n_cols
+        else np.array([], dtype=float)
+    )
+    row_idx = np.tile(np.arange(n_rows), n_cols)
+    col_idx = np.repeat(np.arange(n_cols), n_rows)
 
-    long = long.merge(
-        signal_catalog[
-            [
-                "raw_column_name",
-                "plant_name",
-                "component_type",
-                "component_id",
-                "canonical_signal",
-                "unit",
-                "mapped",
-                "unit_ok",
-                "expected_unit",
-            ]
-        ],
-        on="raw_column_name",
-        how="left",
+    long = pd.DataFrame(
+        {
+            "ts": scada_wide[timestamp_col].take(row_idx).reset_index(drop=True),
+            "raw_column_name": signal_catalog["raw_column_name"].take(col_idx).reset_index(drop=True),
+            "value": values,
+        }
     )
-    long = long.rename(columns={timestamp_col: "ts"})
-    return long
+    attrs = signal_catalog[CATALOG_ATTR_COLS].take(col_idx).reset_index(drop=True)
+    return pd.concat([long, attrs], axis=1)
@@ -0,0 +1,218 @@
+"""
+Local read-only HTTP query service over the persisted outputs (stdlib asyncio only).
+
+  GET /health
+  GET /scorecard                      fleet scorecard
+  GET /action_plan                    fleet action plan
+  GET /plants                         plants with persisted tables
+  GET /plants/<plant>/kpi             daily KPI table     ?start=&end= or ?days=
+  GET /plants/<plant>/losses          daily loss table    ?start=&end= or ?days=
+  GET /plants/<plant>/series          rollup series       ?start=&end=&max_points=&signals=a,b
+
+Responses are JSON. ETags are derived from the request and the size/mtime of the files
+behind it, so If-None-Match is answered with 304 without reading any data, and the
+in-memory LRU cache is revalidated the same way when outputs are rewritten.
+"""
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+import pandas as pd
+from .health_card import card_dir
+from .io import save_parquet
+from .paths import Paths, plant_from_file_name
+from .rollups import RollupStore
+
+FLEET_TABLES = {"scorecard": "scorecard.parquet", "action_plan": "action_plan.parquet"}
+PLANT_TABLES = {"kpi": "kpi_daily.parquet", "losses": "losses_daily.parquet"}
+# health card key -> persisted plant table
+CARD_TABLES = {"daily": "kpi_daily.parquet", "losses_daily": "losses_daily.parquet"}
+
+def _plant_dir(paths: Paths, plant: str) -> Path:
+    return card_dir(paths.plants_dir, plant)
+
+def save_fleet_tables(paths: Paths, scorecard: pd.DataFrame, action_plan: pd.DataFrame) -> None:
+    save_parquet(scorecard, str(paths.fleet_dir / FLEET_TABLES["scorecard"]))
+    save_parquet(action_plan, str(paths.fleet_dir / FLEET_TABLES["action_plan"]))
+
+def save_health_card_tables(paths: Paths, plant: str, card: Dict) -> None:
+    """Persist a health card's daily KPI and loss tables (date index kept as a column)."""
+    for key, name in CARD_TABLES.items():
+        df = card.get(key)
+        if df is not None:
+            save_parquet(df.rename_axis("date").reset_index(), str(_plant_dir(paths, plant) / name))
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+def _signature(files: List[Path]) -> Tuple:
+    sig = []
+    for f in files:
+        st = f.stat() if f.exists() else None
+        sig.append((str(f), st.st_size if st else None, st.st_mtime_ns if st else None))
+    return tuple(sig)
+
+def _records(df: pd.DataFrame) -> bytes:
+    return df.to_json(orient="records", date_format="iso").encode()
+
+def _time_window(q: Dict[str, str], latest: Optional[pd.Timestamp]) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    try:
+        start = pd.Timestamp(q["start"]) if "start" in q else None
+        end = pd.Timestamp(q["end"]) if "end" in q else None
+        if "days" in q and latest is not None:
+            end = end or latest
+            start = end - pd.Timedelta(days=int(q["days"]))
+    except ValueError as e:
+        raise HTTPError(400, f"bad time window: {e}") from e
+    return start, end
+
+def _clip(ts: pd.Series, bound: Optional[pd.Timestamp]) -> Optional[pd.Timestamp]:
+    """Give a naive bound the timezone of the column it is compared with."""
+    if bound is None or ts.empty:
+        return bound
+    tz = getattr(ts.dtype, "tz", None)
+    if tz is not None and bound.tzinfo is None:
+        return bound.tz_localize(tz)
+    return bound
+
+class QueryService:
+    """Request handling (socket-free, so it can be driven directly) plus an LRU cache."""
+
+    def __init__(self, paths: Paths, cache_size: int = 256):
+        self.paths = paths
+        self.rollups = RollupStore(paths.rollup_dir)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, Tuple[Tuple, str, bytes]] = OrderedDict()
+
+    def _files(self, parts: List[str]) -> List[Path]:
+        try:
+            return self._endpoint_files(parts)
+        except ValueError as e:  # plant names that would leave the output directories
+            raise HTTPError(400, str(e)) from e
+
+    def _endpoint_files(self, parts: List[str]) -> List[Path]:
+        if parts == ["scorecard"] or parts == ["action_plan"]:
+            return [self.paths.fleet_dir / FLEET_TABLES[parts[0]]]
+        if parts == ["plants"]:
+            return [self.paths.plants_dir]
+        if len(parts) == 3 and parts[0] == "plants" and parts[2] in PLANT_TABLES:
+            return [_plant_dir(self.paths, parts[1]) / PLANT_TABLES[parts[2]]]
+        if len(parts) == 3 and parts[0] == "plants" and parts[2] == "series":
+            d = self.rollups.plant_dir(parts[1])
+            return [d / "meta.json"] + sorted(d.glob("*.parquet"))
+        raise HTTPError(404, "unknown endpoint")
+
+    def _build(self, parts: List[str], q: Dict[str, str], files: List[Path]) -> bytes:
+        if parts == ["plants"]:
+            names = sorted(plant_from_file_name(p.name) for p in self.paths.plants_dir.iterdir() if p.is_dir()) \
+                if self.paths.plants_dir.exists() else []
+            return json.dumps(names).encode()
+        if not files[0].exists():
+            raise HTTPError(404, "no persisted output for this request")
+        if parts[0] != "plants":
+            return _records(pd.read_parquet(files[0]))
+
+        plant, kind = parts[1], parts[2]
+        if kind == "series":
+            wm = self.rollups.watermark(plant)
+            start, end = _time_window(q, wm)
+            end = end if end is not None else wm
+            if start is None:
+                start = end - pd.Timedelta(days=30)
+            try:
+                max_points = int(q.get("max_points", 2000))
+            except ValueError as e:
+                raise HTTPError(400, "max_points must be an integer") from e
+            signals = q["signals"].split(",") if "signals" in q else None
+            df = self.rollups.query(plant, start, end, max_points=max_points, signals=signals)
+            return _records(df)
+
+        df = pd.read_parquet(files[0])
+        if "date" in df.columns and len(df):
+            start, end = _time_window(q, df["date"].max())
+            if start is not None:
+                df = df[df["date"] >= _clip(df["date"], start)]
+            if end is not None:
+                df = df[df["date"] <= _clip(df["date"], end)]
+        return _records(df)
+
+    async def handle(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """(status, headers, body) for one request."""
+        if method != "GET":
+            return self._error(405, "only GET is supported")
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if parts == ["health"]:
+            return 200, {"Content-Type": "application/json"}, b'{"ok": true}'
+        try:
+            files = self._files(parts)
+            sig = _signature(files)
+            key = f"{url.path}?{url.query}"
+            etag = '"' + hashlib.sha1(repr((key, sig)).encode()).hexdigest()[:20] + '"'
+            hdrs = {"Content-Type": "application/json", "ETag": etag, "Cache-Control": "no-cache"}
+            if headers.get("if-none-match") == etag:
+                return 304, hdrs, b""
+
+            hit = self._cache.get(key)
+            if hit is not None and hit[0] == sig:
+                self._cache.move_to_end(key)
+                return 200, {**hdrs, "X-Cache": "hit"}, hit[2]
+
+            body = await asyncio.to_thread(self._build, parts, q, files)
+            self._cache[key] = (sig, etag, body)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return 200, {**hdrs, "X-Cache": "miss"}, body
+        except HTTPError as e:
+            return self._error(e.status, str(e))
+
+    @staticmethod
+    def _error(status: int, message: str) -> Tuple[int, Dict[str, str], bytes]:
+        return status, {"Content-Type": "application/json"}, json.dumps({"error": message}).encode()
+
+    async def _on_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            try:
+                method, target, _ = request_line.split(" ", 2)
+            except ValueError:
+                status, hdrs, body = self._error(400, "malformed request line")
+            else:
+                try:
+                    status, hdrs, body = await self.handle(method, target, headers)
+                except Exception as e:  # keep serving other requests
+                    status, hdrs, body = self._error(500, repr(e))
+            head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Length: {len(body)}",
+                    "Connection: close"] + [f"{k}: {v}" for k, v in hdrs.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._on_connection, host, port)
+
+def serve(paths: Paths, host: str = "127.0.0.1", port: int = 8765, cache_size: int = 256) -> None:
+    """Blocking entry point; binds to localhost unless told otherwise."""
+    async def _main():
+        server = await QueryService(paths, cache_size).start(host, port)
+        async with server:
+            await server.serve_forever()
+    asyncio.run(_main())
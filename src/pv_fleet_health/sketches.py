@@ -0,0 +1,140 @@
+"""
+Mergeable quantile sketches (DDSketch-style log-bucket histograms on NumPy).
+
+Every value x is counted in bucket ceil(log_gamma(|x|)) with gamma = (1 + a) / (1 - a), so
+any quantile read back is within relative error a of the exact quantile value (a =
+cfg.sketch_relative_accuracy). Sketches of partitions merge exactly by adding bucket
+counts, so robust statistics can be computed chunk-wise or in parallel workers.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+MIN_INDEXABLE = 1e-9  # |x| below this is counted as zero
+
+def _empty_keys() -> np.ndarray:
+    return np.zeros(0, dtype=np.int64)
+
+def _empty_counts() -> np.ndarray:
+    return np.zeros(0, dtype=np.float64)
+
+def _add_counts(keys: np.ndarray, counts: np.ndarray, new_keys: np.ndarray, new_counts: np.ndarray):
+    k = np.concatenate([keys, new_keys])
+    if len(k) == 0:
+        return _empty_keys(), _empty_counts()
+    uk, inv = np.unique(k, return_inverse=True)
+    return uk, np.bincount(inv, weights=np.concatenate([counts, new_counts]), minlength=len(uk))
+
+@dataclass
+class QuantileSketch:
+    alpha: float = 0.01
+    pos_keys: np.ndarray = field(default_factory=_empty_keys)
+    pos_counts: np.ndarray = field(default_factory=_empty_counts)
+    neg_keys: np.ndarray = field(default_factory=_empty_keys)
+    neg_counts: np.ndarray = field(default_factory=_empty_counts)
+    zero_count: float = 0.0
+    min: float = np.inf
+    max: float = -np.inf
+
+    @property
+    def gamma(self) -> float:
+        return (1.0 + self.alpha) / (1.0 - self.alpha)
+
+    @property
+    def count(self) -> float:
+        return float(self.pos_counts.sum() + self.neg_counts.sum() + self.zero_count)
+
+    def _key(self, a: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(a) / np.log(self.gamma)).astype(np.int64)
+
+    def _value(self, k: np.ndarray) -> np.ndarray:
+        return 2.0 * self.gamma ** k / (self.gamma + 1.0)
+
+    def add(self, values) -> "QuantileSketch":
+        """Add values (NaN ignored); returns self."""
+        x = np.asarray(values, dtype=float).ravel()
+        x = x[np.isfinite(x)]
+        if len(x) == 0:
+            return self
+        a = np.abs(x)
+        big = a >= MIN_INDEXABLE
+        pos, neg = big & (x > 0), big & (x < 0)
+        for sel, name in [(pos, "pos"), (neg, "neg")]:
+            if sel.any():
+                uk, c = np.unique(self._key(a[sel]), return_counts=True)
+                keys, counts = _add_counts(getattr(self, f"{name}_keys"), getattr(self, f"{name}_counts"),
+                                           uk, c.astype(float))
+                setattr(self, f"{name}_keys", keys)
+                setattr(self, f"{name}_counts", counts)
+        self.zero_count += float((~big).sum())
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Merge other into self (same alpha required); returns self."""
+        if not np.isclose(self.alpha, other.alpha):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.pos_keys, self.pos_counts = _add_counts(self.pos_keys, self.pos_counts, other.pos_keys, other.pos_counts)
+        self.neg_keys, self.neg_counts = _add_counts(self.neg_keys, self.neg_counts, other.neg_keys, other.neg_counts)
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _histogram(self):
+        """Bucket representative values in ascending order, with their counts."""
+        values = np.concatenate([-self._value(self.neg_keys[::-1]), [0.0], self._value(self.pos_keys)])
+        counts = np.concatenate([self.neg_counts[::-1], [self.zero_count], self.pos_counts])
+        return values, counts
+
+    def quantile(self, q):
+        """Quantile(s) q in [0, 1]; NaN for an empty sketch."""
+        qs = np.atleast_1d(np.asarray(q, dtype=float))
+        n = self.count
+        if n == 0:
+            out = np.full(len(qs), np.nan)
+        else:
+            values, counts = self._histogram()
+            cum = np.cumsum(counts)
+            i = np.searchsorted(cum, qs * (n - 1), side="right")
+            out = np.clip(values[np.minimum(i, len(values) - 1)], self.min, self.max)
+        return float(out[0]) if np.ndim(q) == 0 else out
+
+    def mad(self) -> float:
+        """Median absolute deviation from the sketch median (same bucket resolution)."""
+        if self.count == 0:
+            return np.nan
+        med = self.quantile(0.5)
+        values, counts = self._histogram()
+        dev = np.abs(np.clip(values, self.min, self.max) - med)
+        order = np.argsort(dev, kind="stable")
+        cum = np.cumsum(counts[order])
+        i = np.searchsorted(cum, 0.5 * (self.count - 1), side="right")
+        return float(dev[order][min(i, len(dev) - 1)])
+
+def sketch(values, alpha: float = 0.01) -> QuantileSketch:
+    return QuantileSketch(alpha=alpha).add(values)
+
+def merge_sketches(sketches: Iterable[QuantileSketch], alpha: Optional[float] = None) -> QuantileSketch:
+    sketches = list(sketches)
+    out = QuantileSketch(alpha=alpha if alpha is not None else (sketches[0].alpha if sketches else 0.01))
+    for s in sketches:
+        out.merge(s)
+    return out
+
+def sketch_by_group(groups, values, alpha: float = 0.01) -> Dict[Hashable, QuantileSketch]:
+    """One sketch per group key (e.g. per date) in a single grouped pass."""
+    s = pd.Series(np.asarray(values, dtype=float)).dropna()
+    g = pd.Series(np.asarray(groups))[s.index]
+    return {k: sketch(v.to_numpy(), alpha) for k, v in s.groupby(g.to_numpy(), sort=False)}
+
+def merge_sketch_dicts(
+    a: Dict[Hashable, QuantileSketch], b: Dict[Hashable, QuantileSketch]
+) -> Dict[Hashable, QuantileSketch]:
+    """Merge per-group sketches of two partitions (a's sketches are updated in place)."""
+    out = dict(a)
+    for k, s in b.items():
+        out[k] = out[k].merge(s) if k in out else merge_sketches([s])
+    return out
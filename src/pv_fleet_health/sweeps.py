@@ -0,0 +1,112 @@
+"""
+Vectorized threshold sweeps for anomaly detection and loss accounting.
+
+For a grid over residual_z_threshold, poa_for_kpi_min_wm2 and rolling_window_days, each
+plant's arrays are prepared once. Points are sorted by POA so that every POA threshold
+selects a prefix, and loss totals for all thresholds come from one cumulative sum. Per
+POA threshold the standardized |residual| is sorted once, and the anomaly counts for all
+z thresholds are read off with one searchsorted. The rolling residual median depends
+only on the window, so it is computed once per window length. The numbers match
+detect_anomalies/compute_losses run with the same Config values.
+"""
+import itertools
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+from .config import Config
+from .context import PlantContext, plant_context
+
+SWEEP_PARAMS = ["poa_for_kpi_min_wm2", "residual_z_threshold", "rolling_window_days"]
+
+def sweep_grid(cfg: Config, grid: Optional[Dict[str, Iterable]] = None) -> pd.DataFrame:
+    """Cartesian product of the grid values (parameters not in grid keep their cfg value)."""
+    grid = grid or {}
+    unknown = set(grid) - set(SWEEP_PARAMS)
+    if unknown:
+        raise ValueError(f"Cannot sweep {sorted(unknown)}; supported: {SWEEP_PARAMS}")
+    values = [sorted(set(grid.get(p, [getattr(cfg, p)]))) for p in SWEEP_PARAMS]
+    return pd.DataFrame(list(itertools.product(*values)), columns=SWEEP_PARAMS)
+
+def _rolling_neg(residual: pd.Series, cfg: Config, days: int) -> np.ndarray:
+    """resid_roll_med < 0 as detect_anomalies computes it for rolling_window_days=days."""
+    window = int(pd.Timedelta(days=days) / pd.Timedelta(cfg.standard_freq))
+    roll = residual.rolling(window, min_periods=max(10, window // 5)).median().to_numpy()
+    return roll < 0
+
+def sweep_plant(
+    df: pd.DataFrame,
+    cfg: Config,
+    grid: Optional[Dict[str, Iterable]] = None,
+    ctx: Optional[PlantContext] = None,
+) -> pd.DataFrame:
+    """
+    df: labeled plant frame with p_expected_kw (as passed to compute_losses). One row per
+    grid point with anomaly counts (anomaly_point of detect_anomalies), the fraction of
+    residual points with a negative rolling median, and loss totals over the whole frame.
+    """
+    points = sweep_grid(cfg, grid)
+    dt_h = pd.Timedelta(cfg.standard_freq).total_seconds() / 3600.0
+
+    p_ac = df["p_ac_kw"].to_numpy(dtype=float)
+    p_exp = df["p_expected_kw"].to_numpy(dtype=float)
+    residual = p_ac - p_exp
+    intrinsic = plant_context(df, cfg, ctx).intrinsic.to_numpy()
+    valid = intrinsic & np.isfinite(residual)
+
+    # POA descending: the points with poa >= threshold are a prefix of this order
+    poa = df["poa_wm2"].to_numpy(dtype=float)
+    order = np.argsort(-np.where(np.isnan(poa), -np.inf, poa), kind="stable")
+    poa_sorted = -np.where(np.isnan(poa), -np.inf, poa)[order]
+
+    def prefix_len(thresholds: np.ndarray) -> np.ndarray:
+        return np.searchsorted(poa_sorted, -np.asarray(thresholds, dtype=float), side="right")
+
+    loss = (p_exp - p_ac) * dt_h
+    loss_total = np.concatenate([[0.0], np.cumsum(np.nan_to_num(loss[order]))])
+    unexpl = np.where(intrinsic & (loss > 0), loss, 0.0)
+    unexpl_total = np.concatenate([[0.0], np.cumsum(unexpl[order])])
+    valid_cum = np.concatenate([[0], np.cumsum(valid[order])])
+    resid_s = pd.Series(residual, index=df.index)
+    neg_cum = {
+        w: np.concatenate([[0], np.cumsum((valid & _rolling_neg(resid_s, cfg, w))[order])])
+        for w in points["rolling_window_days"].unique()
+    }
+
+    n = prefix_len(points["poa_for_kpi_min_wm2"].to_numpy())
+    out = points.copy()
+    out["n_points"] = valid_cum[n]
+    out["loss_kwh"] = loss_total[n]
+    out["loss_unexplained"] = unexpl_total[n]
+    out["unexplained_loss_frac"] = (out["loss_unexplained"] / out["loss_kwh"]).where(out["loss_kwh"] > 0)
+    out["roll_med_neg_frac"] = [
+        neg_cum[w][k] / valid_cum[k] if valid_cum[k] else np.nan
+        for w, k in zip(out["rolling_window_days"], n, strict=True)
+    ]
+
+    out["n_anomaly_points"] = 0
+    for poa_min, idx in out.groupby("poa_for_kpi_min_wm2").groups.items():
+        k = int(prefix_len([poa_min])[0])
+        r = residual[order[:k]][valid[order[:k]]]
+        if len(r) == 0:
+            continue
+        med = float(np.median(r))
+        denom = 1.4826 * float(np.median(np.abs(r - med))) + 1e-9
+        z_abs = np.sort(np.abs((r - med) / denom))
+        thr = out.loc[idx, "residual_z_threshold"].to_numpy(dtype=float)
+        out.loc[idx, "n_anomaly_points"] = len(z_abs) - np.searchsorted(z_abs, thr, side="left")
+    out["anomaly_frac"] = (out["n_anomaly_points"] / out["n_points"]).where(out["n_points"] > 0)
+    return out
+
+def sweep_fleet(
+    plant_frames: Dict[str, pd.DataFrame],
+    cfg: Config,
+    grid: Optional[Dict[str, Iterable]] = None,
+    contexts: Optional[Dict[str, PlantContext]] = None,
+) -> pd.DataFrame:
+    """sweep_plant for every plant (with its PlantContext if given), stacked into one tidy table."""
+    contexts = contexts or {}
+    tables = [sweep_plant(df, cfg, grid, contexts.get(p)).assign(plant_name=p) for p, df in plant_frames.items()]
+    if not tables:
+        return pd.DataFrame(columns=["plant_name"] + SWEEP_PARAMS)
+    out = pd.concat(tables, ignore_index=True)
+    return out[["plant_name"] + [c for c in out.columns if c != "plant_name"]]
@@ -3,28 +3,122 @@ import pandas as pd
 import numpy as np
 from .config import Config
 
-def compute_time_index_audit(scada_long: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    for plant, g in scada_long.groupby("plant_name"):
-        ts = g["ts"].dropna().sort_values()
-        if ts.empty:
-            rows.append({"plant_name": plant, "min_ts": None, "max_ts": None, "dup_frac": None, "median_dt_min": None, "n": 0})
-            continue
-
-        dup_frac = float(ts.duplicated().mean())
-        dt = ts.drop_duplicates().diff().dropna()
-        dt_min = dt.dt.total_seconds() / 60.0
-        median_dt = float(np.nanmedian(dt_min)) if len(dt_min) else np.nan
-
-        rows.append({
-            "plant_name": plant,
-            "min_ts": ts.min(),
-            "max_ts": ts.max(),
-            "dup_frac": dup_frac,
-            "median_dt_min": median_dt,
-            "n": int(len(ts)),
+def plant_timestamps(scada_wide: pd.DataFrame, signal_catalog: pd.DataFrame, timestamp_col: str) -> pd.DataFrame:
+    """
+    (plant_name, ts) for every wide row in which the plant reports any value. Export
+    duplicates and unparseable/ambiguous (NaT) timestamps are kept for the audit.
+    """
+    ts = scada_wide[timestamp_col]
+    cat = signal_catalog.dropna(subset=["plant_name"]).sort_values("plant_name", kind="stable")
+    if cat.empty:
+        return pd.DataFrame({"plant_name": pd.Series(dtype=object), "ts": ts.iloc[:0].reset_index(drop=True)})
+    # one notna pass over all mapped columns, OR-reduced over each plant's column block
+    codes, plants = pd.factorize(cat["plant_name"])
+    present = scada_wide[cat["raw_column_name"].tolist()].notna().to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    plant_idx, row_idx = np.nonzero(np.logical_or.reduceat(present, starts, axis=1).T)
+    return pd.DataFrame({"plant_name": plants.to_numpy()[plant_idx], "ts": ts.iloc[row_idx].reset_index(drop=True)})
+
+def _same_as_previous(a: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(a), dtype=bool)
+    out[1:] = a[1:] == a[:-1]
+    return out
+
+def audit_timestamps(pairs: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Time-index audit of (plant_name, ts) rows for all plants in one sorted pass.
+    Returns:
+      summary: min/max ts, duplicate fraction, median cadence, counts per plant
+      cadence: histogram of consecutive-timestamp spacing (minutes) per plant
+      gaps: spacings longer than 1.5x the plant's median cadence
+      dst_anomalies: duplicates/gaps on local UTC-offset change days, plus NaT counts
+    """
+    nat = pairs["ts"].isna()
+    n_nat = nat.groupby(pairs["plant_name"]).sum()
+    p = pairs[~nat].sort_values(["plant_name", "ts"], kind="stable").reset_index(drop=True)
+
+    plant = p["plant_name"].to_numpy()
+    t = pd.DatetimeIndex(p["ts"]).as_unit("ns")
+    t_ns = t.asi8
+    same_plant = _same_as_previous(plant)
+    dup = same_plant & _same_as_previous(t_ns)
+
+    u = p[~dup].reset_index(drop=True)
+    u_plant = plant[~dup]
+    u_ns = t_ns[~dup]
+    dt_min = np.full(len(u_ns), np.nan)
+    dt_min[1:] = np.diff(u_ns) / 6e10
+    dt_min[~_same_as_previous(u_plant)] = np.nan
+    u["dt_min"] = dt_min
+
+    by = u.groupby("plant_name")
+    summary = pd.DataFrame({
+        "min_ts": by["ts"].min(),
+        "max_ts": by["ts"].max(),
+        "dup_frac": pd.Series(dup).groupby(plant).mean(),
+        "median_dt_min": by["dt_min"].median(),
+        "n": pd.Series(plant).value_counts(),
+        "n_unique": by.size(),
+    })
+    summary["n_nat"] = n_nat.reindex(summary.index).fillna(0).astype(int)
+    summary.index.name = "plant_name"
+
+    cadence = u.dropna(subset=["dt_min"]).groupby(["plant_name", "dt_min"]).size().rename("count").reset_index()
+
+    med = u["plant_name"].map(summary["median_dt_min"]).to_numpy(dtype=float)
+    is_gap = dt_min > 1.5 * med
+    gi = np.flatnonzero(is_gap)
+    gaps = pd.DataFrame({
+        "plant_name": u_plant[gi],
+        "gap_start": u["ts"].iloc[gi - 1].reset_index(drop=True),
+        "gap_end": u["ts"].iloc[gi].reset_index(drop=True),
+        "gap_minutes": dt_min[gi],
+        "missing_steps": np.round(dt_min[gi] / med[gi]).astype(int) - 1,
+    })
+    summary["n_gaps"] = gaps.groupby("plant_name").size().reindex(summary.index).fillna(0).astype(int)
+
+    dst = pd.DataFrame(columns=["plant_name", "ts", "kind"])
+    if t.tz is not None and len(t):
+        local = t.tz_localize(None)
+        offset = (local - t.tz_convert("UTC").tz_localize(None)).asi8
+        change = same_plant & ~_same_as_previous(offset)
+        days = pd.DataFrame({"plant_name": plant[change], "day": local[change].normalize()}).drop_duplicates()
+        ev_ts = t[dup].append(pd.DatetimeIndex(gaps["gap_start"]).as_unit("ns"))
+        ev = pd.DataFrame({
+            "plant_name": np.r_[plant[dup], gaps["plant_name"].to_numpy()],
+            "ts": ev_ts,
+            "kind": ["duplicate"] * int(dup.sum()) + ["gap"] * len(gaps),
+            "day": ev_ts.tz_localize(None).normalize(),
         })
-    return pd.DataFrame(rows)
+        dst = ev.merge(days, on=["plant_name", "day"])[["plant_name", "ts", "kind"]]
+    nat_rows = n_nat[n_nat > 0]
+    if len(nat_rows):
+        dst = pd.concat([dst, pd.DataFrame({"plant_name": nat_rows.index, "ts": pd.NaT, "kind": "nat",
+                                            "count": nat_rows.to_numpy()})], ignore_index=True)
+
+    return {"summary": summary.reset_index(), "cadence": cadence, "gaps": gaps, "dst_anomalies": dst}
+
+def time_index_audit_wide(
+    scada_wide: pd.DataFrame, signal_catalog: pd.DataFrame, cfg: Config
+) -> Dict[str, pd.DataFrame]:
+    """Audit straight from the wide export (one timestamp per row, not per melted signal)."""
+    return audit_timestamps(plant_timestamps(scada_wide, signal_catalog, cfg.timestamp_col))
+
+def compute_time_index_audit(scada_long: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-plant summary from the long table. Statistics use unique (plant, ts) pairs;
+    dup_frac counts repeated (plant, raw column, ts) rows, i.e. duplicates in the export
+    rather than the per-signal repetition introduced by the melt.
+    """
+    keys = ["plant_name", "raw_column_name", "ts"] if "raw_column_name" in scada_long.columns else ["plant_name", "ts"]
+    sub = scada_long.dropna(subset=["plant_name", "ts"])
+    dup = sub.duplicated(keys)
+    pairs = sub.loc[~dup, ["plant_name", "ts"]].drop_duplicates()
+    summary = audit_timestamps(pairs)["summary"].set_index("plant_name")
+    summary["dup_frac"] = dup.groupby(sub["plant_name"]).mean()
+    summary["n"] = sub["plant_name"].value_counts()
+    return summary.reset_index()[["plant_name", "min_ts", "max_ts", "dup_frac", "median_dt_min", "n",
+                                  "n_unique", "n_gaps"]]
 
 def resample_signals(scada_long: pd.DataFrame, cfg: Config) -> pd.DataFrame:
     """
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pv_fleet_health.config import Config
+from pv_fleet_health.paths import Paths
+
+
+@pytest.fixture
+def cfg() -> Config:
+    return Config(scada_path="scada.csv", events_path="events.csv")
+
+
+@pytest.fixture
+def paths(tmp_path) -> Paths:
+    p = Paths(tmp_path)
+    p.ensure()
+    return p
+
+
+@pytest.fixture
+def rng() -> np.random.Generator:
+    return np.random.default_rng(0)
+
+
+def plant_frame(days: int = 30, freq: str = "15min", seed: int = 0, tz: str = "Europe/Athens") -> pd.DataFrame:
+    """Synthetic labeled plant frame (clear-sky-ish POA, linear power, a curtailment block)."""
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2024-03-01", periods=days * int(pd.Timedelta("1D") / pd.Timedelta(freq)), freq=freq, tz=tz)
+    hour = idx.hour + idx.minute / 60
+    poa = np.clip(1000 * np.sin(np.pi * (hour - 6) / 12), 0, None) * rng.uniform(0.7, 1.0, len(idx))
+    tmod = 10 + 0.03 * poa + rng.normal(0, 1, len(idx))
+    p_ac = 0.8 * poa * (1 - 0.004 * (tmod - 25)) + rng.normal(0, 5, len(idx))
+    label = np.where((idx.day == 10) & (hour >= 11) & (hour < 14), "curtailment", "normal")
+    return pd.DataFrame(
+        {"poa_wm2": poa, "tmod_c": tmod, "p_ac_kw": p_ac, "event_label": label}, index=idx
+    ).rename_axis("ts")
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dataclasses import replace
+from conftest import plant_frame
+from pv_fleet_health.context import EXTRINSIC_LABELS, PlantContext, build_features, plant_context
+
+
+@pytest.fixture
+def df():
+    d = plant_frame(days=5)
+    d.loc[d.index[::7], "tmod_c"] = np.nan
+    d.loc[d.index[::50], "event_label"] = None
+    return d
+
+
+def test_masks_match_direct_computation(df, cfg):
+    ctx = PlantContext(df, cfg)
+    intrinsic = ~df["event_label"].isin(EXTRINSIC_LABELS)
+    daylight = df["poa_wm2"] >= cfg.poa_for_kpi_min_wm2
+    pd.testing.assert_series_equal(ctx.intrinsic, intrinsic, check_names=False)
+    pd.testing.assert_series_equal(ctx.daylight(), daylight, check_names=False)
+    model = intrinsic & daylight & df[["p_ac_kw", "poa_wm2", "tmod_c"]].notna().all(axis=1)
+    pd.testing.assert_series_equal(ctx.model_mask, model, check_names=False)
+    perf = intrinsic & daylight & df[["p_ac_kw", "poa_wm2"]].notna().all(axis=1)
+    pd.testing.assert_series_equal(ctx.perf_mask, perf, check_names=False)
+    pd.testing.assert_frame_equal(ctx.features, build_features(df))
+    assert all(b.dtype == np.uint8 and len(b) == (len(df) + 7) // 8 for b in ctx._bits.values())
+
+
+def test_window_slices_cached_masks(df, cfg):
+    ctx = PlantContext(df, cfg)
+    warm_mask, warm_features = ctx.model_mask, ctx.features
+    assert ("model", cfg.poa_for_kpi_min_wm2) in ctx._bits and len(warm_features) == len(warm_mask)
+    start, end = df.index[100], df.index[300]
+    win = ctx.window(start, end)
+    sub = df[(df.index >= start) & (df.index < end)]
+    assert len(win) == len(sub) == 200
+    pd.testing.assert_series_equal(win.model_mask, PlantContext(sub, cfg).model_mask)
+    pd.testing.assert_frame_equal(win.features, build_features(sub))
+
+
+def test_plant_context_validates_the_frame(df, cfg):
+    ctx = PlantContext(df, cfg)
+    assert plant_context(df, cfg, ctx) is ctx
+    # same index, extra columns (e.g. after assign) is fine
+    assert plant_context(df.assign(x=1.0), cfg, ctx) is ctx
+    with pytest.raises(ValueError, match="rows"):
+        plant_context(df.iloc[:-1], cfg, ctx)
+    shifted = df.set_axis(df.index + pd.Timedelta(days=5))
+    with pytest.raises(ValueError, match="index"):
+        plant_context(shifted, cfg, ctx)
+
+
+def test_other_config_shares_threshold_keyed_cache(df, cfg):
+    ctx = PlantContext(df, cfg)
+    assert ctx.model_mask.any() and ("model", cfg.poa_for_kpi_min_wm2) in ctx._bits
+    other = plant_context(df, replace(cfg, poa_for_kpi_min_wm2=400.0), ctx)
+    assert other is not ctx and other._bits is ctx._bits
+    pd.testing.assert_series_equal(
+        other.model_mask, PlantContext(df, replace(cfg, poa_for_kpi_min_wm2=400.0)).model_mask
+    )
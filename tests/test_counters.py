@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from pv_fleet_health.plant import aggregate_counter_intervals, counter_intervals
+
+
+def _counter(component, values, signal="energy_kwh_counter"):
+    ts = pd.date_range("2024-05-01 10:00", periods=len(values), freq="5min", tz="Europe/Athens")
+    return pd.DataFrame({"plant_name": "P1", "component_type": "inverter", "component_id": component,
+                         "canonical_signal": signal, "ts": ts, "value_rs": values})
+
+
+def test_diff_bridge_reset_and_long_gap(cfg):
+    rs = pd.concat([
+        _counter("A", [0.0, 1.0, 2.0, np.nan, 4.0, 5.0, 0.5, 1.5]),
+        _counter("B", [10.0, np.nan, np.nan, np.nan, np.nan, 15.0, 16.0, 17.0]),
+        _counter("X", [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0], signal="ac_power_kw"),
+    ], ignore_index=True).sample(frac=1.0, random_state=0)  # input order does not matter
+    out = counter_intervals(rs, cfg)
+    a = out[out["component_id"] == "A"].reset_index(drop=True)
+    b = out[out["component_id"] == "B"].reset_index(drop=True)
+    assert set(out["component_id"]) == {"A", "B"}
+    # 2 kWh across one missing 5-min step (gap within max_interp_gap_minutes) is spread evenly
+    np.testing.assert_allclose(a["e_kwh"], [np.nan, 1, 1, 1, 1, 1, np.nan, 1])
+    assert list(a["counter_reset"]) == [False] * 6 + [True, False]
+    # 25 minutes without readings is longer than 15: not bridged
+    np.testing.assert_allclose(b["e_kwh"], [np.nan] * 6 + [1, 1])
+
+
+def test_aggregate_prefers_the_most_complete_counter(cfg):
+    rs = pd.concat([
+        _counter("A", [0.0, 1.0, 2.0, 3.0]),
+        _counter("A", [0.0, np.nan, np.nan, np.nan], signal="energy_kwh_counter_measured"),
+        _counter("B", [5.0, 7.0, 9.0, 11.0]),
+    ], ignore_index=True)
+    agg = aggregate_counter_intervals(counter_intervals(rs, cfg))
+    np.testing.assert_allclose(agg["e_kwh"], [np.nan, 3.0, 3.0, 3.0])
+
+
+def test_no_counters(cfg):
+    rs = _counter("A", [1.0, 2.0], signal="ac_power_kw")
+    assert counter_intervals(rs, cfg).empty
+    assert aggregate_counter_intervals(counter_intervals(rs, cfg)).empty
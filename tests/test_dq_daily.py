@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pv_fleet_health.dq import (
+    dq_daily_plant,
+    dq_daily_signals,
+    dq_report_fleet,
+    dq_report_from_daily,
+    dq_score_plant,
+    stuck_sensor_fraction,
+)
+from pv_fleet_health.plant import counter_intervals
+
+TZ = "Europe/Athens"
+
+
+def _rs(plant: str, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2024-05-01", periods=4 * 288, freq="5min", tz=TZ)
+    n = len(ts)
+    hour = np.asarray(ts.hour + ts.minute / 60)
+    poa = np.clip(1000 * np.sin(np.pi * (hour - 6) / 12), 0, None) + rng.uniform(1, 5, n)
+    poa[400:440] = 321.0          # stuck sensor
+    poa[600:605] = 2000.0         # out of bounds
+    poa[rng.random(n) < 0.03] = np.nan
+    tmod = 10 + 0.03 * np.nan_to_num(poa) + rng.normal(0, 1, n)
+    power = 0.8 * np.nan_to_num(poa)
+    power[800:850] = np.nan
+    counter = np.cumsum(power) / 12
+    counter[700:] -= counter[700]  # a reset
+    signals = {("sensor", "1", "poa_irradiance_wm2"): poa, ("sensor", "1", "tmod_c"): tmod,
+               ("inverter", "1", "ac_power_kw"): power / 2, ("inverter", "2", "ac_power_kw"): power / 2,
+               ("inverter", "1", "energy_kwh_counter"): counter,
+               ("inverter", "1", "pf"): np.where(rng.random(n) < 0.01, 1.5, 0.99)}
+    return pd.concat([
+        pd.DataFrame({"ts": ts, "value_rs": v, "plant_name": plant, "component_type": ct, "component_id": cid,
+                      "canonical_signal": sig})
+        for (ct, cid, sig), v in signals.items()
+    ], ignore_index=True)
+
+
+@pytest.fixture
+def rs():
+    return pd.concat([_rs("P1", 0), _rs("P2", 1)], ignore_index=True)
+
+
+def test_series_counts_match_direct_computation(rs, cfg):
+    daily = dq_daily_signals(rs, cfg)
+    poa = daily[(daily["plant_name"] == "P1") & (daily["canonical_signal"] == "poa_irradiance_wm2")]
+    raw = rs[(rs["plant_name"] == "P1") & (rs["canonical_signal"] == "poa_irradiance_wm2")]
+    assert poa["n_rows"].tolist() == [288] * 4
+    assert poa["n_valid"].sum() == raw["value_rs"].notna().sum()
+    assert poa["n_oob"].sum() == 5
+    v = raw["value_rs"].dropna()
+    assert poa["n_stuck"].sum() == (v.rolling(12).std() <= 1e-6).sum()
+    counter = daily[(daily["plant_name"] == "P1") & (daily["canonical_signal"] == "energy_kwh_counter")]
+    assert counter["n_counter_resets"].sum() == 1
+    assert daily.loc[daily["canonical_signal"] == "tmod_c", "counter_reset_frac"].isna().all()
+
+
+def test_plant_report_matches_per_plant_scoring(rs, cfg):
+    report = dq_report_fleet(rs, cfg).set_index("plant_name")
+    for plant in ["P1", "P2"]:
+        one = dq_score_plant(rs, cfg, plant)
+        assert one["dq_score"] == pytest.approx(report.loc[plant, "dq_score"])
+        sub = rs[rs["plant_name"] == plant]
+        poa = sub[sub["canonical_signal"] == "poa_irradiance_wm2"].set_index("ts")["value_rs"]
+        assert one["poa_stuck_frac"] == pytest.approx(stuck_sensor_fraction(poa))
+        assert one["poa_oob_frac"] == pytest.approx(((poa < 0) | (poa > 1400)).mean())
+        counters = sub[sub["canonical_signal"] == "energy_kwh_counter"]
+        resets = counter_intervals(counters, cfg)["counter_reset"].sum()
+        assert one["counter_reset_frac"] == pytest.approx(resets / counters["value_rs"].notna().sum())
+
+
+def test_period_report_from_filtered_days(rs, cfg):
+    daily = dq_daily_plant(rs, cfg)
+    assert len(daily) == 8 and set(daily["n_rows"]) == {288}
+    cut = pd.Timestamp("2024-05-03", tz=TZ)
+    period = dq_report_from_daily(daily[daily["date"] >= cut]).set_index("plant_name")
+    direct = dq_report_fleet(rs[rs["ts"] >= cut], cfg).set_index("plant_name")
+    pd.testing.assert_frame_equal(period, direct)
+    empty = dq_report_from_daily(daily, plants=["P1", "P2", "P3"]).set_index("plant_name")
+    assert empty.loc["P3", "poa_missing_frac_day":"counter_reset_frac"].isna().all()
@@ -0,0 +1,94 @@
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+import pytest
+from pv_fleet_health.dq import dq_report_fleet
+from pv_fleet_health.scada_headers import build_signal_catalog
+from pv_fleet_health.scada_reshape import wide_to_long
+from pv_fleet_health.timebase import compute_time_index_audit, resample_signals
+
+duckdb_backend = pytest.importorskip("pv_fleet_health.duckdb_backend")
+if not duckdb_backend.DUCKDB_AVAILABLE:
+    pytest.skip("duckdb is not installed", allow_module_level=True)
+
+RS_ORDER = ["plant_name", "component_type", "component_id", "canonical_signal", "unit", "ts"]
+
+
+def _long(plant: str, freq: str, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2024-03-30", "2024-04-01 23:59", freq=freq, tz="Europe/Athens")  # spans the DST switch
+    n = len(ts)
+    hour = np.asarray(ts.hour + ts.minute / 60)
+    poa = np.clip(1000 * np.sin(np.pi * (hour - 6) / 12), 0, None) + rng.uniform(0, 5, n)
+    power = 0.8 * poa + rng.normal(0, 3, n)
+    power[rng.random(n) < 0.05] = np.nan
+    counter = np.cumsum(np.nan_to_num(power)) / 12
+    counter[n // 2:] -= counter[n // 2]  # a counter reset
+    wide = pd.DataFrame({
+        "Timestamp": ts,
+        f"[{plant}] Inverter 1 AC power (kW)": power,
+        f"[{plant}] Inverter 1 Cumulative energy (kWh)": counter,
+        f"[{plant}] Total Irradiance (W*m^-2)": poa,
+        f"[{plant}] Module Temperature (C)": 10 + 0.03 * poa + rng.normal(0, 1, n),
+    })
+    wide = pd.concat([wide.drop(wide.index[40:60]), wide.iloc[[70, 71]]])  # a gap and export duplicates
+    return wide_to_long(wide, build_signal_catalog(wide.columns.tolist(), "Timestamp"), "Timestamp")
+
+
+@pytest.fixture
+def sql_cfg(cfg):
+    return replace(cfg, standard_freq="15min")
+
+
+@pytest.fixture
+def long_path(tmp_path):
+    long = pd.concat([_long("P1", "5min", 0), _long("P2", "15min", 1)], ignore_index=True)
+    path = tmp_path / "long.parquet"
+    long.to_parquet(path, index=False)
+    return long, str(path)
+
+
+def _sorted(df, cols):
+    return df.sort_values(cols).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("freq", ["15min", "3h", "5h", "1D"])
+def test_resample_matches_pandas(long_path, sql_cfg, freq):
+    long, path = long_path
+    c = replace(sql_cfg, standard_freq=freq)
+    expected = _sorted(resample_signals(long, c), RS_ORDER)
+    got = _sorted(duckdb_backend.resample_signals_sql(path, c), RS_ORDER)
+    pd.testing.assert_frame_equal(got[expected.columns], expected, check_dtype=False, check_exact=False)
+
+
+def test_resample_naive_timestamps_and_calendar_freqs(long_path, sql_cfg, tmp_path):
+    long, _ = long_path
+    naive = long.assign(ts=long["ts"].dt.tz_localize(None))
+    path = tmp_path / "naive.parquet"
+    naive.to_parquet(path, index=False)
+    c = replace(sql_cfg, standard_freq="3h")
+    expected = _sorted(resample_signals(naive, c), RS_ORDER)
+    got = _sorted(duckdb_backend.resample_signals_sql(str(path), c), RS_ORDER)
+    pd.testing.assert_frame_equal(got[expected.columns], expected, check_dtype=False, check_exact=False)
+    with pytest.raises(ValueError):
+        duckdb_backend.resample_signals_sql(str(path), replace(sql_cfg, standard_freq="W-MON"))
+
+
+def test_dq_report_matches_pandas(long_path, sql_cfg, tmp_path):
+    long, _ = long_path
+    rs = resample_signals(long, sql_cfg)
+    rs_path = tmp_path / "rs.parquet"
+    rs.to_parquet(rs_path, index=False)
+    expected = _sorted(dq_report_fleet(rs, sql_cfg), ["plant_name"])
+    got = _sorted(duckdb_backend.dq_report_fleet_sql(str(rs_path), sql_cfg, con=duckdb_backend.connect(threads=2)),
+                  ["plant_name"])
+    pd.testing.assert_frame_equal(got[expected.columns], expected, check_dtype=False)
+    assert (got["counter_reset_frac"] > 0).all()
+
+
+def test_time_audit_matches_pandas(long_path):
+    long, path = long_path
+    expected = _sorted(compute_time_index_audit(long), ["plant_name"])
+    got = _sorted(duckdb_backend.time_index_audit_sql([path]), ["plant_name"])
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+    assert (got["dup_frac"] > 0).all() and (got["n_gaps"] >= 1).all()
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pv_fleet_health.config import Config
+from pv_fleet_health.event_store import EventStore, category_counts
+from pv_fleet_health.events import join_events_to_timeseries, merge_overlapping_events
+from pv_fleet_health.loss_index import attribute_event_losses, build_loss_index
+from pv_fleet_health.pipeline import Stage, _event_store, run_pipeline
+
+TZ = "Europe/Athens"
+
+
+def _events(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-01-01", tz=TZ) + pd.to_timedelta(rng.integers(0, 60 * 24 * 90, n), unit="min")
+    return pd.DataFrame({
+        "plant_name": rng.choice(["P1", "P2"], n),
+        "start_ts": start,
+        "end_ts": start + pd.to_timedelta(rng.integers(0, 600, n), unit="min"),
+        "Severity": "Major",
+        "category": rng.choice(["inverter_fault", "grid_outage", "comms_data"], n),
+        "Description": [f"alarm {i}" for i in range(n)],
+        "State": "Cleared",
+        "Ack": None,
+        "Source": rng.choice(["INV1", "INV2"], n),
+    })
+
+
+def _merged_reference(ev: pd.DataFrame, plant: str) -> pd.DataFrame:
+    m = merge_overlapping_events(ev)
+    m = m[m["plant_name"] == plant].sort_values(["start_ts", "category"])
+    return m.reset_index(drop=True)[["plant_name", "category", "start_ts", "end_ts"]]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EventStore(tmp_path / "events.sqlite")
+
+
+def test_batched_appends_match_full_merge(store):
+    batches = [_events(400, seed) for seed in range(4)]
+    for b in batches:
+        store.append(b)
+    ev = pd.concat(batches, ignore_index=True)
+    t0, t1 = pd.Timestamp("2023-12-01", tz=TZ), pd.Timestamp("2024-06-01", tz=TZ)
+    for plant in ["P1", "P2"]:
+        got = store.query(plant, t0, t1, merged=True).sort_values(["start_ts", "category"]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(got, _merged_reference(ev, plant), check_dtype=False)
+
+
+def test_bridging_event_joins_stored_intervals(store):
+    ev = _events(1, 0).assign(plant_name="P1", category="inverter_fault")
+    t = pd.Timestamp("2024-02-01 10:00", tz=TZ)
+    first = pd.concat([ev.assign(start_ts=t, end_ts=t + pd.Timedelta("1h"), Description="a"),
+                       ev.assign(start_ts=t + pd.Timedelta("3h"), end_ts=t + pd.Timedelta("4h"), Description="b")])
+    store.append(first)
+    assert len(store.query("P1", t, t + pd.Timedelta("1D"), merged=True)) == 2
+    store.append(ev.assign(start_ts=t + pd.Timedelta("1h"), end_ts=t + pd.Timedelta("3h"), Description="c"))
+    merged = store.query("P1", t, t + pd.Timedelta("1D"), merged=True)
+    assert len(merged) == 1
+    assert merged.loc[0, "start_ts"] == t and merged.loc[0, "end_ts"] == t + pd.Timedelta("4h")
+
+
+def test_dedupe_and_window_query(store):
+    ev = _events(300, 7)
+    assert store.append(ev) == len(ev.drop_duplicates(["plant_name", "category", "start_ts", "end_ts",
+                                                       "Source", "Description"]))
+    assert store.append(ev) == 0
+    t0, t1 = pd.Timestamp("2024-02-01", tz=TZ), pd.Timestamp("2024-02-10", tz=TZ)
+    got = store.query("P1", t0.tz_localize(None), t1.tz_localize(None), categories=["grid_outage"])
+    want = ev[(ev["plant_name"] == "P1") & (ev["category"] == "grid_outage")
+              & (ev["start_ts"] <= t1) & (ev["end_ts"] >= t0)]
+    assert sorted(got["Description"]) == sorted(want["Description"])
+    assert str(got["start_ts"].dt.tz) == TZ
+    counts = category_counts(store, "P1", t0, t1)
+    assert counts["grid_outage"] == len(want)
+    assert store.plants() == ["P1", "P2"] and store.query("P9", t0, t1).empty
+
+
+def test_per_plant_consumers_read_the_store(tmp_path):
+    ev = _events(300, 3)
+    store = EventStore(tmp_path / "events.sqlite")
+    store.append(ev)
+    idx = pd.date_range("2024-02-01", "2024-02-10", freq="15min", tz=TZ)
+    plant_df = pd.DataFrame({"p_ac_kw": np.ones(len(idx))}, index=idx)
+    from_store = join_events_to_timeseries(plant_df, store, "P1")
+    from_frame = join_events_to_timeseries(plant_df, ev, "P1")
+    pd.testing.assert_series_equal(from_store["event_label"], from_frame["event_label"])
+    assert (from_store["event_label"] != "none").any()
+
+    pts = plant_df.assign(p_expected_kw=2.0, poa_wm2=500.0, event_label=from_frame["event_label"])
+    ix = build_loss_index(pts, Config(scada_path="s", events_path="e", standard_freq="15min"), "P1")
+    got = attribute_event_losses(ix, store).sort_values(["start_ts", "category"]).reset_index(drop=True)
+    merged = merge_overlapping_events(ev)
+    merged = merged[(merged["start_ts"] <= idx[-1]) & (merged["end_ts"] >= idx[0])]
+    exp = attribute_event_losses(ix, merged).sort_values(["start_ts", "category"]).reset_index(drop=True)
+    np.testing.assert_allclose(got["loss_category_kwh"], exp["loss_category_kwh"])
+
+
+def test_pipeline_stage_appends_events(cfg, paths, tmp_path):
+    ev = _events(50, 4)
+    frames = {"events_norm": ev}
+    stages = [Stage("events_norm", lambda cfg: frames["events_norm"]),
+              Stage("event_store", _event_store, deps=("events_norm",), uses_paths=True)]
+    out, _ = run_pipeline(cfg, paths, stages=stages)
+    assert out["event_store"]["n_new_events"].iloc[0] == 50
+    store = EventStore(paths.event_store_path)
+    assert sorted(store.plants()) == sorted(ev["plant_name"].unique())
+    assert len(store.query("P1", ev["start_ts"].min(), ev["end_ts"].max())) == (ev["plant_name"] == "P1").sum()
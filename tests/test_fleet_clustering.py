@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from pv_fleet_health.fleet import (
+    CLUSTER_FEATURES, _cluster_matrix, fleet_clustering_incremental, load_cluster_state, save_cluster_state,
+)
+
+
+def _scorecard(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, len(CLUSTER_FEATURES))), columns=CLUSTER_FEATURES)
+    return df.assign(plant_name=[f"P{i}" for i in range(n)])
+
+
+def test_stable_fleet_is_updated_incrementally(tmp_path, cfg):
+    sc = _scorecard(40)
+    path = str(tmp_path / "clusters.json")
+    _, first = fleet_clustering_incremental(sc, cfg, k=3, state_path=path)
+    assert first["refit"]
+    out, second = fleet_clustering_incremental(sc, cfg, k=3, state_path=path)
+    assert not second["refit"]
+    assert out["cluster"].between(0, 2).all() and len(out) == 40
+
+
+def test_drift_triggers_refit(tmp_path, cfg):
+    path = str(tmp_path / "clusters.json")
+    fleet_clustering_incremental(_scorecard(40), cfg, k=3, state_path=path)
+    moved = _scorecard(40).assign(**{c: lambda d, c=c: d[c] * 5 for c in CLUSTER_FEATURES})
+    assert fleet_clustering_incremental(moved, cfg, k=3, state_path=path)[1]["refit"]
+
+
+def test_zero_error_reference_still_detects_change(tmp_path, cfg):
+    path = str(tmp_path / "clusters.json")
+    sc = _scorecard(3)
+    fleet_clustering_incremental(sc, cfg, k=3, state_path=path)
+    # one centroid per plant: the reference fit has zero error
+    state = load_cluster_state(path)
+    save_cluster_state({**state, "centroids": _cluster_matrix(sc, state).tolist(), "ref_mse": 0.0}, path)
+    assert not fleet_clustering_incremental(sc, cfg, k=3, state_path=path)[1]["refit"]
+    sc.loc[0, CLUSTER_FEATURES] += 3.0
+    assert fleet_clustering_incremental(sc, cfg, k=3, state_path=path)[1]["refit"]
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from pv_fleet_health.fleet import build_action_plan, build_fleet_scorecard
+
+
+def _cards(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    months = pd.date_range("2023-01-01", periods=18, freq="MS", tz="Europe/Athens")
+    days = pd.date_range("2024-03-01", periods=120, freq="D", tz="Europe/Athens")
+    cards = {}
+    for i in range(n):
+        loss = rng.normal(20, 10, len(days))
+        cards[f"P{i}"] = {
+            "ok": i % 7 != 3,
+            "monthly": pd.DataFrame({"perf_index_median": rng.normal(1.0, 0.05, len(months))}, index=months),
+            "losses_daily": pd.DataFrame({"loss_kwh": loss, "loss_unexplained": np.clip(loss, 0, None) * 0.4}, index=days),
+        }
+    cards["P0"]["losses_daily"]["loss_kwh"] = 0.0  # no total loss: unexplained fraction undefined
+    return cards
+
+
+def _reference(cards, dq, plr):
+    """Plant-by-plant scorecard, as built before the vectorized version."""
+    rows = []
+    for plant, card in cards.items():
+        if not card.get("ok"):
+            continue
+        last90 = card["losses_daily"].tail(90)
+        total, unexp = last90["loss_kwh"].sum(), last90["loss_unexplained"].sum()
+        d = dq[dq["plant_name"] == plant]
+        p = plr[plr["plant_name"] == plant]
+        rows.append({
+            "plant_name": plant,
+            "perf_index_12m_median": card["monthly"].tail(12)["perf_index_median"].median(),
+            "dq_score": float(d["dq_score"].iloc[0]) if len(d) else np.nan,
+            "monitoring_confidence": d["monitoring_confidence"].iloc[0] if len(d) else None,
+            "unexplained_loss_frac_90d": unexp / total if total > 0 else np.nan,
+            "plr_pct_per_year": float(p["plr_pct_per_year"].iloc[0]) if len(p) and p["ok"].iloc[0] else np.nan,
+        })
+    return pd.DataFrame(rows)
+
+
+def test_scorecard_matches_per_plant_reference():
+    cards = _cards(30)
+    plants = list(cards)
+    rng = np.random.default_rng(1)
+    dq = pd.DataFrame({"plant_name": plants[:-2], "dq_score": rng.uniform(0.5, 1.0, 28),
+                       "monitoring_confidence": rng.choice(["high", "low"], 28)})
+    plr = pd.DataFrame({"plant_name": plants, "plr_pct_per_year": rng.normal(-0.7, 0.8, 30),
+                        "ok": rng.random(30) > 0.2})
+    score = build_fleet_scorecard(cards, dq, plr)
+    ref = _reference(cards, dq, plr)
+    pd.testing.assert_frame_equal(score[ref.columns], ref, check_dtype=False)
+    assert score["perf_rank_pct"].between(0, 1).all()
+
+
+def test_action_plan_rules():
+    score = pd.DataFrame({
+        "plant_name": ["A", "B", "C"],
+        "perf_index_12m_median": [0.9, 1.0, 1.1],
+        "dq_score": [0.6, 0.9, 0.95],
+        "monitoring_confidence": ["low", "high", "high"],
+        "unexplained_loss_frac_90d": [0.2, 0.7, np.nan],
+        "plr_pct_per_year": [-0.5, -1.5, np.nan],
+    })
+    for col, asc in [("perf_index_12m_median", True), ("dq_score", True), ("plr_pct_per_year", False)]:
+        score[col.split("_")[0] + "_rank_pct"] = score[col].rank(pct=True, ascending=asc)
+    score["unexplained_loss_rank_pct"] = 1.0 - score["unexplained_loss_frac_90d"].rank(pct=True)
+    plan = build_action_plan(score).set_index("plant_name")
+    assert plan.loc["A", "recommended_actions"].startswith("Fix monitoring")
+    assert "Investigate intrinsic" in plan.loc["A", "recommended_actions"]
+    assert "Degradation deep dive" in plan.loc["B", "recommended_actions"]
+    assert "Improve event tagging" in plan.loc["B", "recommended_actions"]
+    assert plan.loc["C", "recommended_actions"] == "Monitor."
+    assert plan["priority_score"].is_monotonic_decreasing
@@ -0,0 +1,68 @@
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from pv_fleet_health.health_card import (
+    HEALTH_CARD_VERSION, CARD_FILE, HealthCard, card_dir, compact_health_cards, load_health_card,
+    load_health_cards,
+)
+
+
+def _card(with_mask: bool = True) -> dict:
+    idx = pd.date_range("2024-01-01", periods=500, freq="15min", tz="Europe/Athens")
+    days = pd.date_range("2024-01-01", periods=6, freq="D", tz="Europe/Athens")
+    card = {
+        "ok": True,
+        "ts": pd.DataFrame({"p_ac_kw": np.arange(500.0)}, index=idx).rename_axis("ts"),
+        "daily": pd.DataFrame({"energy_kwh": np.arange(6.0)}, index=days),
+        "peer_flags": pd.DataFrame({"component": ["INV1"]}),
+        "n_components": 3,
+    }
+    if with_mask:
+        card["model"] = {"ok": False, "reason": "not enough points", "mask": pd.Series(idx.hour >= 12, index=idx)}
+    return card
+
+
+@pytest.mark.parametrize("spilled", [False, True])
+def test_model_mask_absent_is_none(tmp_path, spilled):
+    hc = HealthCard.from_dict("P1", _card(with_mask=False), spill_dir=tmp_path if spilled else None)
+    assert hc.model_mask is None
+    assert hc.ts_columns() == ["p_ac_kw"]
+
+
+def test_spilled_card_roundtrip(tmp_path):
+    hc = HealthCard.from_dict("P1", _card(), spill_dir=tmp_path / "spill")
+    assert hc._ts is None
+    assert hc.model_mask.sum() == (hc.ts.index.hour >= 12).sum()
+    hc.release()
+    assert len(pickle.dumps(hc)) < 20_000
+
+    hc.save(card_dir(tmp_path, "P1"))
+    back = load_health_card(card_dir(tmp_path, "P1"))
+    assert back["n_components"] == 3 and back.get("missing", "x") == "x"
+    pd.testing.assert_frame_equal(back["daily"], hc["daily"], check_freq=False)
+    pd.testing.assert_frame_equal(back["peer_flags"].reset_index(drop=True), hc["peer_flags"])
+    pd.testing.assert_series_equal(back.model_mask, hc.model_mask)
+    assert back["ts"].index.name == "ts"
+
+
+def test_version_check(tmp_path):
+    compact_health_cards({"P1": _card()}, tmp_path)
+    assert set(load_health_cards(tmp_path)) == {"P1"}
+    meta = tmp_path / "P1" / CARD_FILE
+    meta.write_text(meta.read_text().replace(f'"version": {HEALTH_CARD_VERSION}', '"version": 99'))
+    with pytest.raises(ValueError, match="version"):
+        load_health_card(tmp_path / "P1")
+
+
+@pytest.mark.parametrize("name", ["..", ".", ""])
+def test_card_dir_rejects_escaping_names(tmp_path, name):
+    with pytest.raises(ValueError):
+        card_dir(tmp_path, name)
+
+
+def test_card_dirs_are_distinct_per_plant_name(tmp_path):
+    names = ["P 1", "P/1", "P_1", "P%201", "..P"]
+    dirs = [card_dir(tmp_path, n) for n in names]
+    assert len(set(dirs)) == len(names)
+    assert all(d.parent == tmp_path for d in dirs)
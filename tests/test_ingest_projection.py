@@ -0,0 +1,34 @@
+from dataclasses import replace
+from pv_fleet_health.io import project_columns
+from pv_fleet_health.mapping import map_raw_signal_to_canonical
+from pv_fleet_health.peers import PEER_SIGNALS
+from pv_fleet_health.plant import KEY_SIGNALS
+
+COLUMNS = [
+    "Timestamp",
+    "[P1] Total Irradiance (W*m^-2)",
+    "[P1] Module Temperature (C)",
+    "[P1] Array 1 Array output power (kW)",
+    "[P1] Array 1 Nominal output power (kWp)",
+    "[P1] Array 1 Cumulative energy (kWh)",
+    "[P1] Array 1 Inverter insulation resistance (Ohm)",
+    "[P2] Array 1 Array output power (kW)",
+]
+
+
+def test_projection_keeps_signals_read_downstream(cfg):
+    for sig in KEY_SIGNALS + PEER_SIGNALS:
+        assert sig in cfg.ingest_signals
+    kept = project_columns(COLUMNS, cfg)
+    assert "[P1] Array 1 Nominal output power (kWp)" in kept
+    assert "[P1] Array 1 Inverter insulation resistance (Ohm)" not in kept
+    assert kept[0] == "Timestamp" and len(kept) == len(COLUMNS) - 1
+
+
+def test_projection_respects_selected_plant(cfg):
+    kept = project_columns(COLUMNS, replace(cfg, selected_plant="P2"))
+    assert kept == ["Timestamp", "[P2] Array 1 Array output power (kW)"]
+
+
+def test_nameplate_header_maps_to_capacity_signal():
+    assert map_raw_signal_to_canonical("Nominal output power", "kWp")[0] == "nameplate_kwp"
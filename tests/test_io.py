@@ -0,0 +1,59 @@
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+import pytest
+from pv_fleet_health.io import load_scada, resolve_input_paths
+
+POWER = "[P1] Array 1 Array output power (kW)"
+POA = "[P1] Total Irradiance (W*m^-2)"
+
+
+def _export() -> pd.DataFrame:
+    # Europe/Athens skips 03:00-04:00 on 2024-03-31: 03:30 shifts forward onto 04:00
+    ts = ["2024-03-31 02:30:00", "2024-03-31 03:30:00", "2024-03-31 04:00:00", "not a date", "2024-03-31 04:30:00"]
+    return pd.DataFrame({"Timestamp": ts, POWER: [1.0, 2.0, np.nan, 9.0, 4.0], POA: [10.0, np.nan, 30.0, 90.0, 50.0]})
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    d = tmp_path / "scada"
+    d.mkdir()
+    _export().to_csv(d / "all.csv", index=False, sep=";")
+    return d
+
+
+def test_single_file_and_glob_give_the_same_frame(cfg, export_dir):
+    single = load_scada(replace(cfg, scada_path=str(export_dir / "all.csv")))
+    globbed = load_scada(replace(cfg, scada_path=str(export_dir / "*.csv")))
+    pd.testing.assert_frame_equal(single, globbed)
+    assert len(single) == 3 and single["Timestamp"].notna().all()
+    row = single[single["Timestamp"] == pd.Timestamp("2024-03-31 04:00", tz="Europe/Athens")].iloc[0]
+    # first non-null value per column among the colliding rows
+    assert row[POWER] == 2.0 and row[POA] == 30.0
+
+
+def test_split_files_are_unioned(cfg, tmp_path):
+    d = tmp_path / "split"
+    d.mkdir()
+    full = _export()
+    full[["Timestamp", POWER]].to_csv(d / "a_power.csv", index=False)
+    full[["Timestamp", POA]].to_parquet(d / "b_poa.parquet", index=False)
+    combined = load_scada(replace(cfg, scada_path=str(d)))
+    single = load_scada(replace(cfg, scada_path=str(_write(tmp_path, full))))
+    pd.testing.assert_frame_equal(combined, single)
+
+
+def _write(tmp_path, df):
+    path = tmp_path / "one.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_resolve_input_paths(tmp_path):
+    (tmp_path / "b.csv").write_text("x")
+    (tmp_path / "a.parquet").write_text("x")
+    (tmp_path / "notes.txt").write_text("x")
+    assert [p.split("/")[-1] for p in resolve_input_paths(str(tmp_path))] == ["a.parquet", "b.csv"]
+    assert resolve_input_paths("plain.csv") == ["plain.csv"]
+    with pytest.raises(FileNotFoundError):
+        resolve_input_paths(str(tmp_path / "*.xlsx"))
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import plant_frame
+from pv_fleet_health.health_card import HealthCard, compact_health_cards, load_health_cards
+from pv_fleet_health.loss_index import (
+    INDEX_COLS, attribute_event_losses, build_loss_index, load_loss_index, save_loss_index,
+)
+from pv_fleet_health.losses import compute_losses, point_losses
+
+
+@pytest.fixture
+def df():
+    d = plant_frame(days=10)
+    d["p_expected_kw"] = 0.8 * d["poa_wm2"]
+    d.loc[d.index[300:340], "event_label"] = "inverter_fault"
+    d.loc[d.index[500:510], "p_ac_kw"] = np.nan
+    return d
+
+
+def test_window_sums_match_brute_force(df, cfg):
+    ix = build_loss_index(df, cfg, "P1")
+    pts = point_losses(df, cfg)[INDEX_COLS]
+    rng = np.random.default_rng(1)
+    t0 = df.index[rng.integers(0, len(df), 50)]
+    t1 = t0 + pd.to_timedelta(rng.integers(0, 3000, 50), unit="min")
+    got = ix.window_sums(t0, t1)
+    want = pd.DataFrame([pts[(pts.index >= a) & (pts.index <= b)].sum() for a, b in zip(t0, t1, strict=True)])
+    np.testing.assert_allclose(got.to_numpy(), want[INDEX_COLS].to_numpy(), atol=1e-9)
+    # naive bounds are read in the index timezone; inverted windows are empty
+    naive = ix.window_sum(t0[0].tz_localize(None), t1[0].tz_localize(None))
+    np.testing.assert_allclose(naive.to_numpy(), got.iloc[0].to_numpy())
+    assert (ix.window_sum(t1[0], t0[0] - pd.Timedelta("1min")) == 0).all()
+
+
+def test_total_matches_daily_losses(df, cfg):
+    ix = build_loss_index(df, cfg)
+    total = ix.window_sum(df.index[0], df.index[-1])
+    daily = compute_losses(df, cfg).sum()
+    np.testing.assert_allclose(total[daily.index].to_numpy(), daily.to_numpy())
+
+
+def test_event_attribution_and_roundtrip(df, cfg, tmp_path):
+    ix = build_loss_index(df, cfg, "P1")
+    ev = pd.DataFrame({
+        "plant_name": ["P1", "P1", "P2"],
+        "category": ["inverter_fault", "curtailment", "inverter_fault"],
+        "start_ts": [df.index[300], df.index[0], df.index[0]],
+        "end_ts": [df.index[339], df.index[-1], df.index[-1]],
+    })
+    out = attribute_event_losses(ix, ev)
+    assert list(out["plant_name"]) == ["P1", "P1"]
+    pts = point_losses(df, cfg)
+    assert out.loc[0, "loss_category_kwh"] == pytest.approx(pts["loss_inverter_fault"].sum())
+    assert out.loc[1, "loss_category_kwh"] == pytest.approx(pts["loss_curtailment"].sum())
+
+    save_loss_index(ix, tmp_path)
+    back = load_loss_index(tmp_path, "P1")
+    np.testing.assert_allclose(back.cum, ix.cum)
+    np.testing.assert_array_equal(back.t_ns, ix.t_ns)
+
+
+def test_health_card_persists_loss_index(df, cfg, tmp_path):
+    cards = compact_health_cards({"P1": {"ok": True, "ts": df}}, tmp_path, cfg)
+    assert (tmp_path / "P1" / "loss_index.parquet").exists()
+    assert cards["P1"]._loss_index is None
+    loaded = load_health_cards(tmp_path)["P1"].loss_index
+    np.testing.assert_allclose(loaded.cum, build_loss_index(df, cfg).cum)
+    # without cfg (or without p_expected_kw) no index is built
+    assert HealthCard.from_dict("P1", {"ts": df}).loss_index is None
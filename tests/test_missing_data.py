@@ -0,0 +1,66 @@
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+from pv_fleet_health.plant import apply_missing_data_policy, missing_data_policy_apply
+
+NAN = np.nan
+
+
+def _series(values, signal, component="1"):
+    ts = pd.date_range("2024-05-01 10:00", periods=len(values), freq="5min", tz="Europe/Athens")
+    return pd.DataFrame({"plant_name": "P1", "component_type": "inverter", "component_id": component,
+                         "canonical_signal": signal, "ts": ts, "value_rs": np.asarray(values, dtype=float)})
+
+
+def test_interp_fills_only_short_interior_gaps(cfg):
+    s = _series([NAN, 0, NAN, NAN, NAN, 40, NAN, NAN, NAN, NAN, 90, NAN], "poa_irradiance_wm2").set_index("ts")
+    out = missing_data_policy_apply(s["value_rs"], cfg, "poa_irradiance_wm2")
+    # 15 min (3 steps) bridged linearly; 20 min, leading and trailing gaps stay NaN
+    np.testing.assert_allclose(out, [NAN, 0, 10, 20, 30, 40, NAN, NAN, NAN, NAN, 90, NAN])
+    untouched = missing_data_policy_apply(s["value_rs"], cfg, "ac_power_kw")
+    pd.testing.assert_series_equal(untouched, s["value_rs"])
+
+
+def test_ffill_covers_short_trailing_gaps(cfg):
+    ff = replace(cfg, allow_ffill_signals=frozenset({"pf"}))
+    s = _series([0.9, NAN, NAN, 0.8, NAN, NAN], "pf").set_index("ts")["value_rs"]
+    np.testing.assert_allclose(missing_data_policy_apply(s, ff, "pf"), [0.9, 0.9, 0.9, 0.8, 0.8, 0.8])
+    long_tail = _series([0.9] + [NAN] * 4, "pf").set_index("ts")["value_rs"]
+    assert missing_data_policy_apply(long_tail, ff, "pf").isna().sum() == 4
+
+
+def test_fleet_policy_keeps_series_apart_and_flags_sparse_keys(cfg):
+    rs = pd.concat([
+        _series([1, 2, NAN, NAN], "tamb_c", component="A"),       # trailing gap: not interpolated from B
+        _series([10, NAN, 30, 40], "tmod_c", component="B"),
+        _series([5, NAN, NAN, NAN, NAN, 5], "ac_power_kw"),     # 67% missing key signal: flagged
+    ], ignore_index=True).sample(frac=1.0, random_state=0)
+    filled, report = apply_missing_data_policy(rs, cfg)
+    b = filled[filled["component_id"] == "B"]
+    np.testing.assert_allclose(b["value_rs"], [10, 20, 30, 40])
+    assert b["fill_method"].tolist() == ["none", "interp", "none", "none"]
+    assert filled[filled["component_id"] == "A"]["value_rs"].isna().sum() == 2
+    assert filled.loc[filled["canonical_signal"] == "ac_power_kw", "series_flagged"].all()
+    assert not filled.loc[filled["canonical_signal"] != "ac_power_kw", "series_flagged"].any()
+    r = report.set_index("component_id")
+    assert r.loc["B", "n_interp"] == 1 and r.loc["A", "n_interp"] == 0
+    assert bool(r.loc["1", "flagged"]) and r.loc["1", "n_missing_before"] == 4
+    dropped, _ = apply_missing_data_policy(rs, cfg, drop=True)
+    assert "ac_power_kw" not in set(dropped["canonical_signal"])
+
+
+def test_night_silence_does_not_count_as_missing(cfg):
+    cfg = replace(cfg, standard_freq="15min")
+    ts = pd.date_range("2024-05-01", periods=10 * 96, freq="15min", tz="Europe/Athens")
+    hour = np.asarray(ts.hour)
+    poa = np.where((hour >= 6) & (hour < 20), 500.0, 0.0)
+    power = np.where((hour >= 6) & (hour < 20), 400.0, np.nan)  # logger silent at night
+    keys = {"plant_name": "P1", "component_type": "inverter", "component_id": "1"}
+    rs = pd.concat([
+        pd.DataFrame({**keys, "canonical_signal": "poa_irradiance_wm2", "ts": ts, "value_rs": poa}),
+        pd.DataFrame({**keys, "canonical_signal": "ac_power_kw", "ts": ts, "value_rs": power}),
+    ], ignore_index=True)
+    filled, report = apply_missing_data_policy(rs, cfg)
+    r = report.set_index("canonical_signal").loc["ac_power_kw"]
+    assert r["n_daylight"] == 10 * 56 and r["missing_frac_after"] == 0.0 and not r["flagged"]
+    assert (filled["canonical_signal"] == "ac_power_kw").sum() == 10 * 96
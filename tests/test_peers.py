@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pv_fleet_health.peers import component_capacity, peer_comparison, peer_comparison_fleet
+
+
+def _scada_rs(plants=("P1", "P2"), n_inv=4, days=14, nameplate=True) -> pd.DataFrame:
+    idx = pd.date_range("2024-06-01", periods=days * 96, freq="15min", tz="Europe/Athens")
+    shape = np.clip(np.sin(np.pi * (idx.hour + idx.minute / 60 - 6) / 12), 0, None)
+    rows = []
+    for p in plants:
+        for i in range(n_inv):
+            kwp = 100.0 * (i + 1)
+            derate = 0.8 if i == 0 else 1.0  # INV0 underperforms its peers
+            rows.append(pd.DataFrame({
+                "plant_name": p, "ts": idx, "canonical_signal": "ac_power_kw", "component_type": "inverter",
+                "component_id": f"INV{i}", "value_rs": kwp * shape * derate,
+            }))
+            if nameplate:
+                rows.append(pd.DataFrame({
+                    "plant_name": p, "ts": idx[:1], "canonical_signal": "nameplate_kwp",
+                    "component_type": "inverter", "component_id": f"INV{i}", "value_rs": kwp,
+                }))
+        rows.append(pd.DataFrame({
+            "plant_name": p, "ts": idx, "canonical_signal": "tmod_c", "component_type": "plant",
+            "component_id": "S1", "value_rs": 25.0,
+        }))
+    return pd.concat(rows, ignore_index=True)
+
+
+def test_capacity_weighted_ratios_flag_the_derated_inverter(cfg):
+    rs = _scada_rs()
+    res = peer_comparison(rs, cfg, "P1")
+    s = res["summary"].set_index("component_id")
+    assert res["level"] == "inverter"
+    assert list(s["capacity_weight"]) == [100.0, 200.0, 300.0, 400.0]
+    assert s.loc["INV0", "median_ratio"] == pytest.approx(0.8)
+    assert s.loc["INV2", "median_ratio"] == pytest.approx(1.0)
+    assert list(s.index[s["flagged"]]) == ["INV0"]
+
+
+def test_missing_nameplate_falls_back_to_equal_weights(cfg):
+    rs = _scada_rs(nameplate=False)
+    cap = component_capacity(rs[rs["plant_name"] == "P1"], "inverter", ["INV0", "INV1"])
+    assert list(cap) == [1.0, 1.0]
+
+
+def test_fleet_matches_per_plant(cfg):
+    rs = _scada_rs(plants=("P1", "P2", "P3"))
+    fleet = peer_comparison_fleet(rs, cfg)
+    single = pd.concat([peer_comparison(rs, cfg, p)["summary"] for p in ["P1", "P2", "P3"]], ignore_index=True)
+    pd.testing.assert_frame_equal(fleet, single)
+
+
+def test_single_component_plant_is_skipped(cfg):
+    rs = _scada_rs(plants=("P1",), n_inv=1)
+    assert not peer_comparison(rs, cfg, "P1")["ok"]
+    assert peer_comparison_fleet(rs, cfg).empty
@@ -0,0 +1,83 @@
+from dataclasses import replace
+import pandas as pd
+import pytest
+from pv_fleet_health.pipeline import Stage, fingerprints, run_pipeline, topological_order
+
+
+def _raw(cfg):
+    return pd.read_csv(cfg.scada_path)
+
+def _double(cfg, raw):
+    return raw * 2
+
+def _total(cfg, double, raw):
+    return pd.DataFrame({"total": [double["x"].sum() + raw["x"].sum()]})
+
+def _nothing(cfg):
+    return None
+
+
+STAGES = [
+    Stage("total", _total, deps=("double", "raw")),
+    Stage("double", _double, deps=("raw",)),
+    Stage("raw", _raw, sources=("scada_path",)),
+    Stage("nothing", _nothing),
+]
+
+
+@pytest.fixture
+def pipe_cfg(cfg, tmp_path):
+    path = tmp_path / "scada.csv"
+    pd.DataFrame({"x": [1, 2, 3]}).to_csv(path, index=False)
+    return replace(cfg, scada_path=str(path))
+
+
+def _status(timing):
+    return dict(zip(timing["stage"], timing["status"], strict=True))
+
+
+def test_topological_order_and_errors():
+    assert [s.name for s in topological_order(STAGES)] == ["raw", "double", "total", "nothing"]
+    with pytest.raises(ValueError):
+        topological_order([Stage("a", _raw, deps=("b",)), Stage("b", _raw, deps=("a",))])
+    with pytest.raises(KeyError):
+        topological_order([Stage("a", _raw, deps=("missing",))])
+
+
+def test_fingerprints_follow_config_and_sources(pipe_cfg):
+    keys = fingerprints(STAGES, pipe_cfg)
+    assert keys == fingerprints(STAGES, pipe_cfg)
+    changed = fingerprints(STAGES, replace(pipe_cfg, residual_z_threshold=5.0))
+    assert all(changed[n] != keys[n] for n in keys)
+    pd.DataFrame({"x": [1, 2, 3, 4]}).to_csv(pipe_cfg.scada_path, index=False)
+    touched = fingerprints(STAGES, pipe_cfg)
+    assert touched["nothing"] == keys["nothing"]
+    assert all(touched[n] != keys[n] for n in ["raw", "double", "total"])
+
+
+def test_reruns_only_stale_stages(pipe_cfg, paths):
+    out, timing = run_pipeline(pipe_cfg, paths, stages=STAGES)
+    assert set(_status(timing).values()) == {"ran"}
+    assert out["total"]["total"].iloc[0] == 18 and out["nothing"] is None
+
+    out, timing = run_pipeline(pipe_cfg, paths, stages=STAGES, targets=["total"])
+    assert _status(timing) == {"total": "cached"}  # upstream of a fresh target is not even read
+    assert out["total"]["total"].iloc[0] == 18
+
+    pd.DataFrame({"x": [1, 2, 3, 4]}).to_csv(pipe_cfg.scada_path, index=False)
+    out, timing = run_pipeline(pipe_cfg, paths, stages=STAGES, max_workers=2)
+    assert _status(timing) == {"nothing": "cached", "raw": "ran", "double": "ran", "total": "ran"}
+    assert out["total"]["total"].iloc[0] == 30
+    _, timing = run_pipeline(pipe_cfg, paths, stages=STAGES, force=True)
+    assert set(_status(timing).values()) == {"ran"}
+
+
+def test_time_index_audit_stage_reads_the_wide_export(cfg, paths, tmp_path):
+    ts = pd.date_range("2024-01-01", periods=8, freq="15min")
+    path = tmp_path / "wide.csv"
+    pd.DataFrame({"Timestamp": ts.delete(3).strftime("%Y-%m-%d %H:%M"),
+                  "[P1] Total Irradiance (W*m^-2)": range(7)}).to_csv(path, index=False)
+    out, timing = run_pipeline(replace(cfg, scada_path=str(path)), paths, targets=["time_index_audit"])
+    assert set(timing["stage"]) == {"scada_wide", "signal_catalog", "time_index_audit"}
+    audit = out["time_index_audit"].set_index("plant_name")
+    assert audit.loc["P1", "n"] == 7 and audit.loc["P1", "median_dt_min"] == 15 and audit.loc["P1", "n_gaps"] == 1
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import plant_frame
+from pv_fleet_health.plots import downsample_minmax, render_fleet_quicklooks, render_plant_quicklooks
+
+
+def test_downsample_keeps_extremes_and_gaps():
+    s = plant_frame(days=20)["p_ac_kw"]
+    s.iloc[1000:1100] = np.nan
+    gappy = s.drop(s.index[1200:1300])  # missing timestamps, not just NaNs
+    out = downsample_minmax(gappy, 400)
+    assert len(out) < 450
+    assert out.max() == gappy.max() and out.min() == gappy.min()
+    assert out.index.is_monotonic_increasing
+    # the removed stretch is not bridged: a NaN sits at its start
+    before = gappy.index[gappy.index < s.index[1200]][-1]
+    assert np.isnan(out.loc[before]).any()
+
+
+def test_short_series_unchanged():
+    s = plant_frame(days=1)["poa_wm2"]
+    pd.testing.assert_series_equal(downsample_minmax(s, 4000), s)
+
+
+def test_render_plant_writes_pngs(tmp_path):
+    files = render_plant_quicklooks(plant_frame(days=3), "Plant A", str(tmp_path))
+    names = sorted(p.split("/")[-1] for p in files)
+    assert names == ["p_ac_kw.png", "poa_wm2.png", "power_vs_poa.png", "tmod_c.png"]
+    assert all(p.startswith(str(tmp_path / "Plant%20A")) for p in files)
+    with pytest.raises(ValueError):
+        render_plant_quicklooks(plant_frame(days=1), "..", str(tmp_path / "plots"))
+
+
+def test_render_fleet_in_process_pool(tmp_path):
+    frames = {"P1": plant_frame(days=2), "P2": plant_frame(days=2, seed=1)}
+    out = render_fleet_quicklooks(frames, str(tmp_path), max_workers=2)
+    assert set(out) == {"P1", "P2"}
+    assert all(len(files) == 4 for files in out.values())
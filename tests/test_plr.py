@@ -0,0 +1,52 @@
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+import pytest
+from pv_fleet_health.plr import bootstrap_median_ci, compute_plr_fleet, stack_kpi_tables, yoy_ratios
+
+
+def _daily(plr_pct: float, days: int = 3 * 365, seed: int = 0, start: str = "2021-01-01") -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range(start, periods=days, freq="D", tz="Europe/Athens")
+    years = np.arange(days) / 365.0
+    perf = (1 + plr_pct / 100) ** years * (1 + rng.normal(0, 0.01, days))
+    return pd.DataFrame({"perf_index_median": perf}, index=idx)
+
+
+def test_recovers_known_degradation(cfg):
+    tables = {"A": _daily(-0.5), "B": _daily(-2.0, seed=1), "C": _daily(0.0, days=200, seed=2), "D": None}
+    out = compute_plr_fleet(tables, replace(cfg, plr_bootstrap_samples=500)).set_index("plant_name")
+    assert out.loc["A", "plr_pct_per_year"] == pytest.approx(-0.5, abs=0.1)
+    assert out.loc["B", "plr_pct_per_year"] == pytest.approx(-2.0, abs=0.1)
+    for p in ["A", "B"]:
+        assert out.loc[p, "ok"] and out.loc[p, "plr_ci_low"] <= out.loc[p, "plr_pct_per_year"] <= out.loc[p, "plr_ci_high"]
+    assert not out.loc["C", "ok"] and out.loc["C", "n_pairs"] == 0
+    assert not out.loc["D", "ok"]
+
+
+def test_stack_aligns_plants_on_one_calendar():
+    wide = stack_kpi_tables({"A": _daily(0, days=10), "B": _daily(0, days=5, start="2021-01-08")}, "perf_index_median")
+    assert len(wide) == 12 and wide["B"].notna().sum() == 5 and wide["A"].notna().sum() == 10
+    R = yoy_ratios(np.array([[1.0, 0.0, 1.1, 2.0, 2.2]]), 2)
+    np.testing.assert_allclose(R, [[10.0, np.nan, 100.0]])  # division by zero -> missing pair
+
+
+@pytest.mark.parametrize("n", [41, 40])
+def test_beta_bootstrap_matches_resampling(n):
+    """The order-statistic shortcut has the same CI as explicit resampling (odd and even n)."""
+    rng = np.random.default_rng(3)
+    row = rng.standard_t(3, n)
+    R = np.concatenate([row, np.full(10, np.nan)])[None, :]
+    lo, hi = bootstrap_median_ci(R, 40_000, 0.9, np.random.default_rng(4))
+    samples = np.median(rng.choice(row, size=(40_000, n)), axis=1)
+    ref_lo, ref_hi = np.percentile(samples, [5, 95])
+    spread = ref_hi - ref_lo
+    assert lo[0] == pytest.approx(ref_lo, abs=0.05 * spread)
+    assert hi[0] == pytest.approx(ref_hi, abs=0.05 * spread)
+
+
+def test_bootstrap_handles_empty_rows():
+    R = np.array([[np.nan, np.nan], [1.0, 2.0]])
+    lo, hi = bootstrap_median_ci(R, 100, 0.682, np.random.default_rng(0))
+    assert np.isnan(lo[0]) and np.isnan(hi[0])
+    assert 1.0 <= lo[1] <= hi[1] <= 2.0
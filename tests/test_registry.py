@@ -0,0 +1,66 @@
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import plant_frame
+from pv_fleet_health.model import fit_expected_power_model, predict_expected
+from pv_fleet_health.registry import ModelRegistry
+
+
+@pytest.fixture
+def reg_cfg(cfg):
+    return replace(cfg, standard_freq="15min", model_min_points=200, registry_min_drift_points=100)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(tmp_path / "models")
+
+
+def test_fit_then_reuse(registry, reg_cfg):
+    df = plant_frame(days=20)
+    first = registry.load_or_fit("P1", df, reg_cfg)
+    assert first["refit"] and first["refit_reason"] == "no stored model"
+    again = registry.load_or_fit("P1", df, reg_cfg)
+    assert not again["refit"] and again["refit_reason"] is None
+    assert again["coefficients"] == first["coefficients"]
+
+
+def test_compact_model_predicts_like_fitted_model(registry, reg_cfg):
+    df = plant_frame(days=20)
+    compact = registry.load_or_fit("P1", df, reg_cfg)
+    full = fit_expected_power_model(df, reg_cfg)
+    np.testing.assert_allclose(predict_expected(compact, df), predict_expected(full, df), rtol=1e-9, atol=1e-6)
+
+
+def test_config_or_window_change_triggers_refit(registry, reg_cfg):
+    df = plant_frame(days=20)
+    registry.load_or_fit("P1", df, reg_cfg)
+    other = replace(reg_cfg, poa_for_kpi_min_wm2=250.0)
+    assert registry.refit_reason("P1", df, other, 0.25) == "model config changed"
+
+    changed = df.copy()
+    changed.iloc[500, changed.columns.get_loc("p_ac_kw")] += 1.0
+    assert registry.refit_reason("P1", changed, reg_cfg, 0.25) == "training window data changed"
+
+
+def test_newer_data_only_refits_on_drift(registry, reg_cfg):
+    df = plant_frame(days=30)
+    train = df[df.index < pd.Timestamp("2024-03-21", tz="Europe/Athens")]
+    registry.load_or_fit("P1", train, reg_cfg)
+    assert registry.refit_reason("P1", df, reg_cfg, 0.25) is None  # same behaviour after training
+
+    degraded = df.copy()
+    degraded.loc[degraded.index > train.index.max(), "p_ac_kw"] *= 0.8
+    reason = registry.refit_reason("P1", degraded, reg_cfg, 0.25)
+    assert reason is not None and reason.startswith("drift")
+    out = registry.load_or_fit("P1", degraded, reg_cfg)
+    assert out["refit"] and out["train_end"] == degraded.index.max().isoformat()
+
+
+def test_entry_paths_follow_plant_naming_rules(registry):
+    registry.put("P 1", {"n": 1})
+    registry.put("P_1", {"n": 2})
+    assert registry.get("P 1") == {"n": 1} and registry.get("P_1") == {"n": 2}
+    with pytest.raises(ValueError):
+        registry.put("..", {"n": 3})
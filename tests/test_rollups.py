@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import plant_frame
+from pv_fleet_health.rollups import RollupStore, aggregate_series, build_rollups, choose_level, merge_rollups
+
+
+def _sorted(df):
+    return df.sort_values(["signal", "ts"]).reset_index(drop=True)
+
+
+@pytest.fixture
+def series():
+    df = plant_frame(days=21)[["p_ac_kw", "poa_wm2"]]
+    return df.assign(e_kwh=df["p_ac_kw"] * 0.25)
+
+
+def test_levels_match_direct_aggregation(series):
+    rollups = build_rollups(series)
+    for level, freq in [("daily", "1D"), ("weekly", "W-MON")]:
+        direct = _sorted(aggregate_series(series, freq))
+        pd.testing.assert_frame_equal(rollups[level], direct, check_dtype=False)
+    daily_e = rollups["daily"].query("signal == 'e_kwh'")["sum"].sum()
+    assert daily_e == pytest.approx(series["e_kwh"].sum())
+
+
+def test_merging_partial_buckets_is_exact(series):
+    cut = series.index[len(series) // 2 + 3]  # mid-hour, mid-day
+    merged = merge_rollups(aggregate_series(series[series.index < cut], "1h"),
+                           aggregate_series(series[series.index >= cut], "1h"))
+    whole = _sorted(aggregate_series(series, "1h"))
+    pd.testing.assert_frame_equal(merged, whole, check_dtype=False)
+
+
+def test_incremental_updates_match_full_build(series, tmp_path):
+    store = RollupStore(tmp_path)
+    cut = series.index[1000]
+    assert store.update("P1", series[series.index <= cut]) == 1001
+    assert store.watermark("P1") == cut
+    assert store.update("P1", series) == len(series) - 1001  # only newer rows are consumed
+    assert store.update("P1", series) == 0
+    full = build_rollups(series)
+    for level in full:
+        pd.testing.assert_frame_equal(_sorted(store.read("P1", level)), _sorted(full[level]), check_dtype=False)
+
+
+def test_query_picks_level_by_point_budget(series, tmp_path):
+    store = RollupStore(tmp_path)
+    store.update("P1", series)
+    start, end = series.index[0], series.index[-1]
+    assert choose_level(start, end, 1000) == "hourly"
+    assert choose_level(start, end, 100) == "daily"
+    assert choose_level(start, end, 1) == "weekly"
+    out = store.query("P1", start, end, 100, signals=["e_kwh"])
+    assert set(out["level"]) == {"daily"} and set(out["signal"]) == {"e_kwh"}
+    assert len(out) == 21
+    assert np.isclose(out["sum"].sum(), series["e_kwh"].sum())
+    naive = store.query("P1", start.tz_localize(None), end.tz_localize(None), 100, signals=["e_kwh"])
+    pd.testing.assert_frame_equal(naive, out)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from pv_fleet_health.scada_headers import build_signal_catalog
+from pv_fleet_health.scada_reshape import CATALOG_ATTR_COLS, column_to_float, wide_to_long
+
+
+def _string_path(scada_wide, signal_catalog, timestamp_col):
+    """Previous implementation: every long value cast to str, decimal commas replaced."""
+    cols = [timestamp_col] + signal_catalog["raw_column_name"].tolist()
+    long = scada_wide.loc[:, cols].melt(id_vars=[timestamp_col], var_name="raw_column_name", value_name="value")
+    long["value"] = pd.to_numeric(long["value"].astype(str).str.replace(",", "."), errors="coerce")
+    long = long.merge(signal_catalog[["raw_column_name"] + CATALOG_ATTR_COLS], on="raw_column_name", how="left")
+    return long.rename(columns={timestamp_col: "ts"})
+
+
+def _export(tmp_path) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 200
+    power = rng.normal(100, 20, n)
+    power[::17] = np.nan
+    wide = pd.DataFrame({
+        "Timestamp": pd.date_range("2024-01-01", periods=n, freq="15min").strftime("%Y-%m-%d %H:%M"),
+        "[P1] Array 1 Array output power (kW)": power,
+        "[P1] Array 1 Cumulative energy (kWh)": np.arange(n, dtype="int64"),
+        "[P1] Module Temperature (C)": [f"{v:.2f}".replace(".", ",") for v in rng.normal(30, 5, n)],
+        "[P1] Total Irradiance (W*m^-2)": ["n/a" if i % 13 == 0 else f"{i},5" for i in range(n)],
+        "[P1] Total power factor (-)": pd.array([0.99 if i % 11 else None for i in range(n)], dtype="Float64"),
+    })
+    path = tmp_path / "scada_wide.parquet"
+    wide.to_parquet(path, index=False)
+    return pd.read_parquet(path)
+
+
+def test_parity_with_string_path_on_parquet_export(tmp_path):
+    wide = _export(tmp_path)
+    catalog = build_signal_catalog(wide.columns.tolist(), "Timestamp")
+    new = wide_to_long(wide, catalog, "Timestamp")
+    pd.testing.assert_frame_equal(new, _string_path(wide, catalog, "Timestamp"))
+    temp = new[new["canonical_signal"] == "tmod_c"]["value"]
+    assert temp.notna().all() and temp.between(0, 60).all()
+    assert new[new["canonical_signal"] == "poa_irradiance_wm2"]["value"].isna().sum() == 16
+
+
+def test_column_to_float_dtypes():
+    np.testing.assert_array_equal(column_to_float(pd.Series(["1,5", "2", None, "x"])), [1.5, 2.0, np.nan, np.nan])
+    np.testing.assert_array_equal(column_to_float(pd.Series([1, 2], dtype="int32")), [1.0, 2.0])
+    np.testing.assert_array_equal(column_to_float(pd.Series([True, False])), [np.nan, np.nan])
+    floats = pd.Series([1.0, 2.0])
+    assert np.shares_memory(column_to_float(floats), floats.to_numpy())
+
+
+def test_empty_catalog():
+    wide = pd.DataFrame({"Timestamp": ["2024-01-01 00:00"]})
+    long = wide_to_long(wide, build_signal_catalog([], "Timestamp").reindex(
+        columns=["raw_column_name"] + CATALOG_ATTR_COLS), "Timestamp")
+    assert long.empty and list(long.columns[:3]) == ["ts", "raw_column_name", "value"]
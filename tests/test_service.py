@@ -0,0 +1,86 @@
+import asyncio
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from pv_fleet_health.rollups import RollupStore
+from pv_fleet_health.service import QueryService, save_fleet_tables, save_health_card_tables
+
+
+@pytest.fixture
+def service(paths):
+    days = pd.date_range("2024-01-01", periods=60, freq="D", tz="Europe/Athens")
+    card = {
+        "daily": pd.DataFrame({"energy_kwh": np.arange(60.0)}, index=days),
+        "losses_daily": pd.DataFrame({"loss_kwh": np.ones(60)}, index=days),
+    }
+    save_health_card_tables(paths, "P1", card)
+    save_fleet_tables(paths, pd.DataFrame({"plant_name": ["P1"]}), pd.DataFrame({"plant_name": ["P1"]}))
+    idx = pd.date_range("2024-01-01", periods=96 * 20, freq="15min", tz="Europe/Athens")
+    RollupStore(paths.rollup_dir).update("P1", pd.DataFrame({"p_ac_kw": np.ones(len(idx))}, index=idx))
+    return QueryService(paths, cache_size=4)
+
+
+def get(service, target, headers=None):
+    return asyncio.run(service.handle("GET", target, headers or {}))
+
+
+def test_series_with_naive_window(service):
+    status, _, body = get(service, "/plants/P1/series?start=2024-01-05&end=2024-01-10")
+    assert status == 200
+    rows = json.loads(body)
+    assert rows and {r["level"] for r in rows} == {"hourly"}
+    ts = pd.to_datetime([r["ts"] for r in rows], utc=True)
+    assert ts.min() >= pd.Timestamp("2024-01-05", tz="Europe/Athens")
+    assert ts.max() <= pd.Timestamp("2024-01-10", tz="Europe/Athens")
+
+
+def test_kpi_window_and_etag(service):
+    status, hdrs, body = get(service, "/plants/P1/kpi?days=9")
+    assert status == 200 and len(json.loads(body)) == 10
+    assert hdrs["X-Cache"] == "miss"
+    assert get(service, "/plants/P1/kpi?days=9")[1]["X-Cache"] == "hit"
+    assert get(service, "/plants/P1/kpi?days=9", {"if-none-match": hdrs["ETag"]})[0] == 304
+
+
+@pytest.mark.parametrize("target", ["/plants/../kpi", "/plants/%2e%2e/losses", "/plants/./series"])
+def test_plant_names_cannot_escape_output_dirs(service, target):
+    assert get(service, target)[0] == 400
+
+
+def test_plant_listing_decodes_directory_names(service, paths):
+    save_health_card_tables(paths, "Plant A/1", {"daily": pd.DataFrame({"energy_kwh": [1.0]})})
+    assert json.loads(get(service, "/plants")[2]) == ["P1", "Plant A/1"]
+    assert get(service, "/plants/Plant%20A%2F1/kpi")[0] == 200
+
+
+def test_unknown_endpoint_and_missing_plant(service):
+    assert get(service, "/nope")[0] == 404
+    assert get(service, "/plants/P2/kpi")[0] == 404
+
+
+def _raw_request(service, request_line: bytes) -> bytes:
+    async def main():
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request_line + b"\r\n\r\n")
+        await writer.drain()
+        out = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return out
+    return asyncio.run(main())
+
+
+def test_malformed_request_line_is_400(service):
+    assert _raw_request(service, b"GARBAGE").startswith(b"HTTP/1.1 400")
+
+
+def test_errors_inside_handling_are_500(service, monkeypatch):
+    def boom(*args):
+        raise ValueError("broken parquet")
+    monkeypatch.setattr(service, "_build", boom)
+    out = _raw_request(service, b"GET /plants/P1/kpi HTTP/1.1")
+    assert out.startswith(b"HTTP/1.1 500") and b"broken parquet" in out
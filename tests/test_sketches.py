@@ -0,0 +1,76 @@
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import plant_frame
+from pv_fleet_health.anomalies import detect_anomalies, residual_sketch
+from pv_fleet_health.irradiance_qc import clearsky_envelope_violations, daily_poa_sketches
+from pv_fleet_health.kpi import compute_kpis, perf_ratio_sketch
+from pv_fleet_health.sketches import QuantileSketch, merge_sketch_dicts, merge_sketches, sketch
+
+QS = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+
+def _rank_values(x, qs):
+    """The order statistic the sketch estimates: rank floor(q * (n - 1))."""
+    return np.sort(x)[np.floor(np.asarray(qs) * (len(x) - 1)).astype(int)]
+
+
+@pytest.mark.parametrize("alpha", [0.01, 0.05])
+def test_relative_accuracy(rng, alpha):
+    x = np.concatenate([rng.lognormal(3, 1.5, 5000), -rng.lognormal(1, 1, 2000), np.zeros(50), [np.nan]])
+    s = sketch(x, alpha)
+    assert s.count == 7050
+    exact = _rank_values(x[np.isfinite(x)], QS)
+    np.testing.assert_allclose(s.quantile(QS), exact, rtol=alpha)
+    assert s.min == np.nanmin(x) and s.quantile(1.0) <= s.max == np.nanmax(x)
+    assert np.isnan(QuantileSketch(alpha).quantile(0.5))
+
+
+def test_merge_equals_sketch_of_union(rng):
+    x = rng.normal(0, 50, 9000)
+    parts = [sketch(p) for p in np.array_split(x, 7)]
+    merged, whole = merge_sketches(parts), sketch(x)
+    np.testing.assert_array_equal(merged.quantile(QS), whole.quantile(QS))
+    assert merged.mad() == whole.mad()
+    with pytest.raises(ValueError):
+        sketch(x, 0.01).merge(sketch(x, 0.02))
+    a = {"d1": sketch(x[:10]), "d2": sketch(x[10:20])}
+    both = merge_sketch_dicts(a, {"d2": sketch(x[20:30]), "d3": sketch(x[30:40])})
+    assert {k: v.count for k, v in both.items()} == {"d1": 10, "d2": 20, "d3": 10}
+
+
+def test_chunked_anomalies_and_envelope_match_whole_frame(cfg):
+    cfg = replace(cfg, standard_freq="15min")
+    df = plant_frame(days=12)
+    p_exp = 0.8 * df["poa_wm2"]
+    chunks = [df.iloc[i:i + 300] for i in range(0, len(df), 300)]
+    stats = merge_sketches([residual_sketch(c, cfg, p_exp.loc[c.index]) for c in chunks])
+    whole = detect_anomalies(df, cfg, p_exp)
+    chunked = pd.concat([detect_anomalies(c, cfg, p_exp.loc[c.index], residual_stats=stats) for c in chunks])
+    # the sketch median/MAD are within alpha of the exact ones, so z-scores barely move
+    z_w, z_c = whole["resid_z"].to_numpy(), chunked["resid_z"].to_numpy()
+    ok = np.isfinite(z_w) & (np.abs(z_w) > 1)
+    np.testing.assert_allclose(z_c[ok], z_w[ok], rtol=0.05)
+
+    daily = {}
+    for c in chunks:
+        daily = merge_sketch_dicts(daily, daily_poa_sketches(c["poa_wm2"], cfg))
+    viol = clearsky_envelope_violations(df["poa_wm2"], cfg, daily_stats=daily)
+    exact = clearsky_envelope_violations(df["poa_wm2"], cfg)
+    assert (viol != exact).mean() < 0.01
+
+
+def test_chunked_perf_index_matches_whole_frame(cfg):
+    cfg = replace(cfg, standard_freq="15min")
+    df = plant_frame(days=12)
+    chunks = [df.iloc[i:i + 60] for i in range(0, len(df), 60)]  # mostly < 100 perf points each
+    stats = merge_sketches([perf_ratio_sketch(c, cfg) for c in chunks])
+    whole = compute_kpis(df, cfg, 100.0)["ts"]["perf_index"]
+    assert stats.count == whole.notna().sum()
+    chunked = pd.concat([compute_kpis(c, cfg, 100.0, perf_stats=stats)["ts"]["perf_index"] for c in chunks])
+    pd.testing.assert_index_equal(chunked.index, whole.index)
+    assert (chunked.notna() == whole.notna()).all()
+    np.testing.assert_allclose(chunked.dropna(), whole.dropna(), rtol=cfg.sketch_relative_accuracy)
+    # without the merged sketch a small chunk has too few points to be normalized at all
+    assert compute_kpis(chunks[5], cfg, 100.0)["ts"]["perf_index"].isna().all()
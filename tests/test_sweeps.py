@@ -0,0 +1,58 @@
+from dataclasses import replace
+import numpy as np
+import pytest
+from conftest import plant_frame
+from pv_fleet_health.anomalies import detect_anomalies
+from pv_fleet_health.context import plant_context
+from pv_fleet_health.losses import point_losses
+from pv_fleet_health.sweeps import sweep_fleet, sweep_grid, sweep_plant
+
+GRID = {"poa_for_kpi_min_wm2": [100.0, 200.0, 400.0], "residual_z_threshold": [2.0, 3.0, 4.0],
+        "rolling_window_days": [1, 3]}
+
+
+@pytest.fixture
+def sweep_cfg(cfg):
+    return replace(cfg, standard_freq="15min")
+
+
+@pytest.fixture
+def labeled():
+    df = plant_frame(days=14)
+    df["p_expected_kw"] = 0.8 * df["poa_wm2"]
+    df.loc[df.index[::97], "p_ac_kw"] *= 0.3  # outliers
+    return df
+
+
+def test_grid_shape_and_unknown_params(sweep_cfg):
+    assert len(sweep_grid(sweep_cfg, GRID)) == 18
+    assert sweep_grid(sweep_cfg).iloc[0]["residual_z_threshold"] == sweep_cfg.residual_z_threshold
+    with pytest.raises(ValueError):
+        sweep_grid(sweep_cfg, {"model_min_points": [1]})
+
+
+def test_matches_detect_anomalies_and_losses(labeled, sweep_cfg):
+    out = sweep_plant(labeled, sweep_cfg, GRID)
+    for row in out.itertuples():
+        c = replace(sweep_cfg, poa_for_kpi_min_wm2=row.poa_for_kpi_min_wm2,
+                    residual_z_threshold=row.residual_z_threshold, rolling_window_days=row.rolling_window_days)
+        an = detect_anomalies(labeled, c, labeled["p_expected_kw"])
+        mask = plant_context(labeled, c).residual_mask(an["residual_kw"])
+        losses = point_losses(labeled, c)
+        assert row.n_points == mask.sum()
+        assert row.n_anomaly_points == an["anomaly_point"].sum()
+        assert row.roll_med_neg_frac == pytest.approx((an.loc[mask, "resid_roll_med"] < 0).mean())
+        assert row.loss_kwh == pytest.approx(losses["loss_kwh"].sum())
+        assert row.loss_unexplained == pytest.approx(losses["loss_unexplained"].sum())
+
+
+def test_fleet_uses_given_contexts(labeled, sweep_cfg):
+    other = labeled.copy()
+    other["p_ac_kw"] *= 0.9
+    ctx = plant_context(labeled, sweep_cfg)
+    out = sweep_fleet({"A": labeled, "B": other}, sweep_cfg, GRID, contexts={"A": ctx})
+    assert list(out.columns[:1]) == ["plant_name"] and len(out) == 36
+    a = out[out["plant_name"] == "A"].drop(columns="plant_name").reset_index(drop=True)
+    np.testing.assert_array_equal(a.to_numpy(), sweep_plant(labeled, sweep_cfg, GRID).to_numpy())
+    with pytest.raises(ValueError):
+        sweep_fleet({"B": other.iloc[:-1]}, sweep_cfg, GRID, contexts={"B": ctx})
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from pv_fleet_health.scada_headers import build_signal_catalog
+from pv_fleet_health.scada_reshape import wide_to_long
+from pv_fleet_health.timebase import audit_timestamps, compute_time_index_audit, plant_timestamps
+
+TZ = "Europe/Athens"
+
+
+def _pairs():
+    p1 = pd.date_range("2024-03-30 22:00", "2024-03-31 06:00", freq="15min", tz=TZ)
+    p1 = p1.delete(np.arange(10, 14))          # one-hour gap (DST day)
+    p1 = p1.append(p1[[20, 20]])               # two duplicates of one timestamp (on the DST day)
+    p2 = pd.date_range("2024-05-01", periods=20, freq="5min", tz=TZ)
+    return pd.DataFrame({
+        "plant_name": ["P1"] * len(p1) + ["P2"] * len(p2) + ["P2"],
+        "ts": list(p1) + list(p2) + [pd.NaT],
+    }).sample(frac=1.0, random_state=0)
+
+
+def test_audit_summary_gaps_and_dst():
+    res = audit_timestamps(_pairs())
+    s = res["summary"].set_index("plant_name")
+    assert s.loc["P1", "median_dt_min"] == 15 and s.loc["P2", "median_dt_min"] == 5
+    assert s.loc["P1", "n"] == 27 and s.loc["P1", "n_unique"] == 25
+    assert s.loc["P1", "dup_frac"] == 2 / 27 and s.loc["P2", "dup_frac"] == 0
+    assert s.loc["P2", "n_nat"] == 1 and s.loc["P1", "n_gaps"] == 1
+    gap = res["gaps"].iloc[0]
+    assert gap["gap_minutes"] == 75 and gap["missing_steps"] == 4
+    dst = res["dst_anomalies"]
+    assert set(dst.loc[dst["plant_name"] == "P1", "kind"]) == {"duplicate", "gap"}
+    assert dst.loc[dst["kind"] == "nat", "count"].tolist() == [1]
+
+
+def test_long_audit_counts_export_duplicates_not_melt_repetition():
+    ts = pd.date_range("2024-01-01", periods=8, freq="15min", tz=TZ)
+    wide = pd.DataFrame({
+        "Timestamp": ts.append(ts[:1]),
+        "[P1] Total Irradiance (W*m^-2)": np.arange(9.0),
+        "[P1] Module Temperature (C)": np.arange(9.0),
+    })
+    catalog = build_signal_catalog(wide.columns.tolist(), "Timestamp")
+    audit = compute_time_index_audit(wide_to_long(wide, catalog, "Timestamp")).set_index("plant_name")
+    assert audit.loc["P1", "dup_frac"] == 2 / 18
+    assert audit.loc["P1", "n_unique"] == 8 and audit.loc["P1", "median_dt_min"] == 15
+    pairs = plant_timestamps(wide, catalog, "Timestamp")
+    assert len(pairs) == 9
+
+
+def test_plant_timestamps_matches_per_plant_scan():
+    rng = np.random.default_rng(0)
+    n = 50
+    wide = pd.DataFrame({
+        "Timestamp": pd.date_range("2024-01-01", periods=n, freq="15min", tz=TZ),
+        "[P2] Total Irradiance (W*m^-2)": np.where(rng.random(n) < 0.5, np.nan, 1.0),
+        "[P1] Module Temperature (C)": np.where(rng.random(n) < 0.3, np.nan, 1.0),
+        "[P2] Module Temperature (C)": np.where(rng.random(n) < 0.5, np.nan, 1.0),
+        "[P1] Total Irradiance (W*m^-2)": np.where(rng.random(n) < 0.3, np.nan, 1.0),
+    })
+    catalog = build_signal_catalog(wide.columns.tolist(), "Timestamp")
+    got = plant_timestamps(wide, catalog, "Timestamp")
+    expected = pd.concat([
+        pd.DataFrame({"plant_name": p, "ts": wide.loc[wide.filter(like=f"[{p}]").notna().any(axis=1), "Timestamp"]})
+        for p in ["P1", "P2"]
+    ], ignore_index=True)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+    assert plant_timestamps(wide.iloc[:0], catalog, "Timestamp").empty
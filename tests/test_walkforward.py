@@ -0,0 +1,57 @@
+from dataclasses import replace
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import plant_frame
+from pv_fleet_health.model import validate_walkforward, walkforward_windows
+
+METRICS = ["train_start", "train_end", "test_end", "ok", "mae_kw", "rmse_kw", "n"]
+
+
+@pytest.fixture
+def wf_cfg(cfg):
+    return replace(cfg, model_min_points=200, walkforward_train_days=10, walkforward_test_days=5)
+
+
+@pytest.fixture
+def df():
+    return plant_frame(days=42)
+
+
+def test_windows_tile_the_series(df, wf_cfg):
+    w = walkforward_windows(df, wf_cfg)
+    assert len(w) == 3
+    assert all(b == c for (_, b, _), (c, _, _) in zip(w, w[1:], strict=False))
+
+
+def test_cached_folds_are_reused_and_changed_folds_refit(df, wf_cfg, tmp_path):
+    first = validate_walkforward(df, wf_cfg, "P1", cache_dir=str(tmp_path))
+    assert first["ok"].all() and not first["cached"].any()
+    again = validate_walkforward(df, wf_cfg, "P1", cache_dir=str(tmp_path))
+    assert again["cached"].all()
+    pd.testing.assert_frame_equal(again[METRICS], first[METRICS])
+
+    changed = df.copy()
+    last_fold = (changed.index >= pd.Timestamp("2024-03-27", tz="Europe/Athens")) & (
+        changed.index < pd.Timestamp("2024-03-30", tz="Europe/Athens"))
+    changed.loc[last_fold, "p_ac_kw"] *= 0.9  # only the last fold's data changes
+    third = validate_walkforward(changed, wf_cfg, "P1", cache_dir=str(tmp_path))
+    assert list(third["cached"]) == [True, True, False]
+    # other plant, other config: no reuse
+    assert not validate_walkforward(df, wf_cfg, "P2", cache_dir=str(tmp_path))["cached"].any()
+    other = replace(wf_cfg, poa_for_kpi_min_wm2=250.0)
+    assert not validate_walkforward(df, other, "P1", cache_dir=str(tmp_path))["cached"].any()
+
+
+def test_parallel_matches_serial(df, wf_cfg):
+    serial = validate_walkforward(df, wf_cfg)
+    parallel = validate_walkforward(df, wf_cfg, max_workers=2)
+    pd.testing.assert_frame_equal(serial[METRICS], parallel[METRICS])
+    np.testing.assert_allclose(
+        [r["coef"] for r in serial["coefficients"]], [r["coef"] for r in parallel["coefficients"]]
+    )
+
+
+def test_insufficient_points(df, wf_cfg):
+    out = validate_walkforward(df.iloc[:100], wf_cfg)
+    assert not out.loc[0, "ok"]